@@ -1,5 +1,23 @@
+import time
 import cv2 as cv
 
+from HudCompositor import HudCompositor
+from SignSession import SentenceState
+
+
+def sentence_state_property(name):
+    """
+    :param name: str, the name of an attribute of SentenceState.
+    :return: property, reads and writes the attribute of the active SentenceState.
+    """
+    def get_attribute(self):
+        return getattr(self.sentence_state, name)
+
+    def set_attribute(self, value):
+        setattr(self.sentence_state, name, value)
+
+    return property(get_attribute, set_attribute)
+
 
 class ApplicationMode:
     """
@@ -13,10 +31,19 @@ class ApplicationMode:
         - 'q' : quit application
         - 's' : enable/disable sentence mode
         - 'l' : enable/disable landmarks
+        - 'p' : show/hide the performance overlay(FPS and latencies)
     Also, this class provides methods that help and/or change
     the flow of data in the application.
+    The word and the sentence are kept in a SentenceState, so the same object can
+    build the sentences of many signers(see use_session).
     """
 
+    WORD = sentence_state_property('word')
+    SENTENCE = sentence_state_property('sentence')
+    SENTENCE_MOVE_INDEX = sentence_state_property('sentence_move_index')  # FIXME, has to be reset somewhere
+    insert_deadline = sentence_state_property('insert_deadline')
+    frame_time = sentence_state_property('frame_time')
+
     def __init__(self) -> None:
         """
         Initialize necessary variables for the class and some
@@ -28,12 +55,11 @@ class ApplicationMode:
         self.MODE = '1'
         self.SHOW_LANDMARKS = False
         self.SENTENCE_MODE = False
+        self.SHOW_PROFILER = False
 
         # control attributes for sentence mode
-        self.INSERT_DELAY = 30  # 30 frames delay
-        self.WORD = ""
-        self.SENTENCE = ""
-        self.SENTENCE_MOVE_INDEX = -1  # FIXME, has to be reset somewhere
+        self.INSERT_DELAY = 1.0  # seconds between two insertions, the same at any frame rate
+        self.sentence_state = SentenceState()  # WORD, SENTENCE, insert_deadline, ...
         self.MAX_WORD_LENGTH = 30
         self.MAX_SENTENCE_LENGTH = 60
 
@@ -41,8 +67,18 @@ class ApplicationMode:
         self.purple = (128, 0, 128)
         self.white = (255, 255, 255)
 
+        # the header and the sentence panel are cached, they change only on a key press or an insertion
+        self.hud = HudCompositor()
+
         self.TAKE = 0
 
+    def use_session(self, session):
+        """
+        This method is used to build the word and the sentence of a signer with the next calls.
+        :param session: SignSession, the session of the signer.
+        """
+        self.sentence_state = session.sentence
+
     def get_app_mode(self, key_input):
         """
         This method is used to change the application mode
@@ -60,16 +96,18 @@ class ApplicationMode:
             self.MODE = '3'
         elif key_input == ord('4'):
             self.MODE = '4'
-            self.INSERT_DELAY = 30
+            self.restart_insert_delay()
         elif key_input == ord('5'):
             self.MODE = '5'
-            self.INSERT_DELAY = 30
+            self.restart_insert_delay()
         elif key_input == ord('q'):
             self.MODE = 'q'
         elif key_input == ord('s') and self.MODE in {'4', '5'}:
             self.SENTENCE_MODE = not self.SENTENCE_MODE
         elif key_input == ord('l'):
             self.SHOW_LANDMARKS = not self.SHOW_LANDMARKS
+        elif key_input == ord('p'):
+            self.SHOW_PROFILER = not self.SHOW_PROFILER
         else:
             self.MODE = self.MODE
             self.SHOW_LANDMARKS = self.SHOW_LANDMARKS
@@ -95,6 +133,8 @@ class ApplicationMode:
 
             if self.MODE == '3' and dm.SEQUENCE_ONGOING:
                 text = text + f", frame: {dm.current_sequence_frame}/{dm.number_of_frames_per_sequence}"
+            if dm.burst_remaining > 0:
+                text = text + f", burst: {dm.burst_remaining}"
 
         else:
             text = f"Save {data_type} Landmarks Mode(letter)"
@@ -107,23 +147,44 @@ class ApplicationMode:
         :param frame: np.array, the frame to be displayed.
         :return: frame: np.Array, the frame with the sentence mode displayed on it.
         """
+        return self.hud.draw_layer(frame, 'sentence', -50, 50, (self.WORD, self.SENTENCE),
+                                   self.render_sentence_panel)
+
+    def render_sentence_panel(self, image, mask):
+        """
+        This method is used to render the sentence panel(box at the bottom of the frame) for the HudCompositor.
+        :param image: np.array, the image of the panel.
+        :param mask: np.array, the mask of the panel.
+        """
         # draw box at the bottom of the frame
-        cv.rectangle(frame, (0, frame.shape[0]), (frame.shape[1], frame.shape[0] - 50),
-                     (255, 255, 255), -1)
+        cv.rectangle(image, (0, 0), (image.shape[1], image.shape[0]), self.white, -1)
+        mask[:] = 255
 
         # display sentence at the bottom of the frame
-        cv.putText(frame, f'sentence: {self.SENTENCE}',
-                   (10, frame.shape[0] - 10),
+        cv.putText(image, f'sentence: {self.SENTENCE}',
+                   (10, image.shape[0] - 10),
                    cv.FONT_HERSHEY_SIMPLEX, 0.5,
                    self.purple, 1, cv.LINE_AA)
 
         # display word above sentence
-        cv.putText(frame, f'word: {self.WORD}',
-                   (10, frame.shape[0] - 30),
+        cv.putText(image, f'word: {self.WORD}',
+                   (10, image.shape[0] - 30),
                    cv.FONT_HERSHEY_SIMPLEX, 0.5,
                    self.purple, 1, cv.LINE_AA)
 
-        return frame
+    def render_header(self, text):
+        """
+        :param text: str, the text of the header.
+        :return: function, renders the header(white bar with the text in the middle) for the HudCompositor.
+        """
+        def render(image, mask):
+            cv.rectangle(image, (0, 0), (image.shape[1], image.shape[0]), self.white, -1)
+            mask[:] = 255
+            text_size = cv.getTextSize(text, cv.FONT_HERSHEY_SIMPLEX, 0.5, 1)[0]
+            cv.putText(image, text, (int((image.shape[1] - text_size[0]) / 2), 15),
+                       cv.FONT_HERSHEY_SIMPLEX, 0.5, self.purple, 1, cv.LINE_AA)
+
+        return render
 
     def set_app_mode(self, frame, key_input, data_manipulator_static, data_manipulator_dynamic):
         """
@@ -134,7 +195,6 @@ class ApplicationMode:
         :param data_manipulator_static: DataManipulatorStatic, object that stores static data.
         :param data_manipulator_dynamic: DataManipulatorStatic, object that stores dynamic data.
         """
-        cv.rectangle(frame, (0, 0), (frame.shape[1], 20), (255, 255, 255), -1)
         text = ""
 
         if self.MODE == '1':
@@ -156,12 +216,18 @@ class ApplicationMode:
         elif self.MODE == 'q':
             text = "Quit Application"
 
-        text_size = cv.getTextSize(text, cv.FONT_HERSHEY_SIMPLEX, 0.5, 1)[0]
-        cv.putText(frame, text, (int((frame.shape[1] - text_size[0]) / 2), 15),
-                   cv.FONT_HERSHEY_SIMPLEX, 0.5, self.purple, 1, cv.LINE_AA)
+        # the header is rendered again only when its text changes
+        frame = self.hud.draw_layer(frame, 'header', 0, 21, text, self.render_header(text))
 
         return frame
 
+    def restart_insert_delay(self, timestamp=None):
+        """
+        This method is used to wait INSERT_DELAY seconds before the next insertion.
+        :param timestamp: float, the time the delay starts from, time.monotonic() by default.
+        """
+        self.insert_deadline = (time.monotonic() if timestamp is None else timestamp) + self.INSERT_DELAY
+
     def add_to_word(self, label):
         """
         This method is used to add a letter/entire word to the active word attribute.
@@ -172,7 +238,7 @@ class ApplicationMode:
             self.WORD += label
             if self.MODE == '5':
                 self.WORD += " "
-            self.INSERT_DELAY = 30
+            self.restart_insert_delay(self.frame_time)
 
     def delete_letter_from_word(self):
         """
@@ -181,7 +247,7 @@ class ApplicationMode:
         """
         if len(self.WORD) > 0:
             self.WORD = self.WORD[:-1]
-            self.INSERT_DELAY = 30
+            self.restart_insert_delay(self.frame_time)
 
     def delete_word(self):
         """
@@ -189,16 +255,20 @@ class ApplicationMode:
         :return:
         """
         self.WORD = ""
-        self.INSERT_DELAY = 30
+        self.restart_insert_delay(self.frame_time)
 
-    def create_word(self, label, accepted_word_labels):
+    def create_word(self, label, accepted_word_labels, timestamp=None, wait=True):
         """
         This method is used to create a word from the detected signs.
         :param accepted_word_labels: list, accepted sign labels for the word.
         :param label: str, the detected sign label.
+        :param timestamp: float, the time of the frame in seconds, time.monotonic() by default.
+        :param wait: bool, wait INSERT_DELAY seconds after the last insertion, False for the signs
+        that are given out only once(see SignSpotter).
         :return: None
         """
-        if self.INSERT_DELAY == 0:
+        self.frame_time = time.monotonic() if timestamp is None else timestamp
+        if not wait or self.frame_time >= self.insert_deadline:
             if label in accepted_word_labels:
                 self.add_to_word(label)
             elif label == "delete_letter_from_word":
@@ -208,8 +278,6 @@ class ApplicationMode:
             # if the detected sign is not in the accepted_word_labels do nothing
             else:
                 return
-        else:
-            self.INSERT_DELAY -= 1
 
     def add_word_to_sentence(self):
         """
@@ -221,7 +289,7 @@ class ApplicationMode:
                 self.WORD += " "
             self.SENTENCE += self.WORD
             self.WORD = ""
-            self.INSERT_DELAY = 30
+            self.restart_insert_delay(self.frame_time)
             self.SENTENCE_MOVE_INDEX = -1
 
     def move_to_left_word(self):
@@ -231,7 +299,7 @@ class ApplicationMode:
         """
         buff_split_sentence = self.SENTENCE.lower().split(" ")
         if len(buff_split_sentence) >= 1 and self.SENTENCE_MOVE_INDEX >= 0:
-            self.INSERT_DELAY = 30
+            self.restart_insert_delay(self.frame_time)
             self.SENTENCE_MOVE_INDEX -= 1
             if self.SENTENCE_MOVE_INDEX > -1:
                 buff_split_sentence[self.SENTENCE_MOVE_INDEX] = buff_split_sentence[self.SENTENCE_MOVE_INDEX].upper()
@@ -244,7 +312,7 @@ class ApplicationMode:
         """
         buff_split_sentence = self.SENTENCE.lower().split(" ")
         if len(buff_split_sentence) >= 1 and self.SENTENCE_MOVE_INDEX < len(buff_split_sentence) - 1:
-            self.INSERT_DELAY = 30
+            self.restart_insert_delay(self.frame_time)
             self.SENTENCE_MOVE_INDEX += 1
             if self.SENTENCE_MOVE_INDEX < len(buff_split_sentence):
                 buff_split_sentence[self.SENTENCE_MOVE_INDEX] = buff_split_sentence[self.SENTENCE_MOVE_INDEX].upper()
@@ -260,7 +328,7 @@ class ApplicationMode:
             self.WORD = buff_split_sentence[self.SENTENCE_MOVE_INDEX]
             buff_split_sentence.pop(self.SENTENCE_MOVE_INDEX)
             self.SENTENCE = " ".join(buff_split_sentence)
-            self.INSERT_DELAY = 30
+            self.restart_insert_delay(self.frame_time)
             self.SENTENCE_MOVE_INDEX = -1
 
     def delete_word_from_sentence(self):
@@ -272,7 +340,7 @@ class ApplicationMode:
         if len(buff_split_sentence) > 0 and self.SENTENCE_MOVE_INDEX in range(0, len(buff_split_sentence) - 1):
             buff_split_sentence.pop(self.SENTENCE_MOVE_INDEX)
             self.SENTENCE = " ".join(buff_split_sentence)
-            self.INSERT_DELAY = 30
+            self.restart_insert_delay(self.frame_time)
             self.SENTENCE_MOVE_INDEX = -1
 
     def delete_sentence(self):
@@ -281,16 +349,19 @@ class ApplicationMode:
         :return:
         """
         self.SENTENCE = ""
-        self.INSERT_DELAY = 30
+        self.restart_insert_delay(self.frame_time)
         self.SENTENCE_MOVE_INDEX = -1
 
-    def create_sentence(self, label):
+    def create_sentence(self, label, timestamp=None, wait=True):
         """
         This method is used to create a sentence from the detected words.
         :param label: str, the detected word label.
+        :param timestamp: float, the time of the frame in seconds, time.monotonic() by default.
+        :param wait: bool, wait INSERT_DELAY seconds after the last insertion, see create_word.
         :return: None
         """
-        if self.INSERT_DELAY == 0:
+        self.frame_time = time.monotonic() if timestamp is None else timestamp
+        if not wait or self.frame_time >= self.insert_deadline:
             if label == "add_word_to_sentence":
                 self.add_word_to_sentence()
             if label == "move_to_left_word" and self.WORD == "":  # only if active word is empty
@@ -305,5 +376,3 @@ class ApplicationMode:
                 self.delete_sentence()
             else:
                 return
-        else:
-            self.INSERT_DELAY -= 1
@@ -1,8 +1,14 @@
 import os
+import sys
 import numpy as np
 
 from abc import ABC, abstractmethod
 
+# the packed sequence store is shared with the training code
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'model_code'))
+from SequenceStore import SequenceStore
+from SignLabelRegistry import SignLabelRegistry
+
 
 class DataManipulator(ABC):
     """
@@ -13,13 +19,19 @@ class DataManipulator(ABC):
         - sign_labels: list, all the sign labels available currently
         - sign_labels_counted: list, the count of each sign label
         - sign_labels_index: int, the index of the currently selected sign label
+        - registry: SignLabelRegistry, keeps the sign labels and the counts in memory
+        - writer: AsyncSampleWriter, writes the samples on a background thread, None to write them right away
+        - burst_size: int, the number of samples saved by one 'b' key press
     """
 
-    def __init__(self, data_set_file_path, sign_labels_file_path) -> None:
+    def __init__(self, data_set_file_path, sign_labels_file_path, watch_interval=None, writer=None) -> None:
         """
         Initialize the DataManipulator object.
         - data_set_file_path: str, path to the data set file
         - sign_labels_file_path: str, path to the sign labels file
+        - watch_interval: float, seconds between two checks of the files for changes made
+        outside the application, None to never check
+        - writer: AsyncSampleWriter, writes the samples on a background thread, None to write them right away
         """
         # file paths
         self.data_set_file_path = data_set_file_path
@@ -29,6 +41,118 @@ class DataManipulator(ABC):
         self.sign_labels = []
         self.sign_labels_counted = []
         self.sign_labels_index = -1
+        self.registry = None
+        self.watch_interval = watch_interval
+        self.writer = writer
+
+        # burst capture, 'b' saves the next burst_size samples
+        self.burst_size = 1
+        self.burst_remaining = 0
+
+        # preallocated landmark arrays, reused for every frame
+        self.landmarks_array = np.zeros((21, 2), dtype=np.float32)
+        self.normalized_landmarks_array = np.zeros((21, 2), dtype=np.float32)
+        self.hands_array = np.zeros((2, 21, 2), dtype=np.float32)
+        self.hand_mask = np.zeros(2, dtype=bool)
+        self.normalized_hands_array = np.zeros((2, 21, 2), dtype=np.float32)
+
+    def convert_detected_landmarks_to_array(self, mediapipe_results, out=None):
+        """
+        This method is used to write the detected landmarks of the first hand
+        (x and y coordinates) straight into a (21, 2) float32 array.
+        :param mediapipe_results: ...NormalizedLandmarkList, the detected landmarks.
+        :param out: np.array, (21, 2) float32 array to write into, by default the preallocated one.
+        :return landmarks: np.array, (21, 2) the detected landmarks.
+        """
+        landmarks = self.landmarks_array if out is None else out
+        hand_landmarks = mediapipe_results.multi_hand_landmarks[0].landmark
+        flat_landmarks = landmarks.reshape(-1)
+        flat_landmarks[0::2] = [landmark.x for landmark in hand_landmarks]
+        flat_landmarks[1::2] = [landmark.y for landmark in hand_landmarks]
+
+        return landmarks
+
+    def normalize_landmarks_array(self, landmarks, out=None):
+        """
+        This method is used to normalize the landmarks with one broadcasted subtraction.
+        The wrist landmark is used as the origin(0, 0).
+        :param landmarks: np.array, (21, 2) the landmarks to be normalized.
+        :param out: np.array, (21, 2) float32 array to write into, by default the preallocated one.
+        :return normalized_landmarks: np.array, (42,) view of the normalized landmarks(x0, y0, x1, y1, ...).
+        """
+        normalized_landmarks = self.normalized_landmarks_array if out is None else out
+        np.subtract(landmarks, landmarks[0], out=normalized_landmarks)
+
+        return normalized_landmarks.reshape(-1)
+
+    def convert_detected_hands_to_tensor(self, mediapipe_results, out=None, mask_out=None):
+        """
+        This method is used to write the detected landmarks of up to two hands into a fixed
+        (2, 21, 2) float32 tensor: the left hand in slot 0 and the right hand in slot 1, by the
+        handedness of MediaPipe(multi_handedness). A missing hand is zeros and masked out.
+        Without the handedness, the hands are put in the slots in the order they were detected.
+        :param mediapipe_results: ...NormalizedLandmarkList, the detected landmarks.
+        :param out: np.array, (2, 21, 2) float32 tensor to write into, by default the preallocated one.
+        :param mask_out: np.array, (2,) bool array to write into, by default the preallocated one.
+        :return: (np.array, np.array), the (2, 21, 2) hand tensor and the (2,) mask of the detected hands.
+        """
+        hands = self.hands_array if out is None else out
+        hand_mask = self.hand_mask if mask_out is None else mask_out
+        hand_mask[:] = False
+        multi_handedness = mediapipe_results.multi_handedness
+
+        for i, hand_landmarks in enumerate(mediapipe_results.multi_hand_landmarks[:2]):
+            slot = i
+            if multi_handedness is not None:
+                slot = 0 if multi_handedness[i].classification[0].label == 'Left' else 1
+                if hand_mask[slot]:  # two hands with the same handedness, the second one takes the free slot
+                    slot = 1 - slot
+            flat_landmarks = hands[slot].reshape(-1)
+            flat_landmarks[0::2] = [landmark.x for landmark in hand_landmarks.landmark]
+            flat_landmarks[1::2] = [landmark.y for landmark in hand_landmarks.landmark]
+            hand_mask[slot] = True
+
+        for slot in (0, 1):
+            if not hand_mask[slot]:
+                hands[slot] = 0
+
+        return hands, hand_mask
+
+    def normalize_hands_tensor(self, hands, out=None):
+        """
+        This method is used to normalize every hand of the tensor to its own wrist, the missing hands stay zeros.
+        :param hands: np.array, (2, 21, 2) the hand tensor.
+        :param out: np.array, (2, 21, 2) float32 tensor to write into, by default the preallocated one.
+        :return normalized_hands: np.array, (84,) view of the normalized hands(left hand first).
+        """
+        normalized_hands = self.normalized_hands_array if out is None else out
+        np.subtract(hands, hands[:, :1], out=normalized_hands)
+
+        return normalized_hands.reshape(-1)
+
+    def create_registry(self):
+        """
+        This method is used by the subclasses, once their data set attributes are set,
+        to load the sign labels in a SignLabelRegistry.
+        """
+        if self.sign_labels_file_path is not None:
+            self.registry = SignLabelRegistry(self.sign_labels_file_path, self.count_saved_samples,
+                                              self.get_watched_paths, self.watch_interval)
+            self.get_sign_labels()
+
+    def get_sign_labels(self):
+        """
+        This method is used to get the sign labels from the registry(the CSV file is
+        read only once) and automatically updates the sign_labels attribute.
+        """
+        self.sign_labels = self.registry.get_sign_labels()
+
+    def get_sign_labels_counted(self):
+        """
+        This method is used to get the number of saved samples of each sign label from
+        the registry and automatically updates the sign_labels_counted attribute.
+        """
+        self.sign_labels_counted = self.registry.get_sign_labels_counted()
 
     @abstractmethod
     def convert_detected_landmarks_to_dict(self, mediapipe_results):
@@ -39,11 +163,11 @@ class DataManipulator(ABC):
         pass
 
     @abstractmethod
-    def get_sign_labels_counted(self):
+    def count_saved_samples(self, sign_labels):
         pass
 
     @abstractmethod
-    def get_sign_labels(self):
+    def get_watched_paths(self):
         pass
 
     @abstractmethod
@@ -57,13 +181,21 @@ class DataManipulatorStatic(DataManipulator):
     It is used to manage the data set and the sign labels for the static mode.
     """
 
-    def __init__(self, data_set_file_path, sign_labels_file_path) -> None:
+    def __init__(self, data_set_file_path, sign_labels_file_path, watch_interval=None, writer=None) -> None:
         """
         Initialize the DataManipulatorStatic object.
         :param data_set_file_path: str, path to the static data set file
         :param sign_labels_file_path: str, path to the static sign labels file
+        :param watch_interval: float, seconds between two checks of the files for changes, None to never check
+        :param writer: AsyncSampleWriter, writes the rows on a background thread, None to write them right away
         """
-        super(DataManipulatorStatic, self).__init__(data_set_file_path, sign_labels_file_path)
+        super(DataManipulatorStatic, self).__init__(data_set_file_path, sign_labels_file_path,
+                                                    watch_interval, writer)
+        self.burst_size = 30  # frames
+        # functions called with (normalized landmarks, sign label index) for every saved sample,
+        # e.g. KnnBackend.add_sample, so the sample is used right away
+        self.sample_listeners = []
+        self.create_registry()
 
     def convert_detected_landmarks_to_dict(self, mediapipe_results):
         """
@@ -75,7 +207,6 @@ class DataManipulatorStatic(DataManipulator):
         landmarks_dict = []
 
         for hand_landmarks in mediapipe_results.multi_hand_landmarks:
-            print(type(hand_landmarks))
             for landmark in hand_landmarks.landmark:
                 landmarks_dict.append({
                     'x': landmark.x,
@@ -100,22 +231,6 @@ class DataManipulatorStatic(DataManipulator):
 
         return normalized_landmarks
 
-    def get_sign_labels(self):
-        """
-        This method is used to get the sign labels from the CSV file and
-        automatically updates the sign_labels attribute.
-        """
-        # check if file exists
-        try:
-            with open(self.sign_labels_file_path, 'r') as file:
-                sign_labels = file.read().splitlines()
-                file.close()
-                self.sign_labels = sign_labels
-
-        except FileNotFoundError:
-            print(f"Error: File '{self.sign_labels_file_path}' not found!")
-            exit(1)  # FIXME: maybe handle this better ?
-
     def move_sign_labels_index(self, key_input):
         """
         This method is used to change the sign that we want to save landmarks for
@@ -128,32 +243,52 @@ class DataManipulatorStatic(DataManipulator):
         if key_input == ord('<') and self.sign_labels_index > -1:
             self.sign_labels_index -= 1
 
-    def get_sign_labels_counted(self):
+    def count_saved_samples(self, sign_labels):
         """
-        This method is used to count the number of each sign label in the data set
-        and automatically updates the sign_labels_counted attribute.
+        This method is used by the registry to count the number of each sign label in the data set.
+        :param sign_labels: list, the sign labels.
+        :return counted_signs: list, the number of rows of each sign label.
         """
         # check if file exists
         try:
             with open(self.data_set_file_path, 'r') as file:
-                counted_signs = [0] * len(self.sign_labels)
-                for line in file.readlines():
+                counted_signs = [0] * len(sign_labels)
+                for line in file:
                     counted_signs[int(line.split(',')[0])] += 1
-                self.sign_labels_counted = counted_signs
+
+                return counted_signs
 
         except FileNotFoundError:
             print(f"Error: File '{self.data_set_file_path}' not found !")
             exit(1)
 
+    def get_watched_paths(self):
+        return [self.data_set_file_path]
+
     def save_landmarks_to_csv_file(self, normalized_landmarks, key_input):
         """
         This method is used to save the landmarks to a CSV file.
             - 'c': save the landmarks to the CSV file.
-        :param normalized_landmarks: list, the normalized landmarks to be saved.
+            - 'b': save the landmarks of the next burst_size frames with a hand.
+        :param normalized_landmarks: np.array or list, the normalized landmarks to be saved.
         :param key_input: int, the key input from the user.
         """
         if self.sign_labels_index in range(0, len(self.sign_labels)):
-            if key_input == ord('c'):
+            if key_input == ord('b'):
+                self.burst_remaining = self.burst_size
+
+            if key_input == ord('c') or self.burst_remaining > 0:
+                self.burst_remaining = max(self.burst_remaining - 1, 0)
+                for sample_listener in self.sample_listeners:
+                    sample_listener(normalized_landmarks, self.sign_labels_index)
+
+                if self.writer is not None:
+                    # formatted and written by the writer thread
+                    self.registry.add_sample(self.sign_labels_index, written=False)
+                    self.writer.append_csv_row(self.data_set_file_path, self.sign_labels_index,
+                                               normalized_landmarks, on_written=self.registry.sample_written)
+                    return
+
                 # check if file exists
                 try:
                     with open(self.data_set_file_path, 'a') as file:
@@ -163,6 +298,7 @@ class DataManipulatorStatic(DataManipulator):
                         # write the last landmark
                         file.write(string_to_save + '\n')
                         file.close()
+                    self.registry.add_sample(self.sign_labels_index)
 
                 except FileNotFoundError:
                     print(f"Error: File '{self.data_set_file_path}' not found.")
@@ -175,18 +311,31 @@ class DataManipulatorDynamic(DataManipulator):
     It is used to manage the data set and the sign labels for the dynamic mode.
     """
 
-    def __init__(self, data_set_file_path, sign_labels_file_path) -> None:
+    def __init__(self, data_set_file_path, sign_labels_file_path, use_sequence_store=False,
+                 watch_interval=None, writer=None, number_of_features=21 * 2) -> None:
         """
         Initialize the DataManipulatorDynamic object.
-        :param data_set_file_path: str, path to the dynamic data set file
+        :param data_set_file_path: str, path to the dynamic data set directory(or SequenceStore)
         :param sign_labels_file_path: str, path to the sign labels file
+        :param use_sequence_store: bool, save the sequences in a packed SequenceStore
+        instead of one .npy file per sequence
+        :param watch_interval: float, seconds between two checks of the files for changes, None to never check
+        :param writer: AsyncSampleWriter, writes the sequences on a background thread, None to write them right away
+        :param number_of_features: int, the number of values in a frame of a new SequenceStore, 84 for two hands
         """
-        super(DataManipulatorDynamic, self).__init__(data_set_file_path, sign_labels_file_path)
+        super(DataManipulatorDynamic, self).__init__(data_set_file_path, sign_labels_file_path,
+                                                     watch_interval, writer)
+        self.number_of_features = number_of_features
+        self.sequence_store = SequenceStore(data_set_file_path, number_of_features=number_of_features) \
+            if use_sequence_store else None
         self.data_dirs_paths = []
+        self.next_sequence_ids = []  # the number of the next .npy file of each sign label
+        self.burst_size = 5  # sequences
         self.sequence = []
         self.number_of_frames_per_sequence = 30
         self.current_sequence_frame = 0
         self.SEQUENCE_ONGOING = False
+        self.create_registry()
 
     def convert_detected_landmarks_to_dict(self, mediapipe_results):
         """
@@ -222,22 +371,6 @@ class DataManipulatorDynamic(DataManipulator):
 
         return normalized_landmarks
 
-    def get_sign_labels(self):
-        """
-        This method is used to get the sign labels from the CSV file and
-        automatically updates the sign_labels attribute.
-        """
-        # check if file exists
-        try:
-            with open(self.sign_labels_file_path, 'r') as file:
-                sign_labels = file.read().splitlines()
-                file.close()
-                self.sign_labels = sign_labels
-
-        except FileNotFoundError:
-            print(f"Error: File '{self.sign_labels_file_path}' not found!")
-            exit(1)  # FIXME: maybe handle this better ?
-
     def move_sign_labels_index(self, key_input):
         """
         This method is used to change the sign that we want to save landmarks for
@@ -254,6 +387,7 @@ class DataManipulatorDynamic(DataManipulator):
         """
         This method is used to create a directory for each sign label for data collecting.
         """
+        self.data_dirs_paths = []
         try:
             if not os.path.isdir(self.data_set_file_path):
                 raise FileNotFoundError
@@ -266,31 +400,90 @@ class DataManipulatorDynamic(DataManipulator):
         except FileNotFoundError:
             print(f"Directory '{self.data_set_file_path}' does not exist.")
 
-    def get_sign_labels_counted(self):
+    def count_saved_samples(self, sign_labels):
+        """
+        This method is used by the registry to count the sequences of each sign label in the data set.
+        :param sign_labels: list, the sign labels.
+        :return: list, the number of sequences of each sign label.
+        """
+        self.sign_labels = sign_labels
+        if self.sequence_store is not None:
+            # opened again, the store may have been changed outside the application
+            self.sequence_store = SequenceStore(self.data_set_file_path, number_of_features=self.number_of_features)
+            return self.sequence_store.count_labels(len(sign_labels))
+
         self.create_dir_for_each_sign()
-        self.sign_labels_counted = []
+        counted_signs = []
+        self.next_sequence_ids = []
         for dir_path in self.data_dirs_paths:
-            self.sign_labels_counted.append(len(os.listdir(dir_path)))
+            file_names = os.listdir(dir_path)
+            counted_signs.append(len(file_names))
+            # after the highest number, not the count, a sequence in the middle may have been deleted
+            numbers = [int(file_name[:-4]) for file_name in file_names
+                       if file_name.endswith(".npy") and file_name[:-4].isdigit()]
+            self.next_sequence_ids.append(max(numbers, default=-1) + 1)
+
+        return counted_signs
+
+    def get_watched_paths(self):
+        if self.sequence_store is not None:
+            return [self.sequence_store.meta_file_path]
+
+        return [self.data_set_file_path] + self.data_dirs_paths
 
     def save_landmark_sequence_to_npy_file(self, normalized_landmarks, key_input):
         """
-        This method is used to save the landmark sequence to a .npy file.
+        This method is used to save the landmark sequence to a .npy file(or to the sequence store).
             - 'c': start to save 30 frames in one .npy file
-        :param normalized_landmarks: list, the normalized landmarks to be saved.
+            - 'b': save the next burst_size sequences, one after the other
+        :param normalized_landmarks: np.array or list, the normalized landmarks to be saved.
         :param key_input: int, the key input from the user.
         """
         if self.sign_labels_index in range(0, len(self.sign_labels)):
-            if key_input == ord('c') and not self.SEQUENCE_ONGOING:
+            if key_input == ord('b'):
+                self.burst_remaining = self.burst_size
+
+            if (key_input == ord('c') or self.burst_remaining > 0) and not self.SEQUENCE_ONGOING:
                 self.SEQUENCE_ONGOING = True
+                self.burst_remaining = max(self.burst_remaining - 1, 0)
 
             if self.SEQUENCE_ONGOING:
-                self.sequence.append(normalized_landmarks)
+                # copy, the landmarks may be a preallocated array reused for the next frame
+                self.sequence.append(np.array(normalized_landmarks, dtype=np.float32))
                 self.current_sequence_frame += 1
 
                 if self.current_sequence_frame == self.number_of_frames_per_sequence:
-                    np.save(self.data_dirs_paths[self.sign_labels_index] + "\\" +
-                            str(len(os.listdir(self.data_dirs_paths[self.sign_labels_index]))) +
-                            ".npy", np.array(self.sequence))
+                    self.save_sequence(np.array(self.sequence))
                     self.sequence = []
                     self.SEQUENCE_ONGOING = False
                     self.current_sequence_frame = 0
+
+    def save_sequence(self, sequence):
+        """
+        This method is used to save a complete sequence of the selected sign label, on
+        the writer thread if there is a writer.
+        :param sequence: np.array, (frames, number_of_features) the sequence.
+        """
+        self.registry.get_sign_labels_counted()  # counted once, sets the directories and the next ids
+
+        file_path = None
+        if self.sequence_store is None:
+            # the number comes from the in-memory counter, the directory is not listed again
+            file_path = self.data_dirs_paths[self.sign_labels_index] + "\\" + \
+                str(self.next_sequence_ids[self.sign_labels_index]) + ".npy"
+            self.next_sequence_ids[self.sign_labels_index] += 1
+
+        if self.writer is None:
+            if self.sequence_store is not None:
+                self.sequence_store.append(sequence, self.sign_labels_index)
+            else:
+                np.save(file_path, sequence)
+            self.registry.add_sample(self.sign_labels_index)
+        else:
+            # counted right away, the registry is told when the writer thread wrote it
+            self.registry.add_sample(self.sign_labels_index, written=False)
+            if self.sequence_store is not None:
+                self.writer.append_to_store(self.sequence_store, sequence, self.sign_labels_index,
+                                            on_written=self.registry.sample_written)
+            else:
+                self.writer.save_npy(file_path, sequence, on_written=self.registry.sample_written)
@@ -0,0 +1,90 @@
+import cv2 as cv
+
+from abc import ABC, abstractmethod
+
+
+class FrameSink(ABC):
+    """
+    This class is used as a common interface for everything the rendered frames
+    can be given to(a window, nothing). The sink also gives the key input of
+    the user for the next frame, like cv.waitKey does.
+    """
+
+    @abstractmethod
+    def show(self, frame):
+        """
+        This method is used to give a rendered frame to the sink.
+        :param frame: np.array, the rendered BGR frame.
+        :return key_input: int, unicode value of the key pressed, -1 if none.
+        """
+        pass
+
+    def close(self):
+        """
+        This method is used to free the resources held by the sink.
+        """
+        pass
+
+
+class WindowSink(FrameSink):
+    """
+    This class is an extension of the FrameSink class.
+    It displays the frames in an OpenCV window and reads the keys pressed in it.
+    """
+
+    def __init__(self, window_name='SIGN') -> None:
+        """
+        Initialize the WindowSink object.
+        :param window_name: str, the name of the window.
+        """
+        self.window_name = window_name
+
+    def show(self, frame):
+        cv.imshow(self.window_name, frame)
+
+        return cv.waitKey(1)
+
+    def close(self):
+        cv.destroyWindow(self.window_name)
+
+
+class NullSink(FrameSink):
+    """
+    This class is an extension of the FrameSink class.
+    It drops the frames, so the application can run headless(CI, servers, benchmarks),
+    the key inputs come from a script instead of a keyboard.
+    """
+
+    def __init__(self, scripted_keys=None) -> None:
+        """
+        Initialize the NullSink object.
+        :param scripted_keys: dict, {frame index: key} the keys(str of one character or int)
+        pressed after the frame with that index, see parse_scripted_keys.
+        """
+        self.scripted_keys = {frame_index: ord(key) if isinstance(key, str) else key
+                              for frame_index, key in (scripted_keys or {}).items()}
+        self.frames_shown = 0
+
+    def show(self, frame):
+        key_input = self.scripted_keys.get(self.frames_shown, -1)
+        self.frames_shown += 1
+
+        return key_input
+
+
+def parse_scripted_keys(text):
+    """
+    This function is used to read the scripted keys from the command line.
+    :param text: str, comma separated 'frame:key' pairs, for example '0:4,1:s,300:5'.
+    :return scripted_keys: dict, {frame index: key}.
+    """
+    scripted_keys = {}
+    for pair in filter(None, text.split(',')):
+        frame_index, separator, key = pair.strip().partition(':')
+        if not separator or not frame_index.isdigit() or len(key) != 1:
+            raise ValueError(f"Error: Invalid scripted key '{pair}', expected 'frame:key'!")
+        if int(frame_index) in scripted_keys:
+            raise ValueError(f"Error: Two scripted keys for frame {frame_index}!")
+        scripted_keys[int(frame_index)] = key
+
+    return scripted_keys
@@ -0,0 +1,206 @@
+import os
+import time
+import cv2 as cv
+import numpy as np
+
+from abc import ABC, abstractmethod
+
+
+class FrameSource(ABC):
+    """
+    This class is used as a common interface for everything that can feed
+    frames to the application(webcam, video file, generated frames).
+    A frame source returns BGR frames, just like cv.VideoCapture does.
+    A buffer can be given to read(), the frame is then written into it instead
+    of into a newly allocated array(if the buffer has the shape of the frames).
+    """
+
+    @abstractmethod
+    def read(self, out=None):
+        """
+        This method is used to get the next frame from the source.
+        :param out: np.array, buffer to write the frame into, None to allocate a new one.
+        :return frame: np.array, the next BGR frame(out, if it was used) or None if the source is exhausted.
+        """
+        pass
+
+    def release(self):
+        """
+        This method is used to free the resources held by the source.
+        """
+        pass
+
+
+class VideoCaptureFrameSource(FrameSource):
+    """
+    This class is an extension of the FrameSource class.
+    It reads frames with cv.VideoCapture, so it can be used both for a webcam
+    (device index) and for a recorded video file (path).
+    """
+
+    def __init__(self, device_or_path=0, loop=False, realtime=False) -> None:
+        """
+        Initialize the VideoCaptureFrameSource object.
+        :param device_or_path: int or str, webcam index or path to a video file.
+        :param loop: bool, restart a video file when its end is reached.
+        :param realtime: bool, throttle a video file to its own FPS, like a camera would.
+        """
+        self.device_or_path = device_or_path
+        self.loop = loop
+        self.cap = cv.VideoCapture(device_or_path)
+
+        if not self.cap.isOpened():
+            raise FileNotFoundError(f"Error: Could not open video source '{device_or_path}'!")
+
+        self.frame_interval = 0
+        if realtime and isinstance(device_or_path, str):
+            fps = self.cap.get(cv.CAP_PROP_FPS)
+            self.frame_interval = 1 / fps if fps > 0 else 0
+        self.next_frame_time = time.perf_counter()
+
+    def read(self, out=None):
+        """
+        This method is used to get the next frame from the camera or the video file.
+        :param out: np.array, buffer to decode the frame into, None to allocate a new one.
+        :return frame: np.array, the next BGR frame or None if the source is exhausted.
+        """
+        if self.frame_interval:
+            delay = self.next_frame_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_frame_time = max(self.next_frame_time, time.perf_counter()) + self.frame_interval
+
+        success, frame = self.cap.read(out)
+        if not success and self.loop and isinstance(self.device_or_path, str):
+            self.cap.set(cv.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.cap.read(out)
+
+        return frame if success else None
+
+    def release(self):
+        self.cap.release()
+
+
+class SyntheticFrameSource(FrameSource):
+    """
+    This class is an extension of the FrameSource class.
+    It generates frames with a moving shape on a noisy background, so the
+    application can run(and be benchmarked) without a camera.
+    """
+
+    def __init__(self, width=640, height=480, number_of_frames=None, fps=None, seed=0) -> None:
+        """
+        Initialize the SyntheticFrameSource object.
+        :param width: int, width of the generated frames.
+        :param height: int, height of the generated frames.
+        :param number_of_frames: int, how many frames to generate, None for an endless source.
+        :param fps: float, generate frames at this rate, None to generate them as fast as possible.
+        :param seed: int, seed for the background noise.
+        """
+        self.width = width
+        self.height = height
+        self.number_of_frames = number_of_frames
+        self.frame_interval = 1 / fps if fps else 0
+        self.next_frame_time = time.perf_counter()
+        self.frame_index = 0
+
+        rng = np.random.default_rng(seed)
+        self.background = rng.integers(0, 64, size=(height, width, 3), dtype=np.uint8)
+
+    def read(self, out=None):
+        """
+        This method is used to generate the next frame.
+        :param out: np.array, buffer to draw the frame into, None to allocate a new one.
+        :return frame: np.array, the next BGR frame or None if all frames were generated.
+        """
+        if self.number_of_frames is not None and self.frame_index >= self.number_of_frames:
+            return None
+
+        if self.frame_interval:
+            delay = self.next_frame_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_frame_time = max(self.next_frame_time, time.perf_counter()) + self.frame_interval
+
+        if out is not None and out.shape == self.background.shape and out.dtype == self.background.dtype:
+            frame = out
+            np.copyto(frame, self.background)
+        else:
+            frame = self.background.copy()
+        radius = min(self.width, self.height) // 8
+        center_x = radius + (self.frame_index * 4) % max(1, self.width - 2 * radius)
+        cv.circle(frame, (center_x, self.height // 2), radius, (180, 200, 230), -1)
+        self.frame_index += 1
+
+        return frame
+
+
+class ImageDirectoryFrameSource(FrameSource):
+    """
+    This class is an extension of the FrameSource class.
+    It reads the images of a directory, in the order of their file names,
+    for example the frames of a session saved with extract_landmarks.py or with 'k'.
+    """
+
+    def __init__(self, dir_path, extensions=('.jpg', '.jpeg', '.png', '.bmp'), loop=False, fps=None) -> None:
+        """
+        Initialize the ImageDirectoryFrameSource object.
+        :param dir_path: str, path to the directory with the images.
+        :param extensions: tuple, the extensions of the files that are read.
+        :param loop: bool, start again from the first image when the last one was read.
+        :param fps: float, give the images at this rate, None to give them as fast as possible.
+        """
+        self.dir_path = dir_path
+        self.loop = loop
+        self.frame_interval = 1 / fps if fps else 0
+        self.next_frame_time = time.perf_counter()
+
+        if not os.path.isdir(dir_path):
+            raise FileNotFoundError(f"Error: Directory '{dir_path}' not found!")
+        self.image_paths = [os.path.join(dir_path, file_name) for file_name in sorted(os.listdir(dir_path))
+                            if file_name.lower().endswith(extensions)]
+        if len(self.image_paths) == 0:
+            raise FileNotFoundError(f"Error: No images found in '{dir_path}'!")
+        self.image_index = 0
+
+    def read(self, out=None):
+        """
+        This method is used to read the next image.
+        :param out: np.array, buffer for the frame, not used, cv.imread always allocates the image.
+        :return frame: np.array, the next BGR frame or None if all the images were read.
+        """
+        if self.image_index >= len(self.image_paths):
+            if not self.loop:
+                return None
+            self.image_index = 0
+
+        if self.frame_interval:
+            delay = self.next_frame_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_frame_time = max(self.next_frame_time, time.perf_counter()) + self.frame_interval
+
+        frame = cv.imread(self.image_paths[self.image_index])
+        if frame is None:
+            raise ValueError(f"Error: Could not read image '{self.image_paths[self.image_index]}'!")
+        self.image_index += 1
+
+        return frame
+
+
+def create_frame_source(source, loop=False, realtime=False):
+    """
+    This function is used to create the frame source given on the command line.
+    :param source: str, a webcam index('0'), a video file, a directory with images or 'synthetic'.
+    :param loop: bool, start a video file or an image directory again when its end is reached.
+    :param realtime: bool, give the frames of a video file or an image directory at the rate of a camera.
+    :return frame_source: FrameSource, the frame source.
+    """
+    if source.isdigit():
+        return VideoCaptureFrameSource(int(source))
+    if source == 'synthetic':
+        return SyntheticFrameSource(fps=30 if realtime else None)
+    if os.path.isdir(source):
+        return ImageDirectoryFrameSource(source, loop=loop, fps=30 if realtime else None)
+
+    return VideoCaptureFrameSource(source, loop=loop, realtime=realtime)
@@ -1,5 +1,14 @@
-import mediapipe as mp
+import threading
 import cv2 as cv
+import numpy as np
+
+
+class NoHandsResults:
+    """
+    This class is used as the results of the frames processed before the MediaPipe models are loaded.
+    """
+    multi_hand_landmarks = None
+    multi_handedness = None
 
 
 class HandsDetector:
@@ -9,28 +18,92 @@ class HandsDetector:
         - mp_hands: mediapipe.solutions.hands, the hands module from the mediapipe framework
         - mp_drawing: mediapipe.solutions.drawing_utils, the drawing_utils module from the mediapipe framework
         - model: mediapipe.solutions.hands.Hands, the hands model from the mediapipe framework
+        - roi_model: mediapipe.solutions.hands.Hands, the hands model used on the hand ROI(tracking mode)
+    With track_roi=True only a square region of interest around the hand of the
+    previous frame is converted and given to MediaPipe, downscaled to roi_size;
+    the whole frame is used again when the hand is lost and every refresh_interval frames.
+    MediaPipe is imported when the models are loaded. With load_in_background=True they are
+    loaded on a background thread and no hand is found on the frames processed before that.
     """
-    def __init__(self, min_detection_confidence, min_tracking_confidence, max_num_hands) -> None:
+    def __init__(self, min_detection_confidence, min_tracking_confidence, max_num_hands,
+                 static_image_mode=False, track_roi=False, roi_size=256, roi_margin=0.3,
+                 refresh_interval=30, load_in_background=False) -> None:
         """
         Initialize the HandsDetector object.
         :param min_detection_confidence: float, the minimum confidence value for hand detection
         :param min_tracking_confidence: float, the minimum confidence value for hand tracking
         :param max_num_hands: int, the maximum number of hands to detect
+        :param static_image_mode: bool, detect the hands on every frame instead of tracking
+        them, used for unrelated images
+        :param track_roi: bool, detect the hand only in the region around the hand of the previous frame
+        :param roi_size: int, the side in pixels of the square the region is resized to
+        :param roi_margin: float, the margin added on each side of the hand, relative to the hand size
+        :param refresh_interval: int, the number of frames after which the whole frame is used again
+        :param load_in_background: bool, load the MediaPipe models on a background thread
         """
-        self.mp_hands = mp.solutions.hands
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.model = self.mp_hands.Hands(
-            static_image_mode=False,
-            min_detection_confidence=min_detection_confidence,
-            min_tracking_confidence=min_tracking_confidence,
-            max_num_hands=max_num_hands
-        )
+        self.static_image_mode = static_image_mode
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self.max_num_hands = max_num_hands
+        self.mp_hands = None
+        self.mp_drawing = None
+        self.model = None
+        self.roi_model = None
+        self.ready = threading.Event()
+
+        # ROI tracking, the crops get their own model, its tracking state is in crop coordinates
+        self.track_roi = track_roi
+        self.roi_size = roi_size
+        self.roi_margin = roi_margin
+        self.refresh_interval = refresh_interval
+        self.roi = None  # (x0, y0, x1, y1) in pixels, None when the hand is not tracked
+        self.frames_since_refresh = 0
+        self.roi_image = np.zeros((roi_size, roi_size, 3), dtype=np.uint8)
+        # RGB images given to MediaPipe, reused by the color conversion of every frame
+        self.rgb_frame = None
+        self.rgb_roi_image = np.zeros((roi_size, roi_size, 3), dtype=np.uint8)
+        self.landmarks_array = np.zeros((21, 2), dtype=np.float32)
+        self.full_frame_detections = 0
+        self.roi_detections = 0
 
         # colors
         self.purple = (128, 0, 128)
         self.white = (255, 255, 255)
         self.green = (0, 255, 0)
 
+        if load_in_background:
+            threading.Thread(target=self.load_models_in_background, name="load hands detector", daemon=True).start()
+        else:
+            self.load_models()
+
+    def load_models(self):
+        """
+        This method is used to import MediaPipe and to create the hands models.
+        """
+        import mediapipe as mp
+
+        self.mp_hands = mp.solutions.hands
+        self.mp_drawing = mp.solutions.drawing_utils
+        self.model = self.mp_hands.Hands(
+            static_image_mode=self.static_image_mode,
+            min_detection_confidence=self.min_detection_confidence,
+            min_tracking_confidence=self.min_tracking_confidence,
+            max_num_hands=self.max_num_hands
+        )
+        self.roi_model = self.mp_hands.Hands(
+            static_image_mode=False,
+            min_detection_confidence=self.min_detection_confidence,
+            min_tracking_confidence=self.min_tracking_confidence,
+            max_num_hands=1
+        ) if self.track_roi else None
+        self.ready.set()
+
+    def load_models_in_background(self):
+        try:
+            self.load_models()
+        except Exception as error:
+            print(f"Error: Could not load the MediaPipe models: {error}")
+
     def mediapipe_hands_detect(self, frame):
         """
         This method is used to detect hands in a frame using the mediapipe hands model.
@@ -38,12 +111,106 @@ class HandsDetector:
         :return mediapipe_results: ..NormalizedLandmarkList,
         the landmarks of the hands.
         """
-        frame = cv.cvtColor(frame, cv.COLOR_BGR2RGB)
-        frame.flags.writeable = False
-        mediapipe_results = self.model.process(frame)
+        if not self.ready.is_set():
+            return NoHandsResults()
+        if self.track_roi:
+            return self.mediapipe_hands_track(frame)
+
+        return self.model.process(self.convert_to_rgb(frame))
+
+    def convert_to_rgb(self, frame):
+        """
+        This method is used to convert a BGR frame to RGB into the reused rgb_frame buffer,
+        a new buffer is allocated only when the size of the frames changes.
+        :param frame: np.array, one BGR frame from the video feed.
+        :return rgb_frame: np.array, the read-only RGB frame, valid until the next call.
+        """
+        if self.rgb_frame is not None:
+            self.rgb_frame.flags.writeable = True
+        self.rgb_frame = cv.cvtColor(frame, cv.COLOR_BGR2RGB, dst=self.rgb_frame)
+        self.rgb_frame.flags.writeable = False
+
+        return self.rgb_frame
+
+    def mediapipe_hands_track(self, frame):
+        """
+        This method is used to detect the hand in the region around the hand of the previous
+        frame, with a fallback to the whole frame when the hand is lost or for the periodic refresh.
+        :param frame: np.array, one frame from the video feed used to detect the hands.
+        :return mediapipe_results: ..NormalizedLandmarkList,
+        the landmarks of the hands, in coordinates normalized to the whole frame.
+        """
+        mediapipe_results = None
+        if self.roi is not None and self.frames_since_refresh < self.refresh_interval:
+            x0, y0, x1, y1 = self.roi
+            # resized before the color conversion, so only roi_size x roi_size pixels are converted
+            cv.resize(frame[y0:y1, x0:x1], (self.roi_size, self.roi_size), dst=self.roi_image,
+                      interpolation=cv.INTER_AREA)
+            self.rgb_roi_image.flags.writeable = True
+            cv.cvtColor(self.roi_image, cv.COLOR_BGR2RGB, dst=self.rgb_roi_image)
+            self.rgb_roi_image.flags.writeable = False
+            mediapipe_results = self.roi_model.process(self.rgb_roi_image)
+            self.roi_detections += 1
+
+            if mediapipe_results.multi_hand_landmarks:
+                self.map_roi_landmarks_to_frame(mediapipe_results, frame.shape)
+                self.frames_since_refresh += 1
+            else:
+                mediapipe_results = None  # the hand is lost
+
+        if mediapipe_results is None:
+            mediapipe_results = self.model.process(self.convert_to_rgb(frame))
+            self.full_frame_detections += 1
+            self.frames_since_refresh = 0
+
+        self.roi = self.find_roi(mediapipe_results, frame.shape)
 
         return mediapipe_results
 
+    def map_roi_landmarks_to_frame(self, mediapipe_results, frame_shape):
+        """
+        This method is used to change the landmarks detected in the ROI to coordinates
+        normalized to the whole frame, in place.
+        :param mediapipe_results: ..NormalizedLandmarkList, the landmarks detected in the ROI.
+        :param frame_shape: tuple, the shape of the frame.
+        """
+        x0, y0, x1, y1 = self.roi
+        frame_height, frame_width = frame_shape[:2]
+        scale_x, scale_y = (x1 - x0) / frame_width, (y1 - y0) / frame_height
+        offset_x, offset_y = x0 / frame_width, y0 / frame_height
+
+        for hand_landmarks in mediapipe_results.multi_hand_landmarks:
+            for landmark in hand_landmarks.landmark:
+                landmark.x = landmark.x * scale_x + offset_x
+                landmark.y = landmark.y * scale_y + offset_y
+                landmark.z = landmark.z * scale_x
+
+    def find_roi(self, mediapipe_results, frame_shape):
+        """
+        This method is used to find the square region of interest around the first detected hand.
+        :param mediapipe_results: ..NormalizedLandmarkList, the landmarks of the hands.
+        :param frame_shape: tuple, the shape of the frame.
+        :return roi: (int, int, int, int), the (x0, y0, x1, y1) region in pixels or None if there is no hand.
+        """
+        if not mediapipe_results.multi_hand_landmarks:
+            return None
+
+        hand_landmarks = mediapipe_results.multi_hand_landmarks[0].landmark
+        self.landmarks_array[:, 0] = [landmark.x for landmark in hand_landmarks]
+        self.landmarks_array[:, 1] = [landmark.y for landmark in hand_landmarks]
+        min_x, min_y, max_x, max_y = self.find_min_and_max_for_x_and_y(self.landmarks_array)
+
+        frame_height, frame_width = frame_shape[:2]
+        center_x, center_y = (min_x + max_x) / 2 * frame_width, (min_y + max_y) / 2 * frame_height
+        side = max((max_x - min_x) * frame_width, (max_y - min_y) * frame_height) * (1 + 2 * self.roi_margin)
+        side = int(min(max(side, self.roi_size / 4), frame_width, frame_height))
+
+        # moved inside the frame instead of cut, so the region stays square
+        x0 = int(min(max(center_x - side / 2, 0), frame_width - side))
+        y0 = int(min(max(center_y - side / 2, 0), frame_height - side))
+
+        return x0, y0, x0 + side, y0 + side
+
     def draw_hands_landmarks(self, frame, mediapipe_results):
         """
         This method is used to draw the landmarks of the hands on the frame.
@@ -61,26 +228,25 @@ class HandsDetector:
 
         return frame
 
-    def find_min_and_max_for_x_and_y(self, landmarks_dict):
-        min_x = min_y = 1
-        max_x = max_y = 0
-
-        for landmark in landmarks_dict:
-            min_x = min(min_x, landmark['x'])
-            min_y = min(min_y, landmark['y'])
-            max_x = max(max_x, landmark['x'])
-            max_y = max(max_y, landmark['y'])
+    def find_min_and_max_for_x_and_y(self, landmarks):
+        """
+        This method is used to find the bounding box of the hand.
+        :param landmarks: np.array, (21, 2) the landmarks of the hand.
+        :return: min_x, min_y, max_x, max_y: float, the bounding box in normalized coordinates.
+        """
+        min_x, min_y = landmarks.min(axis=0).tolist()
+        max_x, max_y = landmarks.max(axis=0).tolist()
 
-        return min_x, min_y, max_x, max_y
+        return min(min_x, 1), min(min_y, 1), max(max_x, 0), max(max_y, 0)
 
-    def draw_rectangle_around_hand(self, frame, landmarks_dictionary):
+    def draw_rectangle_around_hand(self, frame, landmarks):
         """
         This method is used to draw a rectangle around the detected hands.
         :param frame: np.array, one frame from the video feed.
-        :param landmarks_dictionary: dict, the landmarks of the hands.
+        :param landmarks: np.array, (21, 2) the landmarks of the hand.
         :return frame: np.array, one frame with the rectangle drawn around the hands.
         """
-        min_x, min_y, max_x, max_y = self.find_min_and_max_for_x_and_y(landmarks_dictionary)
+        min_x, min_y, max_x, max_y = self.find_min_and_max_for_x_and_y(landmarks)
         cv.rectangle(frame,
                      (int(min_x * frame.shape[1] - 10), int(min_y * frame.shape[0] - 10)),
                      # TODO: why * image.shape[1] and * image.shape[0] and not reverse ???
@@ -89,17 +255,17 @@ class HandsDetector:
 
         return frame
 
-    def display_prediction_on_frame(self, frame, label, confidence, landmarks_dict):
+    def display_prediction_on_frame(self, frame, label, confidence, landmarks):
         """
         This method is used to write the prediction on the frame.
-        :param landmarks_dict: dict, the landmarks of the hands.
+        :param landmarks: np.array, (21, 2) the landmarks of the hand.
         :param frame: np.array, one frame from the video feed.
         :param label: str, the detected sign label.
         :param confidence: float, the accuracy of the prediction.
         :return frame: np.array, the frame with the prediction written on it.
         """
         if label is not None and confidence is not None:
-            min_x, min_y, _, _ = self.find_min_and_max_for_x_and_y(landmarks_dict)
+            min_x, min_y, _, _ = self.find_min_and_max_for_x_and_y(landmarks)
             cv.putText(frame, f"{label} ({confidence:.2f})",
                        (int(min_x * frame.shape[1]), int(min_y * frame.shape[0]) - 15),
                        cv.FONT_HERSHEY_SIMPLEX, 0.8, self.purple, 2, cv.LINE_AA)
@@ -107,37 +273,36 @@ class HandsDetector:
         return frame
 
     def draw_original_coord(self, frame, landmarks):
-        for pair in landmarks:
-            cv.circle(frame, (int(pair['x'] * frame.shape[1]), int(pair['y'] * frame.shape[0])),
+        for x, y in landmarks:
+            cv.circle(frame, (int(x * frame.shape[1]), int(y * frame.shape[0])),
                       5, self.green, -1)
-            cv.putText(frame, f"{int(pair['x'] * frame.shape[1])}, {int(pair['y'] * frame.shape[0])}",
-                       (int(pair['x'] * frame.shape[1]), int(pair['y'] * frame.shape[0])),
+            cv.putText(frame, f"{int(x * frame.shape[1])}, {int(y * frame.shape[0])}",
+                       (int(x * frame.shape[1]), int(y * frame.shape[0])),
                        cv.FONT_HERSHEY_SIMPLEX, 0.5, self.white, 2, cv.LINE_AA)
 
         return frame
 
     def draw_normalized_coord(self, frame, landmarks):
-        for pair in landmarks:
-            cv.circle(frame, (int(pair['x'] * frame.shape[1]), int(pair['y'] * frame.shape[0])),
+        for x, y in landmarks:
+            cv.circle(frame, (int(x * frame.shape[1]), int(y * frame.shape[0])),
                       5, self.green, -1)
-            cv.putText(frame, f"{pair['x']:.2f}, {pair['y']:.2f}",
-                       (int(pair['x'] * frame.shape[1]), int(pair['y'] * frame.shape[0])),
+            cv.putText(frame, f"{x:.2f}, {y:.2f}",
+                       (int(x * frame.shape[1]), int(y * frame.shape[0])),
                        cv.FONT_HERSHEY_SIMPLEX, 0.5, self.white, 2, cv.LINE_AA)
 
         return frame
 
     def draw_normalized_to_wrist_coord(self, frame, landmarks):
-        x_0 = landmarks[0]['x']
-        y_0 = landmarks[0]['y']
+        x_0, y_0 = landmarks[0]
 
-        for pair in landmarks:
-            color = (0, 0, 255) if pair['x'] == x_0 and pair['y'] == y_0 else self.green
+        for x, y in landmarks:
+            color = (0, 0, 255) if x == x_0 and y == y_0 else self.green
 
-            cv.circle(frame, (int(pair['x'] * frame.shape[1]), int(pair['y'] * frame.shape[0])),
+            cv.circle(frame, (int(x * frame.shape[1]), int(y * frame.shape[0])),
                       5, color, -1)
 
-            cv.putText(frame, f"{(pair['x'] - x_0):.2f}, {(pair['y'] - y_0):.2f}",
-                       (int(pair['x'] * frame.shape[1]), int(pair['y'] * frame.shape[0])),
+            cv.putText(frame, f"{(x - x_0):.2f}, {(y - y_0):.2f}",
+                       (int(x * frame.shape[1]), int(y * frame.shape[0])),
                        cv.FONT_HERSHEY_SIMPLEX, 0.5, self.white, 2, cv.LINE_AA)
 
         return frame
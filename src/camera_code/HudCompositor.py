@@ -0,0 +1,76 @@
+import numpy as np
+
+
+class HudCompositor:
+    """
+    This class is used to draw the layers of the GUI that change rarely(the header
+    with the mode title, the sentence panel) without drawing them again on every frame.
+    Each layer is a horizontal strip of the frame. It is rendered once, into an image
+    and a mask, and rendered again only when its state(the text it shows) or the
+    size of the frame changes. On every frame the cached image is put on the frame
+    with one vectorized operation: a plain copy for an opaque layer, np.copyto with
+    the mask otherwise.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the HudCompositor object, with no cached layer.
+        """
+        self.layers = {}  # name: (state, shape, image, mask), mask is None for an opaque layer
+        self.renders = 0
+        self.draws = 0
+
+    def draw_layer(self, frame, name, top, height, state, render):
+        """
+        This method is used to put a layer on the frame, it is rendered only if it is not cached.
+        :param frame: np.array, the BGR frame, changed in place.
+        :param name: str, the name of the layer.
+        :param top: int, the first row of the layer, negative to count from the bottom of the frame.
+        :param height: int, the number of rows of the layer.
+        :param state: object, everything the layer shows, the layer is rendered again when it changes.
+        :param render: function, gets the layer image(BGR) and the mask(uint8, 255 for the pixels
+        that belong to the layer) of height x frame width, both zeros, and draws the layer on them.
+        :return frame: np.array, the frame with the layer.
+        """
+        top = top % frame.shape[0] if top < 0 else top
+        height = min(height, frame.shape[0] - top)
+        shape = (height, frame.shape[1], frame.shape[2])
+
+        cached_layer = self.layers.get(name)
+        if cached_layer is None or cached_layer[0] != state or cached_layer[1] != shape:
+            cached_layer = self.render_layer(name, state, shape, render)
+
+        _, _, image, mask = cached_layer
+        if mask is None:
+            frame[top:top + height] = image
+        else:
+            np.copyto(frame[top:top + height], image, where=mask)
+        self.draws += 1
+
+        return frame
+
+    def render_layer(self, name, state, shape, render):
+        """
+        This method is used to render a layer and to cache it.
+        :return cached_layer: tuple, (state, shape, image, mask) of the layer.
+        """
+        image = np.zeros(shape, dtype=np.uint8)
+        mask = np.zeros(shape[:2], dtype=np.uint8)
+        render(image, mask)
+
+        mask = mask[..., np.newaxis] != 0
+        cached_layer = (state, shape, image, None if mask.all() else mask)
+        self.layers[name] = cached_layer
+        self.renders += 1
+
+        return cached_layer
+
+    def invalidate(self, name=None):
+        """
+        This method is used to drop a cached layer, or all of them, so it is rendered again.
+        :param name: str, the name of the layer, None for all the layers.
+        """
+        if name is None:
+            self.layers.clear()
+        else:
+            self.layers.pop(name, None)
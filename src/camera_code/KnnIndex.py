@@ -0,0 +1,226 @@
+import os
+import sys
+import threading
+import numpy as np
+
+# the static data set cache is shared with the training code
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'model_code'))
+from DataSetCache import load_static_data_set
+
+# usage: python KnnIndex.py data_set.csv [index.knn.npz] [number_of_hands]   builds the index of a static data set
+
+
+class KnnIndex:
+    """
+    This class is used to classify static signs by their k nearest samples in the static
+    data set, without training a model. The samples are kept as a precomputed feature
+    matrix: every sample is divided by its L2 norm, so the distance does not depend on
+    the size of the hand in the frame and, for unit vectors, the nearest samples are
+    the ones with the largest dot product(one matrix product for a whole batch).
+    With use_kdtree, a scipy KD-tree is queried instead, the samples inserted after the
+    tree was built are searched by the matrix product until the tree is built again.
+    New samples can be inserted at any time(add_sample), e.g. while they are recorded.
+    """
+
+    def __init__(self, k=5, use_kdtree=False, number_of_features=21 * 2) -> None:
+        """
+        Initialize an empty KnnIndex object.
+        :param k: int, the number of neighbours that vote.
+        :param use_kdtree: bool, search with a KD-tree(scipy) instead of the matrix product.
+        :param number_of_features: int, the number of values in a sample, 84 for two hands.
+        """
+        self.k = k
+        self.use_kdtree = use_kdtree
+
+        # the rows after size are free, the capacity is doubled when they are used up
+        self.features = np.zeros((1024, number_of_features), dtype=np.float32)
+        self.labels = np.zeros(1024, dtype=np.int32)
+        self.size = 0
+        self.number_of_labels = 0
+
+        self.tree = None
+        self.tree_size = 0  # the samples in the KD-tree, the first ones
+        self.lock = threading.Lock()  # the samples are inserted by the render thread, queried by the inference one
+
+    def __len__(self):
+        return self.size
+
+    @staticmethod
+    def normalize_features(x):
+        """
+        :param x: np.array, (batch, number_of_features) the normalized landmarks.
+        :return: np.array, (batch, number_of_features) float32 unit vectors.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        norms = np.linalg.norm(x, axis=1, keepdims=True)
+
+        return x / np.maximum(norms, 1e-6)
+
+    def add_samples(self, x, labels):
+        """
+        This method is used to insert samples into the index.
+        :param x: np.array, (batch, number_of_features) the normalized landmarks.
+        :param labels: np.array, (batch,) the sign label indexes.
+        """
+        x = self.normalize_features(np.atleast_2d(x))
+        labels = np.atleast_1d(np.asarray(labels, dtype=np.int32))
+
+        with self.lock:
+            if self.size + len(x) > len(self.features):
+                capacity = max(2 * len(self.features), self.size + len(x))
+                self.features = np.concatenate([self.features[:self.size],
+                                                np.zeros((capacity - self.size, self.features.shape[1]),
+                                                         dtype=np.float32)])
+                self.labels = np.concatenate([self.labels[:self.size],
+                                              np.zeros(capacity - self.size, dtype=np.int32)])
+            self.features[self.size:self.size + len(x)] = x
+            self.labels[self.size:self.size + len(x)] = labels
+            self.size += len(x)
+            if len(labels) != 0:
+                self.number_of_labels = max(self.number_of_labels, int(labels.max()) + 1)
+
+    def add_sample(self, normalized_landmarks, sign_label_index):
+        """
+        This method is used to insert one recorded sample, see DataManipulatorStatic.sample_listeners.
+        :param normalized_landmarks: np.array or list, the normalized landmarks of the sample.
+        :param sign_label_index: int, the sign label index of the sample.
+        """
+        self.add_samples(np.asarray(normalized_landmarks, dtype=np.float32)[np.newaxis], [sign_label_index])
+
+    def build_tree(self):
+        """
+        This method is used to build the KD-tree on all the samples inserted so far.
+        """
+        from scipy.spatial import cKDTree
+
+        with self.lock:
+            self.tree = cKDTree(self.features[:self.size])
+            self.tree_size = self.size
+
+    def query(self, x):
+        """
+        This method is used to find the k nearest samples of every sample of a batch.
+        :param x: np.array, (batch, number_of_features) the normalized landmarks.
+        :return: (np.array, np.array, int), the (batch, k) distances, the (batch, k) sign label indexes and the
+        number of sign labels, all read under the lock(add_sample may insert a new sign label meanwhile).
+        """
+        x = self.normalize_features(x)
+        if self.use_kdtree and self.size - self.tree_size > max(64, self.tree_size // 4):
+            self.build_tree()
+
+        with self.lock:
+            k = min(self.k, self.size)
+            labels = self.labels[:self.size]
+
+            if self.use_kdtree and self.tree is not None and self.tree_size >= k:
+                distances, indexes = self.tree.query(x, k)
+                distances, indexes = distances.reshape(len(x), k), indexes.reshape(len(x), k)
+                if self.size > self.tree_size:
+                    # the samples inserted after the tree was built
+                    new_distances, new_indexes = self.search(x, self.tree_size, k)
+                    distances = np.concatenate([distances, new_distances], axis=1)
+                    indexes = np.concatenate([indexes, new_indexes], axis=1)
+                    nearest = np.argsort(distances, axis=1)[:, :k]
+                    distances = np.take_along_axis(distances, nearest, axis=1)
+                    indexes = np.take_along_axis(indexes, nearest, axis=1)
+            else:
+                distances, indexes = self.search(x, 0, k)
+
+            return distances, labels[indexes], self.number_of_labels
+
+    def search(self, x, start, k):
+        """
+        This method is used to find the k nearest samples among the samples from start, by one matrix product.
+        :param x: np.array, (batch, number_of_features) unit vectors.
+        :param start: int, the index of the first sample searched.
+        :param k: int, the number of neighbours.
+        :return: (np.array, np.array), the (batch, k) distances and the (batch, k) indexes of the samples.
+        """
+        similarities = x @ self.features[start:self.size].T
+        k = min(k, similarities.shape[1])
+        indexes = np.argpartition(similarities, -k, axis=1)[:, -k:]  # the k largest dot products
+        similarities = np.take_along_axis(similarities, indexes, axis=1)
+        # |a - b|^2 = 2 - 2 a.b for unit vectors
+        distances = np.sqrt(np.maximum(2 - 2 * similarities, 0))
+
+        return distances, indexes + start
+
+    def predict(self, x):
+        """
+        This method is used to classify a batch of samples by the distance weighted votes of their neighbours.
+        :param x: np.array, (batch, number_of_features) the normalized landmarks.
+        :return prediction: np.array, (batch, number_of_labels) the share of the votes of every sign label.
+        """
+        distances, labels, number_of_labels = self.query(x)
+        weights = 1 / (distances + 1e-3)
+        # the votes of every (sample, sign label) pair summed in one bincount
+        flat_indexes = np.arange(len(x))[:, np.newaxis] * number_of_labels + labels
+        prediction = np.bincount(flat_indexes.ravel(), weights.ravel(), minlength=len(x) * number_of_labels)
+        prediction = prediction.reshape(len(x), number_of_labels).astype(np.float32)
+
+        return prediction / prediction.sum(axis=1, keepdims=True)
+
+    def save(self, index_path):
+        """
+        This method is used to save the index, the KD-tree is built again when it is loaded.
+        :param index_path: str, path to the .npz file.
+        """
+        with self.lock:
+            np.savez(index_path, features=self.features[:self.size], labels=self.labels[:self.size],
+                     number_of_labels=self.number_of_labels, k=self.k)
+
+    @classmethod
+    def load(cls, index_path, use_kdtree=False):
+        """
+        This method is used to load an index saved with save.
+        :param index_path: str, path to the .npz file.
+        :param use_kdtree: bool, search with a KD-tree(scipy) instead of the matrix product.
+        :return index: KnnIndex, the loaded index.
+        """
+        data = np.load(index_path)
+        index = cls(int(data['k']), use_kdtree, data['features'].shape[1])
+        index.features = data['features'].copy()
+        index.labels = data['labels'].copy()
+        index.size = len(index.labels)
+        index.number_of_labels = int(data['number_of_labels'])
+        if use_kdtree and index.size != 0:
+            index.build_tree()
+
+        return index
+
+    @classmethod
+    def build_from_data_set(cls, data_set_file_path, k=5, use_kdtree=False, number_of_features=21 * 2):
+        """
+        This method is used to build the index of a static data set file.
+        :param data_set_file_path: str, path to the static data set file(.csv).
+        :param k: int, the number of neighbours that vote.
+        :param use_kdtree: bool, search with a KD-tree(scipy) instead of the matrix product.
+        :param number_of_features: int, the number of landmark values in a row, 84 for the two-hand data sets.
+        :return index: KnnIndex, the index with all the samples of the data set.
+        """
+        x_data, y_data = load_static_data_set(data_set_file_path, mmap_mode=None,
+                                              number_of_features=number_of_features)
+        index = cls(k, use_kdtree, x_data.shape[1])
+        index.add_samples(x_data, y_data)
+        if use_kdtree:
+            index.build_tree()
+
+        return index
+
+
+def get_index_path(data_set_file_path):
+    """
+    :param data_set_file_path: str, path to the static data set file(.csv).
+    :return: str, path to the index built from it, next to it.
+    """
+    return os.path.splitext(data_set_file_path)[0] + ".knn.npz"
+
+
+if __name__ == "__main__":
+
+    data_set_file_path = sys.argv[1]
+    index_path = sys.argv[2] if len(sys.argv) > 2 else get_index_path(data_set_file_path)
+    number_of_hands = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    knn_index = KnnIndex.build_from_data_set(data_set_file_path, number_of_features=number_of_hands * 21 * 2)
+    knn_index.save(index_path)
+    print(f"Saved '{index_path}', {len(knn_index)} samples of {knn_index.number_of_labels} sign labels")
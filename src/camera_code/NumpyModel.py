@@ -0,0 +1,348 @@
+import argparse
+import glob
+import os
+import numpy as np
+
+
+def sigmoid(x):
+    # numerically stable form of 1 / (1 + exp(-x))
+    return 0.5 * (1 + np.tanh(0.5 * x))
+
+
+def softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'tanh': np.tanh,
+    'sigmoid': sigmoid,
+    'hard_sigmoid': lambda x: np.clip(0.2 * x + 0.5, 0, 1),
+    'softmax': softmax,
+}
+
+
+def apply_activation(x, activation, alpha=None):
+    """
+    This function is used to apply an activation function by name.
+    :param x: np.array, the input of the activation.
+    :param activation: str, the name of the activation, 'prelu' uses alpha.
+    :param alpha: np.array, the learned slopes of the PReLU activation.
+    :return: np.array, the activated values.
+    """
+    if activation == 'prelu':
+        return np.where(x > 0, x, alpha * x)
+
+    return ACTIVATIONS[activation](x)
+
+
+class DenseLayer:
+    """
+    This class is used to run a keras Dense layer with NumPy.
+    """
+
+    def __init__(self, kernel, bias, activation, alpha=None) -> None:
+        self.kernel = kernel
+        self.bias = bias
+        self.activation = activation
+        self.alpha = alpha
+
+    def forward(self, x):
+        """
+        :param x: np.array, (batch, inputs) float32 values.
+        :return: np.array, (batch, units) float32 values.
+        """
+        return apply_activation(x @ self.kernel + self.bias, self.activation, self.alpha)
+
+
+class GRULayer:
+    """
+    This class is used to run a keras GRU layer with NumPy.
+    It follows the keras gate order(update, reset, candidate) and supports
+    both reset_after=True(keras 2 default) and reset_after=False.
+    """
+
+    def __init__(self, kernel, recurrent_kernel, bias, activation, alpha,
+                 recurrent_activation, reset_after, return_sequences) -> None:
+        self.kernel = kernel
+        self.recurrent_kernel = recurrent_kernel
+        self.activation = activation
+        self.alpha = alpha
+        self.recurrent_activation = recurrent_activation
+        self.reset_after = reset_after
+        self.return_sequences = return_sequences
+        self.units = recurrent_kernel.shape[0]
+
+        if reset_after:
+            self.input_bias, self.recurrent_bias = bias[0], bias[1]
+        else:
+            self.input_bias, self.recurrent_bias = bias, np.zeros_like(bias)
+
+    def initial_state(self, batch_size):
+        return np.zeros((batch_size, self.units), dtype=np.float32)
+
+    def step(self, x_projection, h):
+        """
+        This method is used to run one timestep of the layer.
+        :param x_projection: np.array, (batch, 3 * units) input already multiplied by the kernel.
+        :param h: np.array, (batch, units) the hidden state of the previous timestep.
+        :return h: np.array, (batch, units) the new hidden state.
+        """
+        units = self.units
+        x_z, x_r, x_h = x_projection[:, :units], x_projection[:, units:2 * units], x_projection[:, 2 * units:]
+
+        if self.reset_after:
+            recurrent = h @ self.recurrent_kernel + self.recurrent_bias
+            z = apply_activation(x_z + recurrent[:, :units], self.recurrent_activation)
+            r = apply_activation(x_r + recurrent[:, units:2 * units], self.recurrent_activation)
+            recurrent_h = r * recurrent[:, 2 * units:]
+        else:
+            recurrent = h @ self.recurrent_kernel[:, :2 * units]
+            z = apply_activation(x_z + recurrent[:, :units], self.recurrent_activation)
+            r = apply_activation(x_r + recurrent[:, units:], self.recurrent_activation)
+            recurrent_h = (r * h) @ self.recurrent_kernel[:, 2 * units:]
+
+        hh = apply_activation(x_h + recurrent_h, self.activation, self.alpha)
+
+        return z * h + (1 - z) * hh
+
+    def forward(self, x):
+        """
+        :param x: np.array, (batch, timesteps, inputs) float32 values.
+        :return: np.array, (batch, timesteps, units) or (batch, units) float32 values.
+        """
+        # the input projection of all timesteps is computed at once, only the recurrence is a loop
+        x_projection = x @ self.kernel + self.input_bias
+        h = self.initial_state(x.shape[0])
+        outputs = []
+
+        for t in range(x.shape[1]):
+            h = self.step(x_projection[:, t], h)
+            if self.return_sequences:
+                outputs.append(h)
+
+        return np.stack(outputs, axis=1) if self.return_sequences else h
+
+
+class NumpyModel:
+    """
+    This class is used to run the static(Dense) and dynamic(GRU + Dense) sign
+    models with NumPy only, from weights exported to a .npz file with
+    export_keras_model_to_npz. Dropout layers are not exported, since they
+    do nothing at inference time.
+    """
+
+    def __init__(self, npz_path) -> None:
+        """
+        Initialize the NumpyModel object.
+        :param npz_path: str, path to the exported weights file(.npz).
+        """
+        self.layers = []
+
+        with np.load(npz_path) as data:
+            self.input_shape = tuple(int(i) for i in data['input_shape'])
+            for i in range(int(data['number_of_layers'])):
+                kind = str(data[f'layer_{i}_kind'])
+                alpha = data[f'layer_{i}_alpha'] if f'layer_{i}_alpha' in data else None
+                activation = str(data[f'layer_{i}_activation'])
+
+                if kind == 'dense':
+                    self.layers.append(DenseLayer(data[f'layer_{i}_kernel'], data[f'layer_{i}_bias'],
+                                                  activation, alpha))
+                elif kind == 'gru':
+                    self.layers.append(GRULayer(data[f'layer_{i}_kernel'], data[f'layer_{i}_recurrent_kernel'],
+                                                data[f'layer_{i}_bias'], activation, alpha,
+                                                str(data[f'layer_{i}_recurrent_activation']),
+                                                bool(data[f'layer_{i}_reset_after']),
+                                                bool(data[f'layer_{i}_return_sequences'])))
+                else:
+                    raise ValueError(f"Error: Unknown layer kind '{kind}' in '{npz_path}'!")
+
+    def split_recurrent_layers(self):
+        """
+        This method is used to split the model into its GRU layers and the layers after them.
+        :return: (list, list), the GRU layers and the Dense layers that follow them.
+        """
+        number_of_recurrent_layers = sum(isinstance(layer, GRULayer) for layer in self.layers)
+        recurrent_layers = self.layers[:number_of_recurrent_layers]
+        if number_of_recurrent_layers == 0 or not all(isinstance(layer, GRULayer) for layer in recurrent_layers):
+            raise ValueError("Error: Step by step inference needs a model that starts with its GRU layers!")
+
+        return recurrent_layers, self.layers[number_of_recurrent_layers:]
+
+    def initial_states(self, batch_size):
+        """
+        :param batch_size: int, the number of sequences run in parallel.
+        :return states: list, the zero hidden state of each GRU layer.
+        """
+        return [layer.initial_state(batch_size) for layer in self.split_recurrent_layers()[0]]
+
+    def step(self, x, states):
+        """
+        This method is used to run one timestep of all the GRU layers.
+        :param x: np.array, (batch, 42) or (1, 42) landmarks of one frame, a single frame is shared by all sequences.
+        :param states: list, the hidden state of each GRU layer, see initial_states.
+        :return states: list, the new hidden state of each GRU layer(the last one is the output).
+        """
+        new_states = []
+        for layer, h in zip(self.split_recurrent_layers()[0], states):
+            x = layer.step(x @ layer.kernel + layer.input_bias, h)
+            new_states.append(x)
+
+        return new_states
+
+    def predict_from_state(self, h):
+        """
+        This method is used to run the layers after the GRU layers.
+        :param h: np.array, (batch, units) the hidden state of the last GRU layer.
+        :return prediction: np.array, (batch, number of sign labels) the prediction for each sequence.
+        """
+        for layer in self.split_recurrent_layers()[1]:
+            h = layer.forward(h)
+
+        return h
+
+    def predict(self, x):
+        """
+        This method is used to run the model on a batch of samples.
+        :param x: np.array, (batch, 42) or (batch, 30, 42) float32 samples.
+        :return prediction: np.array, (batch, number of sign labels) the prediction for each sample.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        for layer in self.layers:
+            x = layer.forward(x)
+
+        return x
+
+
+def get_activation(activation):
+    """
+    This function is used to describe a keras activation by name(and PReLU weights).
+    :param activation: function or keras.layers.PReLU, the activation of a keras layer.
+    :return: (str, np.array), the name of the activation and the PReLU alpha or None.
+    """
+    if type(activation).__name__ == 'PReLU':
+        return 'prelu', np.asarray(activation.alpha.numpy(), dtype=np.float32)
+
+    name = getattr(activation, '__name__', str(activation))
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Error: Activation '{name}' is not supported by NumpyModel!")
+
+    return name, None
+
+
+def export_keras_model_to_npz(model_weights_path, npz_path=None):
+    """
+    This function is used to dump the Dense, PReLU and GRU weights of a trained
+    keras model(.h5) to a compact .npz file that NumpyModel can run.
+    :param model_weights_path: str, the path to the model weights file(.h5).
+    :param npz_path: str, where the weights are saved, by default next to the .h5 file.
+    :return npz_path: str, the path of the saved weights.
+    """
+    from keras.models import load_model
+
+    if npz_path is None:
+        npz_path = os.path.splitext(model_weights_path)[0] + ".npz"
+    save_model_weights_to_npz(load_model(model_weights_path), npz_path)
+
+    return npz_path
+
+
+def save_model_weights_to_npz(model, npz_path):
+    """
+    This function is used to save the weights of a loaded keras model in the NumpyModel format.
+    :param model: keras.Sequential, the loaded model.
+    :param npz_path: str, where the weights are saved.
+    """
+    arrays = {'input_shape': np.array(model.input_shape[1:])}
+    i = 0
+
+    for layer in model.layers:
+        layer_type = type(layer).__name__
+        if layer_type in {'Dropout', 'InputLayer'}:
+            continue
+
+        if layer_type == 'Dense':
+            activation, alpha = get_activation(layer.activation)
+            arrays[f'layer_{i}_kind'] = np.array('dense')
+            arrays[f'layer_{i}_kernel'] = layer.kernel.numpy()
+            arrays[f'layer_{i}_bias'] = layer.bias.numpy()
+        elif layer_type == 'GRU':
+            cell = layer.cell
+            activation, alpha = get_activation(cell.activation)
+            arrays[f'layer_{i}_kind'] = np.array('gru')
+            arrays[f'layer_{i}_kernel'] = cell.kernel.numpy()
+            arrays[f'layer_{i}_recurrent_kernel'] = cell.recurrent_kernel.numpy()
+            arrays[f'layer_{i}_bias'] = cell.bias.numpy()
+            arrays[f'layer_{i}_recurrent_activation'] = np.array(get_activation(cell.recurrent_activation)[0])
+            arrays[f'layer_{i}_reset_after'] = np.array(cell.reset_after)
+            arrays[f'layer_{i}_return_sequences'] = np.array(layer.return_sequences)
+        else:
+            raise ValueError(f"Error: Layer '{layer.name}' of type {layer_type} is not supported by NumpyModel!")
+
+        arrays[f'layer_{i}_activation'] = np.array(activation)
+        if alpha is not None:
+            arrays[f'layer_{i}_alpha'] = alpha
+        i += 1
+
+    arrays['number_of_layers'] = np.array(i)
+    np.savez(npz_path, **arrays)
+
+
+def load_parity_samples(data_set_path, number_of_samples, number_of_features=21 * 2):
+    """
+    This function is used to load samples for the parity check from a static
+    data set(.csv file) or a dynamic data set(directory with one .npy file per sequence).
+    :param data_set_path: str, path to the data set file or directory.
+    :param number_of_samples: int, the maximum number of samples.
+    :param number_of_features: int, the number of landmark values in a row of a static data set, 84 for two hands.
+    :return samples: np.array, float32 samples.
+    """
+    if os.path.isdir(data_set_path):
+        files = sorted(glob.glob(os.path.join(data_set_path, "*", "*.npy")))[:number_of_samples]
+        return np.array([np.load(file) for file in files], dtype=np.float32)
+
+    return np.loadtxt(data_set_path, delimiter=',', dtype=np.float32,
+                      usecols=list(range(1, number_of_features + 1)), max_rows=number_of_samples, ndmin=2)
+
+
+def check_parity(model_weights_path, npz_path, data_set_path, number_of_samples=256):
+    """
+    This function is used to compare the outputs of the keras model and of
+    the NumpyModel on recorded samples.
+    :return max_difference: float, the largest absolute difference between the outputs.
+    """
+    from keras.models import load_model
+
+    numpy_model = NumpyModel(npz_path)
+    # the width of the samples is the one the model was trained on, 42 or 84 values
+    samples = load_parity_samples(data_set_path, number_of_samples, numpy_model.input_shape[-1])
+    keras_prediction = np.asarray(load_model(model_weights_path)(samples, training=False))
+    numpy_prediction = numpy_model.predict(samples)
+
+    return float(np.max(np.abs(keras_prediction - numpy_prediction)))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Export a keras sign model(.h5) to a NumpyModel .npz file.")
+    parser.add_argument("model_weights_path", help="path to the .h5 model")
+    parser.add_argument("--output", default=None, help="path to the .npz file(default: next to the .h5 model)")
+    parser.add_argument("--check", nargs='*', default=[],
+                        help="static .csv data sets or dynamic data set directories used to check the parity")
+    parser.add_argument("--tolerance", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    output_path = export_keras_model_to_npz(args.model_weights_path, args.output)
+    print(f"Saved '{output_path}' ({os.path.getsize(output_path) / 1024:.1f} KiB)")
+
+    failed = False
+    for path in args.check:
+        difference = check_parity(args.model_weights_path, output_path, path)
+        failed = failed or difference > args.tolerance
+        print(f"{'OK' if difference <= args.tolerance else 'MISMATCH'}: max |keras - numpy| = {difference:.2e} on '{path}'")
+
+    if failed:
+        exit(1)
@@ -0,0 +1,617 @@
+import os
+import threading
+import time
+import cv2 as cv
+import numpy as np
+
+from collections import deque
+from FrameSink import WindowSink, NullSink
+from SignDetector import get_lazy_sign_detector
+
+# the stages timed with record_latencies=True, end_to_end is from the capture of a frame to its display
+LATENCY_STAGES = ('capture', 'detect', 'predict', 'render', 'display', 'end_to_end')
+
+
+class DropOldestQueue:
+    """
+    This class is a bounded, thread safe queue used between the pipeline stages.
+    When the queue is full, putting a new item drops the oldest one, so the
+    consumer always works on the newest data instead of on a backlog.
+    """
+
+    def __init__(self, maxsize=1) -> None:
+        """
+        Initialize the DropOldestQueue object.
+        :param maxsize: int, the maximum number of items kept in the queue.
+        """
+        self.maxsize = maxsize
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        """
+        This method is used to add an item, dropping the oldest one if the queue is full.
+        :param item: object, the item to be added.
+        :return dropped_item: object, the item that was dropped or None.
+        """
+        dropped_item = None
+        with self.condition:
+            if len(self.items) >= self.maxsize:
+                dropped_item = self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.condition.notify()
+
+        return dropped_item
+
+    def get(self, timeout=None):
+        """
+        This method is used to take the oldest item out of the queue.
+        :param timeout: float, seconds to wait for an item, None to wait forever.
+        :return item: object, the item or None if the wait timed out or the queue is finished.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.items or self.closed, timeout)
+            if self.items:
+                return self.items.popleft()
+
+        return None
+
+    def close(self):
+        """
+        This method is used to signal that no more items will be added.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def is_finished(self):
+        """
+        :return: bool, True if the queue is closed and all items were consumed.
+        """
+        with self.condition:
+            return self.closed and not self.items
+
+
+class FrameBufferPool:
+    """
+    This class is a small, thread safe pool of frame buffers, so the frame source
+    can decode every frame into a buffer that is already allocated instead of
+    into a new array. A buffer is taken with acquire() before the frame is read
+    and given back with release() once the frame is displayed or dropped.
+    The pool starts empty, the frames read while it is empty become its buffers,
+    so after the first few frames no frame memory is allocated anymore.
+    """
+
+    def __init__(self, max_buffers=5) -> None:
+        """
+        Initialize the FrameBufferPool object.
+        :param max_buffers: int, the maximum number of free buffers kept in the pool.
+        """
+        self.max_buffers = max_buffers
+        self.free_buffers = deque()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        This method is used to take a free buffer out of the pool.
+        :return buffer: np.array, a free buffer or None if there is none.
+        """
+        with self.lock:
+            return self.free_buffers.popleft() if self.free_buffers else None
+
+    def release(self, buffer):
+        """
+        This method is used to give back a buffer that is not used anymore.
+        :param buffer: np.array, the buffer, None is ignored.
+        """
+        if buffer is None:
+            return
+        with self.lock:
+            if len(self.free_buffers) < self.max_buffers:
+                self.free_buffers.append(buffer)
+
+
+class FrameResult:
+    """
+    This class is used to carry one frame and everything detected on it
+    from the inference stage to the render stage.
+    """
+
+    def __init__(self, frame, frame_index, mediapipe_results=None, timestamp=None) -> None:
+        """
+        Initialize the FrameResult object.
+        :param frame: np.array, the captured BGR frame.
+        :param frame_index: int, the index of the frame in the source.
+        :param mediapipe_results: ...NormalizedLandmarkList, the detected landmarks.
+        :param timestamp: float, the time.monotonic() time the frame was captured.
+        """
+        self.frame = frame
+        self.frame_index = frame_index
+        self.timestamp = time.monotonic() if timestamp is None else timestamp
+        self.mediapipe_results = mediapipe_results
+        self.landmarks = None
+        self.normalized_landmarks = None
+        self.hand_mask = None  # the detected hands of the (2, 21, 2) hand tensor, with number_of_hands=2
+        self.landmark_buffers = None  # the buffers of landmarks and normalized_landmarks, from the landmark pool
+        self.label = None
+        self.confidence = None
+        self.spotted_sign = None  # the SpottedSign that ended with this frame, with a SignSpotter
+
+    def has_hands(self):
+        return self.mediapipe_results is not None and \
+            self.mediapipe_results.multi_hand_landmarks is not None
+
+
+class RecognitionPipeline:
+    """
+    This class is used to run the main loop of the application as a pipeline:
+        - capture thread: reads frames from the frame source
+        - inference thread: hand detection, landmarks and sign prediction
+        - render stage(calling thread): GUI, saving data, sentence mode, display
+    The stages talk through bounded DropOldestQueue objects, so the hand
+    detection always runs on the newest frame and a slow stage only lowers
+    the rate of that stage instead of the rate of the whole application.
+    With threaded=False all stages run one after another on the calling thread.
+    """
+
+    def __init__(self, frame_source, hands_detector, app_mode,
+                 data_manipulator_static, data_manipulator_dynamic,
+                 sign_detector_static, sign_detector_dynamic,
+                 threaded=True, queue_size=1, frame_save_dir_path=None, stabilizer=None,
+                 reuse_frames=True, record_latencies=False, profiler=None, prefetch_models=False,
+                 number_of_hands=1, sign_spotter=None) -> None:
+        """
+        Initialize the RecognitionPipeline object.
+        :param frame_source: FrameSource, where the frames are read from.
+        :param hands_detector: HandsDetector, object used to detect the hands.
+        :param app_mode: ApplicationMode, object that manages the application mode.
+        :param data_manipulator_static: DataManipulatorStatic, object that stores static data.
+        :param data_manipulator_dynamic: DataManipulatorDynamic, object that stores dynamic data.
+        :param sign_detector_static: SignDetectorStatic, object used to predict static signs.
+        :param sign_detector_dynamic: SignDetectorDynamic, object used to predict dynamic signs.
+        :param threaded: bool, run capture and inference on their own threads.
+        :param queue_size: int, size of the queues between the stages.
+        :param frame_save_dir_path: str, directory where frames are saved with 'k'.
+        :param stabilizer: PredictionStabilizer, turns the predictions into stable signs for
+        the sentence mode, None to use the prediction of every frame.
+        :param reuse_frames: bool, read the frames into the buffers of a FrameBufferPool.
+        :param record_latencies: bool, keep the latency of every stage for every frame, see get_latency_stats.
+        :param profiler: Profiler, times the stages and the methods of the detectors and of the GUI,
+        its overlay is drawn when app_mode.SHOW_PROFILER is set, None to not profile.
+        :param prefetch_models: bool, start loading the LazySignDetector models after the first frame is displayed,
+        otherwise they are loaded when their detect mode is entered.
+        :param number_of_hands: int, 1 to give the landmarks of the first hand(42 values) to the sign detectors and
+        the data sets, 2 to give the (2, 21, 2) hand tensor(84 values), see convert_detected_hands_to_tensor.
+        :param sign_spotter: SignSpotter, finds the dynamic signs in the stream in mode '5', so the dynamic sign
+        detector only runs on the frames of a sign and every sign is given out once, None to predict every frame.
+        """
+        self.frame_source = frame_source
+        self.hands_detector = hands_detector
+        self.app_mode = app_mode
+        self.data_manipulator_static = data_manipulator_static
+        self.data_manipulator_dynamic = data_manipulator_dynamic
+        self.sign_detector_static = sign_detector_static
+        self.sign_detector_dynamic = sign_detector_dynamic
+        self.threaded = threaded
+        self.frame_save_dir_path = frame_save_dir_path
+        self.stabilizer = stabilizer
+        self.prefetch_models = prefetch_models
+        self.number_of_hands = number_of_hands
+        self.sign_spotter = sign_spotter
+        self.inferred_mode = None  # the mode of the last inferred frame
+
+        self.frame_queue = DropOldestQueue(queue_size)
+        self.result_queue = DropOldestQueue(queue_size)
+
+        # enough buffers for every stage: one being captured, one being inferred, one being
+        # rendered and the ones waiting in the two queues
+        self.frame_pool = FrameBufferPool(2 * queue_size + 3) if reuse_frames else None
+
+        # the landmark buffers of a frame are taken by the inference stage and given back once the frame
+        # is rendered or dropped(see release_result), so the render stage never reads reused buffers
+        self.landmark_pool = FrameBufferPool(queue_size + 2)
+        self.stop_event = threading.Event()
+        self.threads = []
+
+        # counters
+        self.frames_captured = 0
+        self.frames_inferred = 0
+        self.frames_rendered = 0
+
+        # seconds spent by every stage on every frame, each list is appended by a single thread
+        self.latencies = {stage: [] for stage in LATENCY_STAGES} if record_latencies else None
+
+        self.profiler = profiler
+        if profiler is not None:
+            self.instrument(profiler)
+
+    def capture_loop(self):
+        """
+        This method is used by the capture thread to read frames from the source.
+        """
+        while not self.stop_event.is_set():
+            frame = self.read_frame()
+            if frame is None:
+                break
+            dropped_item = self.frame_queue.put((self.frames_captured, frame, time.monotonic()))
+            if dropped_item is not None:
+                self.release_frame(dropped_item[1])
+                self.count('frames_dropped')
+            self.frames_captured += 1
+
+        self.frame_queue.close()
+
+    def inference_loop(self):
+        """
+        This method is used by the inference thread to process the newest captured frame.
+        """
+        while not self.stop_event.is_set():
+            item = self.frame_queue.get(timeout=0.1)
+            if item is None:
+                if self.frame_queue.is_finished():
+                    break
+                continue
+            frame_index, frame, timestamp = item
+            dropped_result = self.result_queue.put(self.infer(frame, frame_index, timestamp))
+            if dropped_result is not None:
+                self.release_result(dropped_result)
+                self.count('frames_dropped')
+
+        self.result_queue.close()
+
+    def read_frame(self):
+        """
+        This method is used to read the next frame from the source, into a free buffer of the pool.
+        :return frame: np.array, the next frame or None if the source is exhausted.
+        """
+        start_time = time.perf_counter()
+        if self.frame_pool is None:
+            frame = self.frame_source.read()
+        else:
+            buffer = self.frame_pool.acquire()
+            frame = self.frame_source.read(out=buffer)
+            if frame is not buffer:
+                self.frame_pool.release(buffer)  # not used, the frame has another shape or there is no frame
+
+        if frame is not None:
+            self.record_latency('capture', time.perf_counter() - start_time)
+
+        return frame
+
+    def instrument(self, profiler):
+        """
+        This method is used to time the methods of the detectors, of the data manipulator and
+        of the GUI that run on every frame, with the timers of the profiler.
+        :param profiler: Profiler, the profiler.
+        """
+        for method_name in ('mediapipe_hands_detect', 'draw_hands_landmarks',
+                            'draw_rectangle_around_hand', 'display_prediction_on_frame'):
+            profiler.wrap_method(self.hands_detector, method_name)
+        for method_name in ('convert_detected_landmarks_to_array', 'normalize_landmarks_array',
+                            'convert_detected_hands_to_tensor', 'normalize_hands_tensor'):
+            profiler.wrap_method(self.data_manipulator_static, method_name)
+        profiler.wrap_method(self.app_mode, 'set_app_mode')
+
+        def wrap_sign_detector(sign_detector):
+            profiler.wrap_method(sign_detector, 'make_prediction')
+            profiler.wrap_method(sign_detector, 'make_streaming_prediction')
+            profiler.wrap_method(sign_detector, 'make_batch_prediction')
+
+        for sign_detector in (self.sign_detector_static, self.sign_detector_dynamic):
+            # the classifier of a MotionGatedSignDetector is timed, not the gate,
+            # a LazySignDetector is timed once it is loaded
+            lazy_sign_detector = get_lazy_sign_detector(sign_detector)
+            if lazy_sign_detector is not None:
+                lazy_sign_detector.on_loaded(wrap_sign_detector)
+            else:
+                wrap_sign_detector(getattr(sign_detector, 'sign_detector', sign_detector))
+        profiler.wrap_method(self.sign_spotter, 'update')
+
+    def record_latency(self, stage, seconds):
+        if self.latencies is not None:
+            self.latencies[stage].append(seconds)
+        if self.profiler is not None:
+            self.profiler.record(f"stage.{stage}", seconds)
+
+    def count(self, name):
+        if self.profiler is not None:
+            self.profiler.count(name)
+
+    def get_latency_stats(self):
+        """
+        This method is used to summarize the recorded latencies.
+        :return latency_stats: dict, {stage: {'count', 'mean', 'p50', 'p95', 'p99'}} in milliseconds,
+        None if the latencies are not recorded.
+        """
+        if self.latencies is None:
+            return None
+
+        latency_stats = {}
+        for stage, latencies in self.latencies.items():
+            if len(latencies) == 0:
+                continue
+            milliseconds = np.array(latencies) * 1000
+            p50, p95, p99 = np.percentile(milliseconds, [50, 95, 99]).tolist()
+            latency_stats[stage] = {'count': len(latencies), 'mean': float(milliseconds.mean()),
+                                    'p50': p50, 'p95': p95, 'p99': p99}
+
+        return latency_stats
+
+    def release_frame(self, frame):
+        """
+        This method is used to give the buffer of a frame that is displayed or dropped back to the pool.
+        :param frame: np.array, the frame.
+        """
+        if self.frame_pool is not None:
+            self.frame_pool.release(frame)
+
+    def release_result(self, result):
+        """
+        This method is used to give the buffers of a result that is rendered or dropped back to their pools.
+        :param result: FrameResult, the result.
+        """
+        self.release_frame(result.frame)
+        self.landmark_pool.release(result.landmark_buffers)
+
+    def create_landmark_buffers(self):
+        """
+        :return: tuple of np.array, the buffers the landmarks of one frame are written into.
+        """
+        if self.number_of_hands == 1:
+            return np.zeros((21, 2), dtype=np.float32), np.zeros((21, 2), dtype=np.float32)
+
+        return np.zeros((2, 21, 2), dtype=np.float32), np.zeros(2, dtype=bool), np.zeros((2, 21, 2), dtype=np.float32)
+
+    def infer(self, frame, frame_index, timestamp=None):
+        """
+        This method is used to detect the hands in a frame and, in the detect modes,
+        to predict the sign.
+        :param frame: np.array, one frame from the frame source.
+        :param frame_index: int, the index of the frame in the source.
+        :param timestamp: float, the time.monotonic() time the frame was captured.
+        :return result: FrameResult, the frame and everything detected on it.
+        """
+        start_time = time.perf_counter()
+        result = FrameResult(frame, frame_index,
+                             self.hands_detector.mediapipe_hands_detect(frame), timestamp)
+        self.frames_inferred += 1
+        detect_time = time.perf_counter()
+        self.record_latency('detect', detect_time - start_time)
+
+        # the prediction cached by a MotionGatedSignDetector is forgotten when the hand is lost or the mode changes
+        if hasattr(self.sign_detector_static, 'reset') and \
+                (not result.has_hands() or self.app_mode.MODE != self.inferred_mode):
+            self.sign_detector_static.reset()
+        self.inferred_mode = self.app_mode.MODE
+
+        if result.has_hands():
+            self.count('frames_with_hands')
+            # get the landmarks from the hand detector model, into free buffers of the pool
+            dm_static = self.data_manipulator_static
+            landmark_buffers = result.landmark_buffers = \
+                self.landmark_pool.acquire() or self.create_landmark_buffers()
+            if self.number_of_hands == 1:
+                landmarks_buffer, normalized_landmarks_buffer = landmark_buffers
+                result.landmarks = dm_static.convert_detected_landmarks_to_array(result.mediapipe_results,
+                                                                                 out=landmarks_buffer)
+                result.normalized_landmarks = dm_static.normalize_landmarks_array(result.landmarks,
+                                                                                  out=normalized_landmarks_buffer)
+            else:
+                hands_buffer, hand_mask_buffer, normalized_hands_buffer = landmark_buffers
+                hands, result.hand_mask = dm_static.convert_detected_hands_to_tensor(
+                    result.mediapipe_results, out=hands_buffer, mask_out=hand_mask_buffer)
+                result.normalized_landmarks = dm_static.normalize_hands_tensor(hands, out=normalized_hands_buffer)
+                # the prediction is drawn around the first detected hand
+                result.landmarks = hands[0 if result.hand_mask[0] else 1]
+
+            # make a prediction based on the detected static or dynamic sign
+            if self.app_mode.MODE == '4':
+                result.label, result.confidence = self.sign_detector_static.get_label_and_prediction(
+                    result.normalized_landmarks, self.data_manipulator_static)
+            elif self.app_mode.MODE == '5' and self.sign_spotter is not None:
+                # the motion is measured on the landmarks in the frame, the normalized ones do not move with the wrist
+                result.spotted_sign = self.sign_spotter.update(result.normalized_landmarks,
+                                                               self.data_manipulator_dynamic, result.timestamp,
+                                                               result.landmarks)
+                result.label, result.confidence = self.sign_spotter.label, self.sign_spotter.confidence
+            elif self.app_mode.MODE == '5':
+                result.label, result.confidence = self.sign_detector_dynamic.get_label_and_prediction(
+                    result.normalized_landmarks, self.data_manipulator_dynamic)
+
+            self.record_latency('predict', time.perf_counter() - detect_time)
+        elif self.app_mode.MODE == '5' and self.sign_spotter is not None:
+            # losing the hand ends the sign
+            result.spotted_sign = self.sign_spotter.update(None, self.data_manipulator_dynamic, result.timestamp)
+
+        return result
+
+    def render(self, result, key_input):
+        """
+        This method is used to draw the GUI on the frame and to control the data
+        flow(saving landmarks, sentence mode) based on the application mode.
+        Everything is drawn in place, on the frame of the result.
+        :param result: FrameResult, the frame and everything detected on it.
+        :param key_input: int, unicode value of user input.
+        :return frame: np.array, the frame ready to be displayed.
+        """
+        start_time = time.perf_counter()
+        app_mode = self.app_mode
+        app_mode.get_app_mode(key_input)
+        frame = app_mode.set_app_mode(result.frame, key_input,
+                                      self.data_manipulator_static,
+                                      self.data_manipulator_dynamic)
+
+        # the model of the detect mode is loaded the first time the mode is entered
+        if app_mode.MODE in {'4', '5'}:
+            lazy_sign_detector = get_lazy_sign_detector(
+                self.sign_detector_static if app_mode.MODE == '4' else self.sign_detector_dynamic)
+            if lazy_sign_detector is not None and not lazy_sign_detector.is_ready:
+                lazy_sign_detector.start_loading()
+                cv.putText(frame, "Loading the model...", (10, 40),
+                           cv.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1, cv.LINE_AA)
+
+        # the sign for the sentence mode, every frame votes, also the ones without a hand
+        sentence_label = None
+        spotting = app_mode.MODE == '5' and self.sign_spotter is not None
+        if app_mode.MODE in {'4', '5'} and app_mode.SENTENCE_MODE:
+            if spotting:
+                # a spotted sign is one word, given out once(also when the hand is lost), it is not stabilized
+                sentence_label = result.spotted_sign.label if result.spotted_sign is not None else None
+            else:
+                sentence_label = result.label if result.has_hands() else None
+                if self.stabilizer is not None:
+                    sentence_label = self.stabilizer.update(sentence_label, result.confidence, result.timestamp)
+
+        if result.has_hands() and app_mode.MODE != 'q':
+            # save the landmarks of the detected static sign
+            if app_mode.MODE == '2':
+                self.data_manipulator_static.save_landmarks_to_csv_file(result.normalized_landmarks, key_input)
+
+            # save the landmarks as a sequence of the detected dynamic sign
+            if app_mode.MODE == '3':
+                self.data_manipulator_dynamic.save_landmark_sequence_to_npy_file(result.normalized_landmarks,
+                                                                                 key_input)
+
+            if app_mode.MODE in {'4', '5'}:
+                # display the prediction above the detected hand
+                frame = self.hands_detector.display_prediction_on_frame(frame, result.label, result.confidence,
+                                                                        result.landmarks)
+
+            # draw the landmarks of the hands on the frame
+            if app_mode.MODE != '1' and app_mode.SHOW_LANDMARKS:
+                frame = self.hands_detector.draw_hands_landmarks(frame, result.mediapipe_results)
+                if app_mode.MODE in {'4', '5'}:
+                    frame = self.hands_detector.draw_rectangle_around_hand(frame, result.landmarks)
+
+        # sentence mode
+        if sentence_label is not None and (result.has_hands() or spotting):
+            accepted_word_labels = self.data_manipulator_static.sign_labels[:26] + \
+                self.data_manipulator_dynamic.sign_labels
+            app_mode.create_word(sentence_label, accepted_word_labels, result.timestamp, wait=not spotting)
+            app_mode.create_sentence(sentence_label, result.timestamp, wait=not spotting)
+
+        if app_mode.SHOW_PROFILER and self.profiler is not None:
+            frame = self.profiler.draw_overlay(frame)
+
+        if key_input == ord('k') and self.frame_save_dir_path is not None:
+            cv.imwrite(os.path.join(self.frame_save_dir_path, f"length1_dynamic{app_mode.TAKE}.jpg"), frame)
+            app_mode.TAKE += 1
+
+        self.frames_rendered += 1
+        self.record_latency('render', time.perf_counter() - start_time)
+
+        return frame
+
+    def start_loading_models(self):
+        """
+        This method is used to start loading the models of the LazySignDetector objects.
+        """
+        for sign_detector in (self.sign_detector_static, self.sign_detector_dynamic):
+            lazy_sign_detector = get_lazy_sign_detector(sign_detector)
+            if lazy_sign_detector is not None:
+                lazy_sign_detector.start_loading()
+
+    def start(self):
+        """
+        This method is used to start the capture and the inference threads.
+        """
+        self.stop_event.clear()
+        self.threads = [threading.Thread(target=self.capture_loop, name="capture", daemon=True),
+                        threading.Thread(target=self.inference_loop, name="inference", daemon=True)]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        """
+        This method is used to stop the threads and release the frame source.
+        """
+        self.stop_event.set()
+        self.frame_queue.close()
+        self.result_queue.close()
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        self.frame_source.release()
+
+    def next_result(self):
+        """
+        This method is used to get the next processed frame for the render stage.
+        :return result: FrameResult, the next processed frame or None when the source is exhausted.
+        """
+        if not self.threaded:
+            frame = self.read_frame()
+            if frame is None:
+                return None
+            self.frames_captured += 1
+            return self.infer(frame, self.frames_captured - 1, time.monotonic())
+
+        while True:
+            result = self.result_queue.get(timeout=0.1)
+            if result is not None or self.result_queue.is_finished():
+                return result
+
+    def run(self, show=True, max_frames=None, window_name='SIGN', sink=None):
+        """
+        This method is used to run the application until 'q' is pressed, the frame
+        source is exhausted or max_frames frames were rendered.
+        :param show: bool, display the frames in a window, False to run headless.
+        :param max_frames: int, stop after this many rendered frames, None for no limit.
+        :param window_name: str, the name of the window.
+        :param sink: FrameSink, where the frames are given and the keys come from,
+        by default a WindowSink(or a NullSink if show is False).
+        :return stats: dict, frame counters and the frame rate of the render stage(and the
+        counters of the motion gate, if the static sign detector is gated, and the
+        latencies of the stages, if they are recorded).
+        """
+        if sink is None:
+            sink = WindowSink(window_name) if show else NullSink()
+        key_input = -1
+        start_time = time.perf_counter()
+
+        if self.threaded:
+            self.start()
+        try:
+            while max_frames is None or self.frames_rendered < max_frames:
+                result = self.next_result()
+                if result is None:
+                    break
+
+                frame = self.render(result, key_input)
+                if self.app_mode.MODE == 'q':
+                    break
+
+                display_start_time = time.perf_counter()
+                key_input = sink.show(frame)
+                self.record_latency('display', time.perf_counter() - display_start_time)
+                self.record_latency('end_to_end', time.monotonic() - result.timestamp)
+                if self.profiler is not None:
+                    self.profiler.tick()
+                if self.prefetch_models and self.frames_rendered == 1:
+                    self.start_loading_models()
+                self.release_result(result)
+        finally:
+            self.stop()
+
+        elapsed = time.perf_counter() - start_time
+
+        stats = {
+            'threaded': self.threaded,
+            'frames_captured': self.frames_captured,
+            'frames_inferred': self.frames_inferred,
+            'frames_rendered': self.frames_rendered,
+            'frames_dropped': self.frame_queue.dropped + self.result_queue.dropped,
+            'seconds': elapsed,
+            'fps': self.frames_rendered / elapsed if elapsed > 0 else 0.0
+        }
+        # cache counters of a MotionGatedSignDetector
+        if hasattr(self.sign_detector_static, 'get_counters'):
+            stats['static_gate'] = self.sign_detector_static.get_counters()
+        if self.sign_spotter is not None:
+            stats['sign_spotting'] = self.sign_spotter.get_counters()
+        if self.latencies is not None:
+            stats['latency_ms'] = self.get_latency_stats()
+
+        return stats
@@ -0,0 +1,76 @@
+import time
+
+from collections import deque
+
+
+class PredictionStabilizer:
+    """
+    This class is used to turn the noisy per-frame predictions into a stable sign
+    for the sentence mode. Everything is measured in seconds, not in frames, so it
+    behaves the same at any frame rate:
+        - sliding window majority vote: the predictions of the last window_seconds
+          vote, a sign wins if it has at least min_vote_fraction of the votes
+        - hold: the winning sign is only given out after it won for hold_seconds
+    Predictions below min_confidence and frames without a hand vote for no sign.
+    """
+
+    __slots__ = ('window_seconds', 'hold_seconds', 'min_vote_fraction', 'min_confidence',
+                 'votes', 'vote_counts', 'candidate', 'candidate_since')
+
+    def __init__(self, window_seconds=0.5, hold_seconds=0.3, min_vote_fraction=0.6, min_confidence=0.5) -> None:
+        """
+        Initialize the PredictionStabilizer object.
+        :param window_seconds: float, the length of the voting window.
+        :param hold_seconds: float, how long a sign has to win before it is given out.
+        :param min_vote_fraction: float, the fraction of the votes a sign needs to win.
+        :param min_confidence: float, the confidence a prediction needs to vote for its sign.
+        """
+        self.window_seconds = window_seconds
+        self.hold_seconds = hold_seconds
+        self.min_vote_fraction = min_vote_fraction
+        self.min_confidence = min_confidence
+
+        self.votes = deque()  # (timestamp, label)
+        self.vote_counts = {}
+        self.candidate = None
+        self.candidate_since = 0.0
+
+    def reset(self):
+        """
+        This method is used to forget all the votes.
+        """
+        self.votes.clear()
+        self.vote_counts.clear()
+        self.candidate = None
+
+    def update(self, label, confidence, timestamp=None):
+        """
+        This method is used to add the prediction of a frame.
+        :param label: str, the predicted sign label, None if there is no prediction(no hand).
+        :param confidence: float, the confidence of the prediction.
+        :param timestamp: float, the time of the frame in seconds, time.monotonic() by default.
+        :return stable_label: str, the stable sign label or None.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if label is not None and (confidence is None or confidence < self.min_confidence):
+            label = None
+
+        self.votes.append((timestamp, label))
+        self.vote_counts[label] = self.vote_counts.get(label, 0) + 1
+        while self.votes[0][0] <= timestamp - self.window_seconds:
+            _, old_label = self.votes.popleft()
+            self.vote_counts[old_label] -= 1
+
+        winner = max(self.vote_counts, key=self.vote_counts.get)
+        if self.vote_counts[winner] < self.min_vote_fraction * len(self.votes):
+            winner = None
+
+        if winner != self.candidate:
+            self.candidate = winner
+            self.candidate_since = timestamp
+
+        if self.candidate is not None and timestamp - self.candidate_since >= self.hold_seconds:
+            return self.candidate
+
+        return None
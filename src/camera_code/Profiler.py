@@ -0,0 +1,204 @@
+import functools
+import threading
+import time
+import cv2 as cv
+import numpy as np
+
+from collections import deque
+
+
+class RollingHistogram:
+    """
+    This class is used to keep the last window_size durations of a timer in a ring
+    buffer, for the percentiles, and the total count and sum since the start.
+    """
+
+    def __init__(self, window_size=300) -> None:
+        """
+        Initialize the RollingHistogram object.
+        :param window_size: int, the number of durations the percentiles are computed on.
+        """
+        self.durations = np.zeros(window_size)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        self.durations[self.count % len(self.durations)] = seconds
+        self.count += 1
+        self.total += seconds
+
+    def percentiles(self, percentiles):
+        """
+        :param percentiles: list, the percentiles(0 to 100).
+        :return: list, the percentiles of the last durations in seconds, zeros if there is none.
+        """
+        if self.count == 0:
+            return [0.0] * len(percentiles)
+
+        return np.percentile(self.durations[:min(self.count, len(self.durations))], percentiles).tolist()
+
+
+class Profiler:
+    """
+    This class is used to find what slows the application down. It keeps:
+        - timers: a RollingHistogram of the durations of every timed stage or method
+        - counters: plain event counters
+        - the frame rate of the last rendered frames
+    Methods of the objects of the application are timed by wrapping them on the
+    object(wrap_method), the classes are not changed. The last percentiles can be
+    drawn on the frame(draw_overlay) and everything can be exported to a CSV or a
+    Prometheus text file so sessions can be compared.
+    """
+
+    def __init__(self, window_size=300) -> None:
+        """
+        Initialize the Profiler object.
+        :param window_size: int, the number of durations kept by every timer.
+        """
+        self.window_size = window_size
+        self.timers = {}
+        self.counters = {}
+        self.frame_times = deque(maxlen=60)
+        self.lock = threading.Lock()  # the timers are created from the capture, inference and render threads
+
+        # colors
+        self.purple = (128, 0, 128)
+        self.white = (255, 255, 255)
+
+    def record(self, name, seconds):
+        """
+        This method is used to add a duration to a timer.
+        :param name: str, the name of the timer.
+        :param seconds: float, the duration.
+        """
+        timer = self.timers.get(name)
+        if timer is None:
+            with self.lock:
+                timer = self.timers.setdefault(name, RollingHistogram(self.window_size))
+        timer.add(seconds)
+
+    def count(self, name, value=1):
+        """
+        This method is used to increment a counter.
+        :param name: str, the name of the counter.
+        :param value: int, the increment.
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def tick(self):
+        """
+        This method is used to mark a rendered frame, for the frame rate.
+        """
+        self.frame_times.append(time.perf_counter())
+
+    def get_fps(self):
+        if len(self.frame_times) < 2:
+            return 0.0
+
+        return (len(self.frame_times) - 1) / max(self.frame_times[-1] - self.frame_times[0], 1e-9)
+
+    def wrap_method(self, obj, method_name, timer_name=None):
+        """
+        This method is used to time every call of a method of an object, the wrapper is set on the object only.
+        :param obj: object, the object, nothing is done if it is None or has no such method.
+        :param method_name: str, the name of the method.
+        :param timer_name: str, the name of the timer, 'ClassName.method_name' by default.
+        """
+        method = getattr(obj, method_name, None)
+        if method is None:
+            return
+        timer_name = timer_name or f"{type(obj).__name__}.{method_name}"
+
+        @functools.wraps(method)
+        def timed_method(*args, **kwargs):
+            start_time = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record(timer_name, time.perf_counter() - start_time)
+
+        setattr(obj, method_name, timed_method)
+
+    def get_stats(self):
+        """
+        :return: dict, {timer name: {'count', 'mean', 'p50', 'p95', 'p99'}} in milliseconds,
+        the mean is over the whole session, the percentiles over the last durations.
+        """
+        stats = {}
+        for name, timer in sorted(self.timers.items()):
+            p50, p95, p99 = timer.percentiles([50, 95, 99])
+            stats[name] = {'count': timer.count,
+                           'mean': timer.total / max(timer.count, 1) * 1000,
+                           'p50': p50 * 1000, 'p95': p95 * 1000, 'p99': p99 * 1000}
+
+        return stats
+
+    def draw_overlay(self, frame):
+        """
+        This method is used to draw the frame rate and the latency of every timer on the frame.
+        :param frame: np.array, the frame, changed in place.
+        :return frame: np.array, the frame with the overlay.
+        """
+        lines = [f"FPS: {self.get_fps():.1f}    p50 / p95 ms"]
+        # without the class name / 'stage.' prefix, the overlay has to fit on the frame
+        lines += [f"{name.rpartition('.')[2]}: {timer_stats['p50']:.2f} / {timer_stats['p95']:.2f}"
+                  for name, timer_stats in self.get_stats().items()]
+
+        # box on the right side, under the header
+        width = max(cv.getTextSize(line, cv.FONT_HERSHEY_SIMPLEX, 0.4, 1)[0][0] for line in lines) + 10
+        x0, y0 = frame.shape[1] - width - 5, 25
+        cv.rectangle(frame, (x0, y0), (frame.shape[1] - 5, y0 + 15 * len(lines) + 5), self.white, -1)
+        for i, line in enumerate(lines):
+            cv.putText(frame, line, (x0 + 5, y0 + 15 * (i + 1)),
+                       cv.FONT_HERSHEY_SIMPLEX, 0.4, self.purple, 1, cv.LINE_AA)
+
+        return frame
+
+    def export_csv(self, file_path):
+        """
+        This method is used to write the timers and the counters to a CSV file.
+        :param file_path: str, path to the CSV file.
+        """
+        with open(file_path, 'w') as file:
+            file.write("name,kind,count,mean_ms,p50_ms,p95_ms,p99_ms,value\n")
+            for name, timer_stats in self.get_stats().items():
+                file.write(f"{name},timer,{timer_stats['count']},{timer_stats['mean']:.4f},{timer_stats['p50']:.4f},"
+                           f"{timer_stats['p95']:.4f},{timer_stats['p99']:.4f},\n")
+            for name, value in sorted(self.counters.items()):
+                file.write(f"{name},counter,,,,,,{value}\n")
+            file.write(f"fps,gauge,,,,,,{self.get_fps():.4f}\n")
+
+    def export_prometheus(self, file_path, prefix='sign'):
+        """
+        This method is used to write the timers(as summaries in seconds) and the counters
+        to a file in the Prometheus text format.
+        :param file_path: str, path to the file.
+        :param prefix: str, the prefix of the metric names.
+        """
+        lines = [f"# TYPE {prefix}_duration_seconds summary"]
+        for name, timer in sorted(self.timers.items()):
+            for quantile, value in zip(('0.5', '0.95', '0.99'), timer.percentiles([50, 95, 99])):
+                lines.append(f'{prefix}_duration_seconds{{timer="{name}",quantile="{quantile}"}} {value:.9f}')
+            lines.append(f'{prefix}_duration_seconds_sum{{timer="{name}"}} {timer.total:.9f}')
+            lines.append(f'{prefix}_duration_seconds_count{{timer="{name}"}} {timer.count}')
+
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'{prefix}_events_total{{counter="{name}"}} {value}')
+
+        lines.append(f"# TYPE {prefix}_fps gauge")
+        lines.append(f"{prefix}_fps {self.get_fps():.4f}")
+
+        with open(file_path, 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+
+    def export(self, file_path):
+        """
+        This method is used to export to a Prometheus text file(.prom, .txt) or else to a CSV file.
+        :param file_path: str, path to the file.
+        """
+        if file_path.endswith(('.prom', '.txt')):
+            self.export_prometheus(file_path)
+        else:
+            self.export_csv(file_path)
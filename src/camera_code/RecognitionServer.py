@@ -0,0 +1,272 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+from SignDetector import SignDetectorStatic, SignDetectorDynamic
+from SignLabelRegistry import SignLabelRegistry
+
+# local recognition service: many clients(kiosks) send the normalized landmarks of a frame(static signs)
+# or a sequence of 30 frames(dynamic signs), the concurrent requests are gathered into micro-batches
+# and the model runs once per batch
+# protocol: one JSON object per line, over TCP(localhost) or a Unix socket
+#   request:  {"id": 1, "kind": "static", "landmarks": [42 values(84 for the two-hand models)]}
+#             {"id": 2, "kind": "dynamic", "landmarks": [30 x [42 values(84 for the two-hand models)]]}
+#             {"id": 3, "kind": "stats"}
+#   response: {"id": 1, "label": "a", "confidence": 0.98} or {"id": 1, "error": "..."}
+# usage: python RecognitionServer.py [--port 8765 | --unix-socket /tmp/sign.sock] [--max-wait-ms 2]
+
+
+class MicroBatcher:
+    """
+    This class is used to gather the samples submitted by concurrent requests into
+    batches: a batch is run as soon as it has max_batch_size samples or max_wait
+    seconds after its first sample. The model runs on a worker thread, so the event
+    loop keeps accepting requests(which form the next batch) while a batch is running.
+    """
+
+    def __init__(self, predict_batch, sample_shape, max_batch_size=32, max_wait=0.002) -> None:
+        """
+        Initialize the MicroBatcher object.
+        :param predict_batch: function, gets a (batch,) + sample_shape float32 array and returns the predictions.
+        :param sample_shape: tuple, the shape of one sample.
+        :param max_batch_size: int, the maximum number of samples in a batch.
+        :param max_wait: float, seconds a batch waits for more samples after its first one.
+        """
+        self.predict_batch = predict_batch
+        self.sample_shape = tuple(sample_shape)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self.queue = None  # created in start(), inside the event loop
+        self.batch_full = None
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.task = None
+
+        # counters
+        self.batches = 0
+        self.samples = 0
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.batch_full = asyncio.Event()
+        self.task = asyncio.get_running_loop().create_task(self.batch_loop())
+
+    async def submit(self, sample):
+        """
+        This method is used to add a sample to the next batch and wait for its prediction.
+        :param sample: np.array, a float32 sample of sample_shape.
+        :return prediction: np.array, the prediction of the model for the sample.
+        """
+        if sample.shape != self.sample_shape:
+            raise ValueError(f"expected landmarks of shape {self.sample_shape}, got {sample.shape}")
+
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((sample, future))
+        if self.queue.qsize() >= self.max_batch_size:
+            self.batch_full.set()
+
+        return await future
+
+    async def batch_loop(self):
+        """
+        This method is used by the batching task to take the batches from the queue and run them.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+
+            # wait for more samples, unless the batch is already full
+            if self.max_wait > 0 and self.queue.qsize() + 1 < self.max_batch_size:
+                self.batch_full.clear()
+                try:
+                    await asyncio.wait_for(self.batch_full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+            while len(batch) < self.max_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            x = np.stack([sample for sample, _ in batch])
+            try:
+                predictions = await loop.run_in_executor(self.executor, self.predict_batch, x)
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+
+            for (_, future), prediction in zip(batch, predictions):
+                if not future.done():  # the client may be gone
+                    future.set_result(prediction)
+            self.batches += 1
+            self.samples += len(batch)
+
+    def get_counters(self):
+        return {'batches': self.batches, 'samples': self.samples,
+                'mean_batch_size': self.samples / self.batches if self.batches != 0 else 0.0}
+
+
+class RecognitionServer:
+    """
+    This class is used to serve sign predictions to many clients at once, with one
+    MicroBatcher(and one model) for the static signs and one for the dynamic signs.
+    """
+
+    def __init__(self, sign_detector_static, sign_detector_dynamic, static_sign_labels, dynamic_sign_labels,
+                 max_batch_size=32, max_wait=0.002, number_of_frames=30) -> None:
+        """
+        Initialize the RecognitionServer object.
+        :param sign_detector_static: SignDetectorStatic, object used to predict static signs, None to not serve them.
+        :param sign_detector_dynamic: SignDetectorDynamic, object used to predict dynamic signs, None to not serve them.
+        :param static_sign_labels: list, the static sign labels.
+        :param dynamic_sign_labels: list, the dynamic sign labels.
+        :param max_batch_size: int, the maximum number of samples in a batch.
+        :param max_wait: float, seconds a batch waits for more samples after its first one.
+        :param number_of_frames: int, the number of frames in a dynamic sequence.
+        """
+        self.sign_labels = {'static': static_sign_labels, 'dynamic': dynamic_sign_labels}
+        self.batchers = {}
+        if sign_detector_static is not None:
+            self.batchers['static'] = MicroBatcher(sign_detector_static.make_batch_prediction,
+                                                   (sign_detector_static.number_of_features,),
+                                                   max_batch_size, max_wait)
+        if sign_detector_dynamic is not None:
+            self.batchers['dynamic'] = MicroBatcher(sign_detector_dynamic.make_batch_prediction,
+                                                    (number_of_frames, sign_detector_dynamic.number_of_features),
+                                                    max_batch_size, max_wait)
+
+        self.clients = 0
+        self.requests = 0
+        self.errors = 0
+        self.start_time = time.perf_counter()
+
+    def get_stats(self):
+        """
+        :return stats: dict, the counters of the server and of every batcher.
+        """
+        stats = {'clients': self.clients, 'requests': self.requests, 'errors': self.errors,
+                 'seconds': time.perf_counter() - self.start_time}
+        for kind, batcher in self.batchers.items():
+            stats[kind] = batcher.get_counters()
+
+        return stats
+
+    async def answer(self, request):
+        """
+        This method is used to answer one request.
+        :param request: dict, the decoded request.
+        :return response: dict, the response, with the id of the request.
+        """
+        response = {'id': request.get('id')}
+        kind = request.get('kind')
+        if kind == 'stats':
+            response['stats'] = self.get_stats()
+            return response
+        if kind not in self.batchers:
+            raise ValueError(f"unknown kind '{kind}', expected one of {list(self.batchers) + ['stats']}")
+
+        prediction = await self.batchers[kind].submit(np.asarray(request['landmarks'], dtype=np.float32))
+        response['label'] = self.sign_labels[kind][int(np.argmax(prediction))]
+        response['confidence'] = float(np.max(prediction))
+
+        return response
+
+    async def answer_line(self, line, writer):
+        """
+        This method is used to answer a request line and to write the response line.
+        """
+        request = None
+        try:
+            request = json.loads(line)
+            response = await self.answer(request)
+        except Exception as error:  # a bad request or a failure of the model, the client always gets an answer
+            self.errors += 1
+            response = {'id': request.get('id') if isinstance(request, dict) else None, 'error': str(error)}
+        self.requests += 1
+
+        if not writer.is_closing():
+            writer.write((json.dumps(response) + '\n').encode())
+
+    async def handle_client(self, reader, writer):
+        """
+        This method is used to read the requests of a client. A client can send a request before
+        the response to the previous one, the responses carry the id of their request.
+        """
+        self.clients += 1
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.get_running_loop().create_task(self.answer_line(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                await writer.drain()
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765, unix_socket_path=None):
+        """
+        This method is used to run the server until it is cancelled.
+        :param host: str, the address to listen on, localhost by default.
+        :param port: int, the TCP port.
+        :param unix_socket_path: str, listen on this Unix socket instead of TCP.
+        """
+        for batcher in self.batchers.values():
+            batcher.start()
+
+        if unix_socket_path is not None:
+            server = await asyncio.start_unix_server(self.handle_client, path=unix_socket_path)
+            print(f"Listening on {unix_socket_path}")
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+            print(f"Listening on {host}:{port}")
+
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+
+    base_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..')
+
+    parser = argparse.ArgumentParser(description="Serve sign predictions to many clients with micro-batching.")
+    parser.add_argument("--host", default='127.0.0.1')
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", default=None, help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="how long a batch waits for more samples")
+    parser.add_argument("--backend", default='numpy', help="see SignDetector.INFERENCE_BACKENDS")
+    parser.add_argument("--number-of-hands", type=int, choices=[1, 2], default=1,
+                        help="the number of hands the models were trained on, like NUMBER_OF_HANDS in app.py")
+    parser.add_argument("--static-model",
+                        default=os.path.join(base_dir, "models", "static", "model_static_5_1.h5"))
+    parser.add_argument("--dynamic-model",
+                        default=os.path.join(base_dir, "models", "dynamic", "model_dynamic_2_2.h5"))
+    parser.add_argument("--static-sign-labels",
+                        default=os.path.join(base_dir, "data", "static", "sign_labels", "sign_labels_5.csv"))
+    parser.add_argument("--dynamic-sign-labels",
+                        default=os.path.join(base_dir, "data", "dynamic", "sign_labels", "sign_labels_3.csv"))
+    args = parser.parse_args()
+
+    recognition_server = RecognitionServer(SignDetectorStatic(args.static_model, args.backend,
+                                                              number_of_hands=args.number_of_hands),
+                                           SignDetectorDynamic(args.dynamic_model, args.backend,
+                                                               number_of_hands=args.number_of_hands),
+                                           SignLabelRegistry(args.static_sign_labels, None).get_sign_labels(),
+                                           SignLabelRegistry(args.dynamic_sign_labels, None).get_sign_labels(),
+                                           max_batch_size=args.max_batch_size,
+                                           max_wait=args.max_wait_ms / 1000)
+    try:
+        asyncio.run(recognition_server.serve(args.host, args.port, args.unix_socket))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,162 @@
+import atexit
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+
+class AsyncSampleWriter:
+    """
+    This class is used to write the recorded samples(static CSV rows, dynamic
+    .npy sequences or SequenceStore appends) on a background thread, so saving
+    a sample only puts it in a queue and the frame loop never waits for the disk.
+    The writer thread takes the queued samples in batches: it waits for more
+    samples up to flush_interval seconds after the first one, then it appends
+    all the rows of a CSV file with one open/write and syncs every file once.
+    No sample is dropped, flush() and close() return once everything queued
+    before them is on the disk, close() is also called when Python exits.
+    """
+
+    def __init__(self, max_batch_size=256, flush_interval=0.5) -> None:
+        """
+        Initialize the AsyncSampleWriter object and start the writer thread.
+        :param max_batch_size: int, the maximum number of samples written in one batch.
+        :param flush_interval: float, seconds a batch waits for more samples.
+        """
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+
+        self.queue = queue.Queue()
+        self.closed = False
+        self.samples_written = 0
+        self.batches_written = 0
+
+        self.thread = threading.Thread(target=self.write_loop, name="sample writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def append_csv_row(self, file_path, sign_labels_index, values, on_written=None):
+        """
+        This method is used to queue a row(sign label index, values) for a CSV data set file.
+        :param file_path: str, path to the CSV file.
+        :param sign_labels_index: int, the sign label index, the first value of the row.
+        :param values: np.array or list, the values of the row, copied.
+        :param on_written: function, called by the writer thread once the row is written.
+        """
+        self.put(('csv', file_path, (sign_labels_index, np.array(values, dtype=np.float32)), on_written))
+
+    def save_npy(self, file_path, array, on_written=None):
+        """
+        This method is used to queue an array for a new .npy file.
+        :param file_path: str, path to the .npy file.
+        :param array: np.array, the array, copied.
+        :param on_written: function, called by the writer thread once the file is written.
+        """
+        self.put(('npy', file_path, np.array(array), on_written))
+
+    def append_to_store(self, store, sequence, sign_labels_index, on_written=None):
+        """
+        This method is used to queue a sequence for a SequenceStore.
+        :param store: SequenceStore, the store.
+        :param sequence: np.array, (frames, features) the sequence, copied.
+        :param sign_labels_index: int, the sign label index of the sequence.
+        :param on_written: function, called by the writer thread once the sequence is written.
+        """
+        self.put(('store', store, (np.array(sequence, dtype=np.float32), sign_labels_index), on_written))
+
+    def put(self, item):
+        if self.closed:
+            raise ValueError("Error: The sample writer is closed!")
+        self.queue.put(item)
+
+    def flush(self, timeout=None):
+        """
+        This method is used to wait until every sample queued before the call is written and synced.
+        :param timeout: float, seconds to wait, None to wait forever.
+        :return: bool, True if everything was written before the timeout.
+        """
+        if not self.thread.is_alive():
+            return self.queue.empty()
+
+        done_event = threading.Event()
+        self.queue.put(('flush', None, None, done_event.set))
+
+        return done_event.wait(timeout)
+
+    def close(self):
+        """
+        This method is used to write everything that is queued and stop the writer thread.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(('close', None, None, None))
+        self.thread.join()
+        atexit.unregister(self.close)
+
+    def write_loop(self):
+        """
+        This method is used by the writer thread to take the queued samples in batches and write them.
+        """
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+
+            # collect more samples, a flush or close request ends the batch right away
+            while batch[-1][0] not in {'flush', 'close'} and len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+
+            running = batch[-1][0] != 'close'
+            self.write_batch(batch)
+
+    def write_batch(self, batch):
+        """
+        This method is used to write a batch of samples, grouped by file.
+        :param batch: list, the queued (kind, target, data, on_written) items.
+        """
+        csv_rows = {}
+        store_sequences = {}
+        for kind, target, data, _ in batch:
+            try:
+                if kind == 'csv':
+                    sign_labels_index, values = data
+                    csv_rows.setdefault(target, []).append(
+                        f"{sign_labels_index}," + ','.join(str(value) for value in values) + '\n')
+                elif kind == 'npy':
+                    with open(target, 'wb') as file:
+                        np.save(file, data)
+                        file.flush()
+                        os.fsync(file.fileno())
+                elif kind == 'store':
+                    store_sequences.setdefault(id(target), (target, [], []))
+                    store_sequences[id(target)][1].append(data[0])
+                    store_sequences[id(target)][2].append(data[1])
+            except OSError as error:
+                print(f"Error: Could not write '{target}': {error}")
+
+        for file_path, rows in csv_rows.items():
+            try:
+                with open(file_path, 'a') as file:
+                    file.write(''.join(rows))
+                    file.flush()
+                    os.fsync(file.fileno())
+            except OSError as error:
+                print(f"Error: Could not write '{file_path}': {error}")
+
+        for store, sequences, labels in store_sequences.values():
+            try:
+                store.append_many(np.array(sequences), labels)  # synced by the store
+            except OSError as error:
+                print(f"Error: Could not write '{store.store_path}': {error}")
+
+        for kind, _, _, on_written in batch:
+            if kind in {'csv', 'npy', 'store'}:
+                self.samples_written += 1
+            if on_written is not None:
+                on_written()
+        self.batches_written += 1
@@ -1,7 +1,238 @@
+import os
+import threading
+import time
 import numpy as np
 
-from keras.models import load_model
 from abc import ABC, abstractmethod
+from NumpyModel import NumpyModel, export_keras_model_to_npz
+from SignSession import SequenceState
+
+
+def load_keras_model(model_weights_path):
+    """
+    This function is used to load a keras model.
+    Keras is imported here, so that TensorFlow is only loaded by the backends that need it.
+    :param model_weights_path: str, the path to the model weights file(.h5).
+    :return model: keras.engine.functional.Functional, the loaded model.
+    """
+    from keras.models import load_model
+
+    return load_model(model_weights_path)
+
+
+class InferenceBackend(ABC):
+    """
+    This class is used as a common interface for the different ways a trained
+    model can be run. Every backend takes a float32 batch and returns the
+    prediction of the model for each sample as a np.array.
+    """
+
+    @abstractmethod
+    def predict(self, x):
+        """
+        This method is used to run the model on a batch of samples.
+        :param x: np.array, float32 batch of samples.
+        :return prediction: np.array, the prediction for each sample.
+        """
+        pass
+
+
+class KerasPredictBackend(InferenceBackend):
+    """
+    This class is an extension of the InferenceBackend class.
+    It uses model.predict, which has a high per call overhead for a single sample.
+    """
+
+    def __init__(self, model_weights_path) -> None:
+        self.model = load_keras_model(model_weights_path)
+
+    def predict(self, x):
+        return self.model.predict(x, verbose=0)
+
+
+class KerasCallBackend(InferenceBackend):
+    """
+    This class is an extension of the InferenceBackend class.
+    It calls the model directly(eager mode), skipping the predict loop.
+    """
+
+    def __init__(self, model_weights_path) -> None:
+        self.model = load_keras_model(model_weights_path)
+
+    def predict(self, x):
+        return np.asarray(self.model(x, training=False))
+
+
+class TfFunctionBackend(InferenceBackend):
+    """
+    This class is an extension of the InferenceBackend class.
+    It runs the model as a tf.function traced once with a fixed input signature,
+    so every call runs the compiled graph without retracing.
+    """
+
+    def __init__(self, model_weights_path) -> None:
+        import tensorflow as tf
+
+        self.model = load_keras_model(model_weights_path)
+        input_signature = [tf.TensorSpec((None,) + tuple(self.model.input_shape[1:]), tf.float32)]
+        self.function = tf.function(lambda x: self.model(x, training=False),
+                                    input_signature=input_signature)
+        # trace the function now, not on the first frame
+        self.function(tf.zeros((1,) + tuple(self.model.input_shape[1:]), tf.float32))
+
+    def predict(self, x):
+        return self.function(x).numpy()
+
+
+class TFLiteBackend(InferenceBackend):
+    """
+    This class is an extension of the InferenceBackend class.
+    It runs the model with the TFLite interpreter. The .h5 model is converted
+    to a .tflite file next to it the first time(or when the .h5 file is newer).
+    """
+
+    def __init__(self, model_weights_path, num_threads=1) -> None:
+        """
+        Initialize the TFLiteBackend object.
+        :param model_weights_path: str, the path to the model weights file(.h5).
+        :param num_threads: int, the number of threads used by the interpreter.
+        """
+        self.tflite_model_path = os.path.splitext(model_weights_path)[0] + ".tflite"
+        if not os.path.isfile(self.tflite_model_path) or \
+                os.path.getmtime(self.tflite_model_path) < os.path.getmtime(model_weights_path):
+            self.convert_model(model_weights_path, self.tflite_model_path)
+
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        self.interpreter = Interpreter(model_path=self.tflite_model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self.input_shape = tuple(self.interpreter.get_input_details()[0]['shape'])
+
+    @staticmethod
+    def convert_model(model_weights_path, tflite_model_path):
+        """
+        This method is used to convert a keras .h5 model to a .tflite model.
+        :param model_weights_path: str, the path to the model weights file(.h5).
+        :param tflite_model_path: str, where the .tflite model is saved.
+        """
+        import tensorflow as tf
+
+        converter = tf.lite.TFLiteConverter.from_keras_model(load_keras_model(model_weights_path))
+        # the GRU layers may need TensorFlow ops that have no TFLite builtin
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS,
+                                               tf.lite.OpsSet.SELECT_TF_OPS]
+        with open(tflite_model_path, 'wb') as file:
+            file.write(converter.convert())
+
+    def predict(self, x):
+        if x.shape != self.input_shape:
+            self.interpreter.resize_tensor_input(self.input_index, x.shape)
+            self.interpreter.allocate_tensors()
+            self.input_shape = x.shape
+        self.interpreter.set_tensor(self.input_index, x)
+        self.interpreter.invoke()
+
+        return self.interpreter.get_tensor(self.output_index).copy()
+
+
+class NumpyBackend(InferenceBackend):
+    """
+    This class is an extension of the InferenceBackend class.
+    It runs the model with NumpyModel, so neither keras nor TensorFlow are imported.
+    The weights are read from the .npz file next to the .h5 file, which is exported
+    the first time(or when the .h5 file is newer); a .npz file without its .h5 file is also fine.
+    """
+
+    def __init__(self, model_weights_path) -> None:
+        npz_path = os.path.splitext(model_weights_path)[0] + ".npz"
+        if os.path.isfile(model_weights_path) and (not os.path.isfile(npz_path) or
+                                                   os.path.getmtime(npz_path) < os.path.getmtime(model_weights_path)):
+            export_keras_model_to_npz(model_weights_path, npz_path)
+
+        self.model = NumpyModel(npz_path)
+
+    def predict(self, x):
+        return self.model.predict(x)
+
+
+class KnnBackend(InferenceBackend):
+    """
+    This class is an extension of the InferenceBackend class.
+    It is used for the static signs only: instead of a trained model, the samples are
+    classified by their nearest samples in the static data set(see KnnIndex), so a new
+    sign can be used as soon as its samples are recorded. The index is built next to
+    the data set file the first time(or when the data set file is newer).
+    """
+
+    def __init__(self, model_weights_path, k=5, use_kdtree=False, number_of_features=21 * 2) -> None:
+        """
+        Initialize the KnnBackend object.
+        :param model_weights_path: str, the path to the static data set file(.csv) or to a saved index(.knn.npz).
+        :param k: int, the number of neighbours that vote.
+        :param use_kdtree: bool, search with a KD-tree(scipy) instead of the matrix product.
+        :param number_of_features: int, the number of values in a sample, 84 for two hands.
+        """
+        from KnnIndex import KnnIndex, get_index_path
+
+        index_path = model_weights_path
+        if not model_weights_path.endswith(".npz"):
+            index_path = get_index_path(model_weights_path)
+            # built again when the data set file is newer or the index is of another number of hands
+            if not os.path.isfile(index_path) or \
+                    os.path.getmtime(index_path) < os.path.getmtime(model_weights_path) or \
+                    np.load(index_path)['features'].shape[1] != number_of_features:
+                KnnIndex.build_from_data_set(model_weights_path, k,
+                                             number_of_features=number_of_features).save(index_path)
+
+        self.index = KnnIndex.load(index_path, use_kdtree)
+        if self.index.features.shape[1] != number_of_features:
+            raise ValueError(f"Error: The index '{index_path}' has {self.index.features.shape[1]} features, "
+                             f"expected {number_of_features}")
+        self.index.k = k
+
+    def predict(self, x):
+        return self.index.predict(x)
+
+    def add_sample(self, normalized_landmarks, sign_label_index):
+        """
+        This method is used to add a recorded sample to the index, see DataManipulatorStatic.sample_listeners.
+        """
+        self.index.add_sample(normalized_landmarks, sign_label_index)
+
+
+INFERENCE_BACKENDS = {
+    'predict': KerasPredictBackend,
+    'call': KerasCallBackend,
+    'tf_function': TfFunctionBackend,
+    'tflite': TFLiteBackend,
+    'numpy': NumpyBackend,
+    'knn': KnnBackend,
+}
+
+
+def create_inference_backend(backend, model_weights_path, number_of_features=21 * 2):
+    """
+    This function is used to create an inference backend by name.
+    :param backend: str, one of the INFERENCE_BACKENDS keys.
+    :param model_weights_path: str, the path to the model weights file(.h5).
+    :param number_of_features: int, the number of values in a sample, only used by the 'knn' backend(the
+    models know their input size).
+    :return: InferenceBackend, the backend that runs the model.
+    """
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Error: Unknown inference backend '{backend}', "
+                         f"expected one of {list(INFERENCE_BACKENDS)}")
+
+    if backend == 'knn':
+        return KnnBackend(model_weights_path, number_of_features=number_of_features)
+
+    return INFERENCE_BACKENDS[backend](model_weights_path)
 
 
 class SignDetector(ABC):
@@ -9,18 +240,32 @@ class SignDetector(ABC):
     This class is used to initialize the model for sign detection.
     """
 
-    def __init__(self, model_weights_path) -> None:
+    def __init__(self, model_weights_path, backend='tf_function', number_of_hands=1) -> None:
         """
         Initialize the SignDetector object.
-            - model: keras.engine.functional.Functional, the model used for sign detection.
+            - backend: InferenceBackend, runs the model used for sign detection.
         :param model_weights_path: str, the path to the model weights file.
+        :param backend: str, the name of the inference backend, see INFERENCE_BACKENDS.
+        :param number_of_hands: int, 1 for the models of one hand(42 values), 2 for the models of the
+        (2, 21, 2) hand tensor(84 values), see DataManipulator.convert_detected_hands_to_tensor.
         """
-        self.model = load_model(model_weights_path)
+        self.number_of_hands = number_of_hands
+        self.number_of_features = number_of_hands * 21 * 2
+        self.backend = create_inference_backend(backend, model_weights_path, self.number_of_features)
 
     @abstractmethod
     def make_prediction(self, landmark_list, dm):
         pass
 
+    def make_batch_prediction(self, x):
+        """
+        This method is used to run the model once on a batch of samples, e.g. of many clients.
+        :param x: np.array, (batch, number_of_features) landmarks for static signs or
+        (batch, 30, number_of_features) sequences for dynamic signs.
+        :return prediction: np.array, (batch, number of sign labels) the prediction for each sample.
+        """
+        return self.backend.predict(np.asarray(x, dtype=np.float32))
+
     @abstractmethod
     def get_label_and_prediction(self, landmark_list, dm):
         pass
@@ -32,12 +277,14 @@ class SignDetectorStatic(SignDetector):
     It is used to predict static signs.
     """
 
-    def __init__(self, model_weights_path) -> None:
+    def __init__(self, model_weights_path, backend='tf_function', number_of_hands=1) -> None:
         """
         Initialize the SignDetectorStatic object.
         :param model_weights_path: str, path to the static model weights file(.h5).
+        :param backend: str, the name of the inference backend, see INFERENCE_BACKENDS.
+        :param number_of_hands: int, 1 or 2, the number of hands the model was trained on.
         """
-        super(SignDetectorStatic, self).__init__(model_weights_path)
+        super(SignDetectorStatic, self).__init__(model_weights_path, backend, number_of_hands)
 
     def make_prediction(self, landmark_list, dm):
         """
@@ -47,8 +294,7 @@ class SignDetectorStatic(SignDetector):
         :param dm: DataManipulator, Static or Dynamic.
         :return prediction: np.array, the prediction made by the model.
         """
-        dm.get_sign_labels()
-        return self.model.predict(np.array([landmark_list]))
+        return self.backend.predict(np.asarray(landmark_list, dtype=np.float32)[np.newaxis])
 
     def get_label_and_prediction(self, landmark_list, dm):
         """
@@ -64,19 +310,309 @@ class SignDetectorStatic(SignDetector):
         return label, confidence
 
 
+class LazySignDetector:
+    """
+    This class is used to create a sign detector(and load its model) only when it is
+    needed, on a background thread, so the application does not wait for the models
+    at startup. The loading starts with start_loading(), e.g. when the detect mode is
+    entered or after the first frame is displayed, or with the first prediction.
+    Until the sign detector is loaded, get_label_and_prediction returns None, None.
+    """
+
+    def __init__(self, create_sign_detector, name="sign detector") -> None:
+        """
+        Initialize the LazySignDetector object, nothing is loaded.
+        :param create_sign_detector: function, creates the SignDetector, called on the loading thread.
+        :param name: str, the name of the sign detector in the error messages.
+        """
+        self.create_sign_detector = create_sign_detector
+        self.name = name
+
+        self.loaded_sign_detector = None
+        self.loaded_callbacks = []
+        self.load_seconds = None
+        self.error = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    @property
+    def is_ready(self):
+        return self.loaded_sign_detector is not None
+
+    def start_loading(self):
+        """
+        This method is used to start loading the sign detector, if it was not started yet.
+        """
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.load, name=f"load {self.name}", daemon=True)
+                self.thread.start()
+
+    def load(self):
+        """
+        This method is used by the loading thread to create the sign detector.
+        """
+        start_time = time.perf_counter()
+        try:
+            sign_detector = self.create_sign_detector()
+        except Exception as error:
+            print(f"Error: Could not load the {self.name}: {error}")
+            self.error = error
+            return
+        self.load_seconds = time.perf_counter() - start_time
+
+        with self.lock:
+            self.loaded_sign_detector = sign_detector
+            loaded_callbacks = self.loaded_callbacks
+            self.loaded_callbacks = []
+        for callback in loaded_callbacks:
+            callback(sign_detector)
+
+    def wait(self, timeout=None):
+        """
+        This method is used to load the sign detector and wait for it.
+        :param timeout: float, seconds to wait, None to wait forever.
+        :return: bool, True if the sign detector is loaded.
+        """
+        self.start_loading()
+        self.thread.join(timeout)
+
+        return self.is_ready
+
+    def on_loaded(self, callback):
+        """
+        This method is used to run a function with the sign detector once it is loaded(right away if it is).
+        :param callback: function, gets the loaded SignDetector.
+        """
+        with self.lock:
+            if self.loaded_sign_detector is None:
+                self.loaded_callbacks.append(callback)
+                return
+        callback(self.loaded_sign_detector)
+
+    def get_label_and_prediction(self, landmark_list, dm, *args):
+        """
+        This method is used to get the prediction and the label of the sign, once the sign detector is loaded.
+        :param landmark_list: list, the normalized landmarks of the hands.
+        :param dm: DataManipulator, Static or Dynamic.
+        :param args: the other arguments of the sign detector, e.g. the SequenceState of a signer.
+        :return: label, prediction: detected sign label and the accuracy of the prediction, None, None
+        while the sign detector is loading.
+        """
+        sign_detector = self.loaded_sign_detector
+        if sign_detector is None:
+            self.start_loading()
+            return None, None
+
+        return sign_detector.get_label_and_prediction(landmark_list, dm, *args)
+
+
+def get_lazy_sign_detector(sign_detector):
+    """
+    :param sign_detector: SignDetector, LazySignDetector or MotionGatedSignDetector.
+    :return: LazySignDetector, the lazy sign detector(also behind a motion gate) or None.
+    """
+    sign_detector = getattr(sign_detector, 'sign_detector', sign_detector)
+
+    return sign_detector if isinstance(sign_detector, LazySignDetector) else None
+
+
+class MotionGatedSignDetector:
+    """
+    This class is used to skip the static classifier while the hand does not move.
+    It sits in front of a SignDetectorStatic: the new normalized landmarks are
+    compared with the last classified ones and, if no value changed by more than
+    threshold, the cached label and confidence are returned without running the model.
+    The landmarks are relative to the wrist, so moving the whole hand without
+    changing its shape does not run the model either.
+    It has the following counters:
+        - hits: int, the predictions answered from the cache
+        - misses: int, the predictions that ran the classifier
+        - classifier_seconds: float, the time spent in the classifier
+    """
+
+    def __init__(self, sign_detector, threshold=0.01, max_cached_frames=30, number_of_hands=1) -> None:
+        """
+        Initialize the MotionGatedSignDetector object.
+        :param sign_detector: SignDetectorStatic or LazySignDetector, the gated sign detector.
+        :param threshold: float, the largest change of a normalized landmark value that reuses the cache.
+        :param max_cached_frames: int, the classifier is run again after this many cached frames.
+        :param number_of_hands: int, 1 or 2, the number of hands of the landmarks(42 or 84 values).
+        """
+        self.sign_detector = sign_detector
+        self.threshold = threshold
+        self.max_cached_frames = max_cached_frames
+
+        self.last_landmarks = np.zeros(number_of_hands * 21 * 2, dtype=np.float32)
+        self.difference = np.zeros(number_of_hands * 21 * 2, dtype=np.float32)
+        self.label = None
+        self.confidence = None
+        self.cached_frames = 0
+        self.stale = False  # set by reset, the next prediction runs the classifier
+
+        self.hits = 0
+        self.misses = 0
+        self.classifier_seconds = 0.0
+
+    def reset(self):
+        """
+        This method is used to forget the cached prediction, e.g. when the hand was lost, the mode was
+        changed or a sample was added to the classifier. It may be called by another thread than the
+        predictions, a classification running meanwhile is not cached.
+        """
+        self.stale = True
+
+    def is_stationary(self, landmarks):
+        """
+        :param landmarks: np.array, (42,) or (84,) the normalized landmarks.
+        :return: bool, True if no landmark value moved more than threshold since the last classification.
+        """
+        np.subtract(landmarks, self.last_landmarks, out=self.difference)
+        np.abs(self.difference, out=self.difference)
+
+        return self.difference.max() < self.threshold
+
+    def get_label_and_prediction(self, landmark_list, dm):
+        """
+        This method is used to get the prediction and the label of the sign, from the cache if the hand
+        did not move.
+        :param landmark_list: list, the normalized landmarks of the hands.
+        :param dm: DataManipulator, Static.
+        :return: label, prediction: detected sign label and the accuracy of the prediction.
+        """
+        landmarks = np.asarray(landmark_list, dtype=np.float32)
+
+        if self.label is not None and not self.stale and self.cached_frames < self.max_cached_frames and \
+                self.is_stationary(landmarks):
+            self.hits += 1
+            self.cached_frames += 1
+            return self.label, self.confidence
+
+        self.stale = False  # cleared before the classifier runs, a reset from now on is not lost
+        start_time = time.perf_counter()
+        self.label, self.confidence = self.sign_detector.get_label_and_prediction(landmarks, dm)
+        self.classifier_seconds += time.perf_counter() - start_time
+        self.misses += 1
+        self.cached_frames = 0
+        np.copyto(self.last_landmarks, landmarks)
+
+        return self.label, self.confidence
+
+    @property
+    def hit_rate(self):
+        calls = self.hits + self.misses
+        return self.hits / calls if calls != 0 else 0.0
+
+    @property
+    def seconds_saved(self):
+        # the cached frames did not pay for a classifier call, of the average measured time
+        return self.hits * self.classifier_seconds / self.misses if self.misses != 0 else 0.0
+
+    def get_counters(self):
+        """
+        :return: dict, the cache counters, the hit rate and the classifier time saved.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'classifier_seconds': self.classifier_seconds,
+            'seconds_saved': self.seconds_saved
+        }
+
+
 class SignDetectorDynamic(SignDetector):
     """
     This class is an extension of the SignDetector class.
-    It is used to predict dynamic signs.
+    It is used to predict dynamic signs from the last number_of_frames frames.
+    The frames are kept in a fixed NumPy ring buffer. It has two modes:
+        - window mode: the whole window is run through the model every prediction_stride frames
+        - streaming mode('numpy' backend only): the GRU hidden states are carried from frame to
+          frame, so each new frame costs one timestep. To keep the predictions equal to the
+          window mode, number_of_frames / prediction_stride staggered sequences(lanes) are run
+          as one batch, each lane is reset after number_of_frames frames and then predicts.
+    Between two predictions, the last label and confidence are returned.
+    The frames are kept in a SequenceState: the detector has its own, for one signer, and
+    many signers can share the detector(and its model) with one SequenceState each.
     """
 
-    def __init__(self, model_weights_path) -> None:
+    def __init__(self, model_weights_path, backend='tf_function',
+                 streaming=False, prediction_stride=1, number_of_frames=30, number_of_hands=1) -> None:
         """
         Initialize the SignDetectorDynamic object.
         :param model_weights_path: str, path to the dynamic model weights file(.h5).
+        :param backend: str, the name of the inference backend, see INFERENCE_BACKENDS.
+        :param streaming: bool, carry the GRU hidden states instead of re-running the whole window.
+        :param prediction_stride: int, make a prediction every prediction_stride frames.
+        :param number_of_frames: int, the number of frames in a sequence.
+        :param number_of_hands: int, 1 or 2, the number of hands the model was trained on.
+        """
+        super(SignDetectorDynamic, self).__init__(model_weights_path, backend, number_of_hands)
+        self.streaming = streaming
+        self.prediction_stride = prediction_stride
+        self.number_of_frames = number_of_frames
+
+        if streaming:
+            if not isinstance(self.backend, NumpyBackend):
+                raise ValueError("Error: The streaming mode needs the 'numpy' inference backend!")
+            if number_of_frames % prediction_stride != 0:
+                raise ValueError(f"Error: The prediction stride must divide {number_of_frames} in streaming mode!")
+            self.number_of_lanes = number_of_frames // prediction_stride
+
+        self.sequence_state = self.create_sequence_state()
+
+    def create_sequence_state(self):
+        """
+        This method is used to create the frames of a new signer.
+        :return sequence_state: SequenceState, an empty sequence.
+        """
+        # every frame is written twice, so the last number_of_frames frames are always
+        # available as one contiguous view of the buffer, oldest frame first
+        sequence_state = SequenceState(np.zeros((2 * self.number_of_frames, self.number_of_features),
+                                                dtype=np.float32))
+        self.reset_sequence(sequence_state)
+
+        return sequence_state
+
+    def reset_sequence(self, sequence_state=None):
+        """
+        This method is used to forget the collected frames, e.g. when the hand is lost.
+        :param sequence_state: SequenceState, the frames of a signer, the ones of the detector by default.
+        """
+        if sequence_state is None:
+            sequence_state = self.sequence_state
+        sequence_state.frames_seen = 0
+        sequence_state.label = sequence_state.confidence = None
+
+        if self.streaming:
+            sequence_state.lane_states = self.backend.model.initial_states(self.number_of_lanes)
+            # lane j starts with frame j * prediction_stride
+            sequence_state.lane_ages = -np.arange(self.number_of_lanes) * self.prediction_stride
+
+    def add_frame(self, landmark_list, sequence_state=None):
+        """
+        This method is used to add the landmarks of a frame to the ring buffer.
+        :param landmark_list: list, the normalized landmarks of the hands.
+        :param sequence_state: SequenceState, the frames of a signer, the ones of the detector by default.
+        """
+        if sequence_state is None:
+            sequence_state = self.sequence_state
+        sequence_buffer = sequence_state.sequence_buffer
+        index = sequence_state.frames_seen % self.number_of_frames
+        sequence_buffer[index] = landmark_list
+        sequence_buffer[index + self.number_of_frames] = sequence_buffer[index]
+        sequence_state.frames_seen += 1
+
+    def get_sequence(self, sequence_state=None):
+        """
+        :param sequence_state: SequenceState, the frames of a signer, the ones of the detector by default.
+        :return sequence: np.array, (number_of_frames, number_of_features) view of the last frames, oldest first.
         """
-        self.real_time_sequence = []  # TODO, does this need to be reset ?
-        super(SignDetectorDynamic, self).__init__(model_weights_path)
+        if sequence_state is None:
+            sequence_state = self.sequence_state
+        start = sequence_state.frames_seen % self.number_of_frames
+
+        return sequence_state.sequence_buffer[start:start + self.number_of_frames]
 
     def make_prediction(self, landmark_list, dm):
         """
@@ -86,23 +622,59 @@ class SignDetectorDynamic(SignDetector):
         :param dm: DataManipulator, Static or Dynamic.
         :return prediction: np.array, the prediction made by the model.
         """
-        dm.get_sign_labels()
-        return self.model.predict(np.array([landmark_list]))
+        return self.backend.predict(np.asarray(landmark_list, dtype=np.float32)[np.newaxis])
 
-    def get_label_and_prediction(self, landmark_list, dm):
+    def make_streaming_prediction(self, landmarks, dm, sequence_state=None):
+        """
+        This method is used to run one timestep of every lane.
+        :param landmarks: np.array, (number_of_features,) the normalized landmarks of the newest frame.
+        :param dm: DataManipulator, Dynamic.
+        :param sequence_state: SequenceState, the frames of a signer, the ones of the detector by default.
+        :return prediction: np.array, the prediction of the lane that completed a window or None.
+        """
+        if sequence_state is None:
+            sequence_state = self.sequence_state
+        model = self.backend.model
+        lane_states = sequence_state.lane_states = model.step(landmarks[np.newaxis], sequence_state.lane_states)
+        lane_ages = sequence_state.lane_ages
+        lane_ages += 1
+
+        # lanes that did not start yet stay at the zero state
+        waiting_lanes = lane_ages <= 0
+        for state in lane_states:
+            state[waiting_lanes] = 0
+
+        prediction = None
+        completed_lanes = np.flatnonzero(lane_ages == self.number_of_frames)
+        if len(completed_lanes) != 0:
+            prediction = model.predict_from_state(lane_states[-1][completed_lanes])
+            for state in lane_states:
+                state[completed_lanes] = 0
+            lane_ages[completed_lanes] = 0
+
+        return prediction
+
+    def get_label_and_prediction(self, landmark_list, dm, sequence_state=None):
         """
         This method is used to get the prediction and the label of the sign.
         :param landmark_list: list, the normalized landmarks of the hands.
         :param dm: DataManipulator, Dynamic.
+        :param sequence_state: SequenceState, the frames of a signer, the ones of the detector by default.
         :return: label, prediction: detected sign label and the accuracy of the prediction.
         """
-        self.real_time_sequence.append(landmark_list)
-        self.real_time_sequence = self.real_time_sequence[-30:]
-        label = confidence = None
+        if sequence_state is None:
+            sequence_state = self.sequence_state
+        self.add_frame(landmark_list, sequence_state)
+        prediction = None
 
-        if len(self.real_time_sequence) == 30:
-            prediction = self.make_prediction(self.real_time_sequence, dm)
-            label = dm.sign_labels[np.argmax(prediction)]
-            confidence = np.max(prediction)
+        if self.streaming:
+            prediction = self.make_streaming_prediction(self.get_sequence(sequence_state)[-1], dm, sequence_state)
+        elif sequence_state.frames_seen >= self.number_of_frames and \
+                (sequence_state.frames_seen - self.number_of_frames) % self.prediction_stride == 0:
+            prediction = self.make_prediction(self.get_sequence(sequence_state), dm)
 
-        return label, confidence
+        if prediction is not None:
+            sequence_state.label = dm.sign_labels[np.argmax(prediction)]
+            sequence_state.confidence = np.max(prediction)
+
+        return sequence_state.label, sequence_state.confidence
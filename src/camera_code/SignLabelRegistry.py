@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+
+
+class SignLabelRegistry:
+    """
+    This class is used to keep the sign labels and the number of saved samples
+    of each sign label in memory, so the GUI can show them on every frame
+    without reading the files again:
+        - the sign labels file is read once
+        - the samples are counted once, on first use, by the data manipulator
+        - every saved sample increments its count, a sample queued on a background
+          writer is counted right away and reported with sample_written() once written
+        - optionally, the files are checked for changes made outside the
+          application at most once every watch_interval seconds
+    """
+
+    def __init__(self, sign_labels_file_path, count_samples, get_watched_paths=None, watch_interval=None) -> None:
+        """
+        Initialize the SignLabelRegistry object, the sign labels are read.
+        :param sign_labels_file_path: str, path to the sign labels file.
+        :param count_samples: function, gets the sign labels and returns the list with the
+        number of saved samples of each sign label.
+        :param get_watched_paths: function, returns the paths of the data set files/directories
+        that change when samples are saved, None to watch only the sign labels file.
+        :param watch_interval: float, seconds between two checks for changes, None to never check.
+        """
+        self.sign_labels_file_path = sign_labels_file_path
+        self.count_samples = count_samples
+        self.get_watched_paths = get_watched_paths
+        self.watch_interval = watch_interval
+
+        self.sign_labels = []
+        self.sign_labels_counted = None  # counted on first use
+        self.file_stats = None
+        self.next_check_time = 0.0
+
+        # samples counted but not written yet, the files are not checked while there are any
+        self.pending_samples = 0
+        self.lock = threading.Lock()
+
+        self.read_sign_labels()
+
+    def read_sign_labels(self):
+        """
+        This method is used to read the sign labels from the CSV file.
+        """
+        # check if file exists
+        try:
+            with open(self.sign_labels_file_path, 'r') as file:
+                self.sign_labels = file.read().splitlines()
+
+        except FileNotFoundError:
+            print(f"Error: File '{self.sign_labels_file_path}' not found!")
+            exit(1)  # FIXME: maybe handle this better ?
+
+    def get_file_stats(self):
+        """
+        :return: list, the (modification time, size) of every watched path, None for a missing path.
+        """
+        paths = [self.sign_labels_file_path]
+        if self.get_watched_paths is not None:
+            paths += self.get_watched_paths()
+
+        file_stats = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                file_stats.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                file_stats.append(None)
+
+        return file_stats
+
+    def check_for_changes(self):
+        """
+        This method is used to reload the sign labels and to count the samples again if the
+        files were changed outside the application, at most once every watch_interval seconds.
+        :return: bool, True if the registry was reloaded.
+        """
+        if self.watch_interval is None or time.monotonic() < self.next_check_time:
+            return False
+        self.next_check_time = time.monotonic() + self.watch_interval
+
+        with self.lock:
+            if self.pending_samples != 0:
+                return False
+
+            file_stats = self.get_file_stats()
+            if self.file_stats is None or file_stats == self.file_stats:
+                self.file_stats = file_stats
+                return False
+
+            self.read_sign_labels()
+            self.sign_labels_counted = None
+            self.file_stats = file_stats
+
+        return True
+
+    def get_sign_labels(self):
+        """
+        :return sign_labels: list, the sign labels.
+        """
+        self.check_for_changes()
+
+        return self.sign_labels
+
+    def get_sign_labels_counted(self):
+        """
+        :return sign_labels_counted: list, the number of saved samples of each sign label.
+        """
+        self.check_for_changes()
+        if self.sign_labels_counted is None:
+            self.sign_labels_counted = self.count_samples(self.sign_labels)
+
+        return self.sign_labels_counted
+
+    def add_sample(self, sign_labels_index, written=True):
+        """
+        This method is used to count a sample saved by the application.
+        :param sign_labels_index: int, the index of the sign label of the sample.
+        :param written: bool, False if the sample is queued and sample_written() is called later.
+        """
+        with self.lock:
+            if self.sign_labels_counted is not None:
+                self.sign_labels_counted[sign_labels_index] += 1
+            if not written:
+                self.pending_samples += 1
+            elif self.watch_interval is not None:
+                # the files were changed by the application, this is not a change to reload for
+                self.file_stats = self.get_file_stats()
+
+    def sample_written(self):
+        """
+        This method is called(by the writer thread) when a queued sample was written.
+        """
+        with self.lock:
+            self.pending_samples -= 1
+            if self.pending_samples == 0 and self.watch_interval is not None:
+                self.file_stats = self.get_file_stats()
@@ -0,0 +1,167 @@
+import time
+
+from collections import OrderedDict
+from PredictionStabilizer import PredictionStabilizer
+
+
+class SequenceState:
+    """
+    This class is used to keep the frames of one signer for the dynamic signs: the ring
+    buffer of SignDetectorDynamic, the GRU states of the streaming mode and the last
+    label and confidence. It is created by SignDetectorDynamic.create_sequence_state,
+    so one SignDetectorDynamic(and its model) can be shared by many signers.
+    """
+
+    __slots__ = ('sequence_buffer', 'frames_seen', 'label', 'confidence', 'lane_states', 'lane_ages')
+
+    def __init__(self, sequence_buffer) -> None:
+        """
+        Initialize the SequenceState object.
+        :param sequence_buffer: np.array, (2 * number_of_frames, 42) the ring buffer.
+        """
+        self.sequence_buffer = sequence_buffer
+        self.frames_seen = 0
+        self.label = None
+        self.confidence = None
+        self.lane_states = None
+        self.lane_ages = None
+
+
+class SentenceState:
+    """
+    This class is used to keep the word and the sentence of one signer for the sentence mode.
+    ApplicationMode reads and writes them through its WORD, SENTENCE, ... attributes.
+    """
+
+    __slots__ = ('word', 'sentence', 'sentence_move_index', 'insert_deadline', 'frame_time')
+
+    def __init__(self) -> None:
+        self.word = ""
+        self.sentence = ""
+        self.sentence_move_index = -1
+        self.insert_deadline = 0.0  # time.monotonic() time of the next possible insertion
+        self.frame_time = 0.0  # the time of the frame given to create_word/create_sentence
+
+
+class SignSession:
+    """
+    This class is used to keep everything that belongs to one signer: the dynamic
+    sequence, the stabilizer of the predictions and the sentence. The sign detectors,
+    the models and ApplicationMode are shared by all the sessions.
+    """
+
+    __slots__ = ('session_id', 'sequence', 'stabilizer', 'sentence', 'last_seen')
+
+    def __init__(self, session_id, sequence, stabilizer=None, timestamp=None) -> None:
+        """
+        Initialize the SignSession object.
+        :param session_id: hashable, the id of the signer(e.g. of the client or of the camera).
+        :param sequence: SequenceState, see SignDetectorDynamic.create_sequence_state, None without dynamic signs.
+        :param stabilizer: PredictionStabilizer, the stabilizer of the predictions, None to not stabilize them.
+        :param timestamp: float, the time.monotonic() time the session is created.
+        """
+        self.session_id = session_id
+        self.sequence = sequence
+        self.stabilizer = stabilizer
+        self.sentence = SentenceState()
+        self.last_seen = time.monotonic() if timestamp is None else timestamp
+
+
+class SessionManager:
+    """
+    This class is used to keep the sessions of many concurrent signers with a bounded memory:
+        - LRU: when there are max_sessions sessions, the least recently used one is evicted
+        - idle timeout: the sessions not used for idle_timeout seconds are evicted
+    A session is created the first time its id is used, a signer that comes back after
+    being evicted starts with a new session.
+    """
+
+    def __init__(self, sign_detector_dynamic=None, max_sessions=10000, idle_timeout=60.0,
+                 stabilize=True) -> None:
+        """
+        Initialize the SessionManager object.
+        :param sign_detector_dynamic: SignDetectorDynamic, creates the sequence of every session, None to not keep one.
+        :param max_sessions: int, the maximum number of sessions.
+        :param idle_timeout: float, seconds after which an unused session is evicted, None to never evict.
+        :param stabilize: bool, give every session a PredictionStabilizer.
+        """
+        self.sign_detector_dynamic = sign_detector_dynamic
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.stabilize = stabilize
+
+        self.sessions = OrderedDict()  # least recently used first
+
+        # counters
+        self.sessions_created = 0
+        self.sessions_evicted = 0
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def create_session(self, session_id, timestamp):
+        sequence = None
+        if self.sign_detector_dynamic is not None:
+            sequence = self.sign_detector_dynamic.create_sequence_state()
+        stabilizer = PredictionStabilizer() if self.stabilize else None
+        self.sessions_created += 1
+
+        return SignSession(session_id, sequence, stabilizer, timestamp)
+
+    def get_session(self, session_id, timestamp=None):
+        """
+        This method is used to get the session of a signer, it is created if needed.
+        :param session_id: hashable, the id of the signer.
+        :param timestamp: float, the time of the request in seconds, time.monotonic() by default.
+        :return session: SignSession, the session of the signer.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        session = self.sessions.get(session_id)
+        if session is None:
+            self.evict_idle_sessions(timestamp)
+            while len(self.sessions) >= self.max_sessions:
+                self.sessions.popitem(last=False)
+                self.sessions_evicted += 1
+            session = self.sessions[session_id] = self.create_session(session_id, timestamp)
+        else:
+            self.sessions.move_to_end(session_id)
+        session.last_seen = timestamp
+
+        return session
+
+    def evict_idle_sessions(self, timestamp=None):
+        """
+        This method is used to evict the sessions not used for idle_timeout seconds.
+        :param timestamp: float, the current time in seconds, time.monotonic() by default.
+        :return: int, the number of evicted sessions.
+        """
+        if self.idle_timeout is None:
+            return 0
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        # the sessions are in the order they were used, the idle ones are at the start
+        evicted = 0
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if timestamp - session.last_seen < self.idle_timeout:
+                break
+            self.sessions.popitem(last=False)
+            evicted += 1
+        self.sessions_evicted += evicted
+
+        return evicted
+
+    def remove_session(self, session_id):
+        """
+        This method is used to forget the session of a signer who left.
+        :param session_id: hashable, the id of the signer.
+        """
+        if self.sessions.pop(session_id, None) is not None:
+            self.sessions_evicted += 1
+
+    def get_counters(self):
+        return {'sessions': len(self.sessions), 'sessions_created': self.sessions_created,
+                'sessions_evicted': self.sessions_evicted}
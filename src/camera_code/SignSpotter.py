@@ -0,0 +1,368 @@
+import time
+import numpy as np
+
+from collections import deque
+from SignDetector import get_lazy_sign_detector
+
+
+class SpottedSign:
+    """
+    This class is used to describe one sign found in the stream by the SignSpotter.
+    """
+
+    __slots__ = ('label', 'confidence', 'start_time', 'end_time', 'number_of_frames')
+
+    def __init__(self, label, confidence, start_time, end_time, number_of_frames) -> None:
+        """
+        Initialize the SpottedSign object.
+        :param label: str, the sign label given by the dynamic sign detector.
+        :param confidence: float, the confidence of the prediction.
+        :param start_time: float, the time of the first frame of the sign.
+        :param end_time: float, the time of the last frame of the sign.
+        :param number_of_frames: int, the number of frames of the sign, before they were resampled.
+        """
+        self.label = label
+        self.confidence = confidence
+        self.start_time = start_time
+        self.end_time = end_time
+        self.number_of_frames = number_of_frames
+
+
+def resample_sequence(frames, frame_times, number_of_frames, out=None):
+    """
+    This function is used to stretch or shrink a sequence of frames to number_of_frames frames, evenly
+    spaced in time, by linear interpolation between the nearest frames(a dropped frame does not shift
+    the rest of the sign).
+    :param frames: np.array, (frames, number_of_features) the normalized landmarks of the sequence.
+    :param frame_times: np.array, (frames,) the time of every frame in seconds, increasing.
+    :param number_of_frames: int, the number of frames of the resampled sequence.
+    :param out: np.array, (number_of_frames, number_of_features) float32 array to write into.
+    :return: np.array, (number_of_frames, number_of_features) the resampled sequence.
+    """
+    if out is None:
+        out = np.empty((number_of_frames, frames.shape[1]), dtype=np.float32)
+
+    # the position of every resampled frame between the recorded ones, e.g. 3.25
+    positions = np.interp(np.linspace(frame_times[0], frame_times[-1], number_of_frames),
+                          frame_times, np.arange(len(frames)))
+    lower = positions.astype(np.intp)
+    upper = np.minimum(lower + 1, len(frames) - 1)
+    weights = (positions - lower).astype(np.float32)[:, np.newaxis]
+
+    np.multiply(frames[lower], 1 - weights, out=out)
+    out += frames[upper] * weights
+
+    return out
+
+
+class SignSpotter:
+    """
+    This class is used to find the dynamic signs in a continuous stream of frames(sign spotting),
+    so the dynamic sign detector only classifies the frames of a sign, once, instead of the last
+    number_of_frames frames of every frame(also the ones between two signs):
+        - onset: the speed of the landmarks in the frame(the wrist moves too), measured over the last
+          speed_window_seconds(so the jitter of a resting hand stays low at any frame rate), goes over
+          onset_speed, the sign starts
+          pre_roll_seconds earlier
+        - offset: the speed stays under offset_speed for rest_seconds, the hand is lost or the sign
+          is longer than max_sign_seconds, the sign ends with the last moving frame
+        - confidence trajectory: every probe_seconds the frames of the sign so far are classified,
+          when the confidence falls confidence_drop under its peak the sign ended at the peak and
+          the next one started(two signs without a rest between them)
+    The frames of a sign are resampled to the number_of_frames frames the model was trained on.
+    Signs shorter than min_sign_seconds or predicted under min_confidence are dropped.
+    Everything is measured in seconds, so it behaves the same at any frame rate.
+    It has the following counters:
+        - segments: int, the candidate segments that were classified
+        - signs_spotted: int, the segments given out as signs
+        - classifier_calls: int, the runs of the dynamic sign detector(probes included)
+        - classifier_seconds: float, the time spent in the dynamic sign detector
+    """
+
+    def __init__(self, sign_detector_dynamic, onset_speed=0.25, offset_speed=0.1, rest_seconds=0.3,
+                 min_sign_seconds=0.6, max_sign_seconds=2.0, pre_roll_seconds=0.05, speed_window_seconds=0.1,
+                 min_confidence=0.6, probe_seconds=0.25, confidence_drop=0.2) -> None:
+        """
+        Initialize the SignSpotter object.
+        :param sign_detector_dynamic: SignDetectorDynamic or LazySignDetector, classifies the segments.
+        :param onset_speed: float, the mean speed of a landmark value in the frame(frame sizes per second) that
+        starts a sign.
+        :param offset_speed: float, the mean speed of a landmark value in the frame(frame sizes per second) under
+        which the hand rests.
+        :param rest_seconds: float, how long the hand has to rest to end the sign.
+        :param min_sign_seconds: float, the shortest sign.
+        :param max_sign_seconds: float, the longest sign, a longer segment is cut.
+        :param pre_roll_seconds: float, the time before the onset that belongs to the sign.
+        :param speed_window_seconds: float, the time the speed is measured over.
+        :param min_confidence: float, the confidence a segment needs to be given out as a sign.
+        :param probe_seconds: float, the time between two classifications of an unfinished sign, None to
+        only classify the finished ones(no split of the signs without a rest between them).
+        :param confidence_drop: float, the fall of the confidence after its peak that ends a sign.
+        """
+        self.sign_detector_dynamic = sign_detector_dynamic
+        self.onset_speed = onset_speed
+        self.offset_speed = offset_speed
+        self.rest_seconds = rest_seconds
+        self.min_sign_seconds = min_sign_seconds
+        self.max_sign_seconds = max_sign_seconds
+        self.pre_roll_seconds = pre_roll_seconds
+        self.speed_window_seconds = speed_window_seconds
+        self.min_confidence = min_confidence
+        self.probe_seconds = probe_seconds
+        self.confidence_drop = confidence_drop
+
+        # the frames of the current segment and the resting ones before it, the capacity is doubled when needed,
+        # allocated with the first frame(the number of features is not known before)
+        self.frames = None
+        self.frame_times = None
+        self.length = 0
+        self.segment_buffer = None  # the resampled segment given to the model
+        self.motions = deque()  # (timestamp, landmarks the speed is measured on) of the last speed_window_seconds
+
+        # the last spotted sign
+        self.label = None
+        self.confidence = None
+
+        self.segments = 0
+        self.signs_spotted = 0
+        self.classifier_calls = 0
+        self.classifier_seconds = 0.0
+
+        self.reset()
+
+    def reset(self):
+        """
+        This method is used to forget the frames and the current segment, e.g. when the mode is changed.
+        """
+        self.length = 0
+        self.motions.clear()
+        self.previous_time = None
+        self.speed = 0.0
+
+        self.segment_start = None  # the index of the first frame of the current segment, None between signs
+        self.last_moving_index = None
+        self.still_since = None
+        self.next_probe_time = None
+        self.peak = None  # (confidence, sign label index, end index) of the most confident probe
+
+    def get_sign_detector(self):
+        """
+        :return: SignDetectorDynamic, the dynamic sign detector, None while it is loading.
+        """
+        lazy_sign_detector = get_lazy_sign_detector(self.sign_detector_dynamic)
+        if lazy_sign_detector is None:
+            return self.sign_detector_dynamic
+        if not lazy_sign_detector.is_ready:
+            lazy_sign_detector.start_loading()
+
+        return lazy_sign_detector.loaded_sign_detector
+
+    def append_frame(self, landmark_list, timestamp):
+        """
+        This method is used to add the normalized landmarks of a frame to the frame buffer.
+        :return: int, the index of the frame.
+        """
+        if self.frames is None:
+            number_of_features = np.asarray(landmark_list).size
+            self.frames = np.zeros((128, number_of_features), dtype=np.float32)
+            self.frame_times = np.zeros(128, dtype=np.float64)
+        elif self.length == len(self.frames):
+            self.frames = np.concatenate([self.frames, np.zeros_like(self.frames)])
+            self.frame_times = np.concatenate([self.frame_times, np.zeros_like(self.frame_times)])
+
+        self.frames[self.length] = np.asarray(landmark_list, dtype=np.float32).reshape(-1)
+        self.frame_times[self.length] = timestamp
+        self.length += 1
+
+        return self.length - 1
+
+    def discard_frames(self, count):
+        """
+        This method is used to forget the first count frames of the frame buffer.
+        """
+        self.frames[:self.length - count] = self.frames[count:self.length]
+        self.frame_times[:self.length - count] = self.frame_times[count:self.length]
+        self.length -= count
+
+        if self.segment_start is not None:
+            self.segment_start -= count
+            self.last_moving_index -= count
+            if self.peak is not None:
+                self.peak = (self.peak[0], self.peak[1], self.peak[2] - count)
+
+    def update_speed(self, motion, timestamp):
+        """
+        This method is used to measure the speed of the landmarks with the new frame.
+        :param motion: np.array, the landmarks the speed is measured on.
+        :param timestamp: float, the time of the frame in seconds.
+        """
+        if self.motions and self.motions[0][1].shape != motion.shape:
+            self.motions.clear()
+        self.motions.append((timestamp, motion.copy()))
+        while timestamp - self.motions[0][0] > self.speed_window_seconds and len(self.motions) > 2:
+            self.motions.popleft()
+
+        # the mean displacement of a value since the oldest frame of the window, per second
+        oldest_time, oldest_motion = self.motions[0]
+        if timestamp > oldest_time:
+            self.speed = float(np.abs(motion - oldest_motion).mean()) / (timestamp - oldest_time)
+        self.previous_time = timestamp
+
+    def classify(self, start, end):
+        """
+        This method is used to run the dynamic sign detector on the frames of a segment.
+        :param start: int, the index of the first frame of the segment.
+        :param end: int, the index after the last frame of the segment.
+        :return: (int, float), the sign label index and the confidence, (None, 0.0) while the detector is loading.
+        """
+        sign_detector = self.get_sign_detector()
+        if sign_detector is None:
+            return None, 0.0
+
+        if self.segment_buffer is None:
+            self.segment_buffer = np.zeros((1, sign_detector.number_of_frames, self.frames.shape[1]),
+                                           dtype=np.float32)
+        resample_sequence(self.frames[start:end], self.frame_times[start:end], sign_detector.number_of_frames,
+                          out=self.segment_buffer[0])
+
+        start_time = time.perf_counter()
+        prediction = sign_detector.make_batch_prediction(self.segment_buffer)[0]
+        self.classifier_seconds += time.perf_counter() - start_time
+        self.classifier_calls += 1
+        sign_labels_index = int(np.argmax(prediction))
+
+        return sign_labels_index, float(prediction[sign_labels_index])
+
+    def give_out_sign(self, sign_labels_index, confidence, start, end, dm):
+        """
+        This method is used to turn a classified segment into a sign, if it is confident enough.
+        :return spotted_sign: SpottedSign, the sign or None.
+        """
+        self.segments += 1
+        if sign_labels_index is None or confidence < self.min_confidence:
+            return None
+
+        self.signs_spotted += 1
+        self.label = dm.sign_labels[sign_labels_index]
+        self.confidence = confidence
+
+        return SpottedSign(self.label, confidence, float(self.frame_times[start]), float(self.frame_times[end - 1]),
+                           end - start)
+
+    def end_segment(self, end, dm):
+        """
+        This method is used to classify the current segment once it ended.
+        :param end: int, the index after the last frame of the segment.
+        :param dm: DataManipulator, Dynamic.
+        :return spotted_sign: SpottedSign, the sign or None.
+        """
+        start = self.segment_start
+        spotted_sign = None
+
+        if self.frame_times[end - 1] - self.frame_times[start] >= self.min_sign_seconds:
+            sign_labels_index, confidence = self.classify(start, end)
+            # a probe of the unfinished sign may have been more confident than the whole segment
+            if self.peak is not None and self.peak[0] > confidence:
+                confidence, sign_labels_index, end = self.peak
+            spotted_sign = self.give_out_sign(sign_labels_index, confidence, start, end, dm)
+
+        self.segment_start = None
+        self.peak = None
+        # the frames after the sign are kept, they may be the pre roll of the next one
+        self.discard_frames(end)
+
+        return spotted_sign
+
+    def probe(self, end, dm):
+        """
+        This method is used to classify the unfinished segment and to end the sign at the peak of the
+        confidence when the confidence falls.
+        :param end: int, the index after the newest frame.
+        :param dm: DataManipulator, Dynamic.
+        :return spotted_sign: SpottedSign, the sign that ended at the peak or None.
+        """
+        sign_labels_index, confidence = self.classify(self.segment_start, end)
+
+        if self.peak is None or confidence > self.peak[0]:
+            self.peak = (confidence, sign_labels_index, end)
+        elif self.peak[0] >= self.min_confidence and confidence < self.peak[0] - self.confidence_drop:
+            peak_confidence, peak_sign_labels_index, peak_end = self.peak
+            spotted_sign = self.give_out_sign(peak_sign_labels_index, peak_confidence, self.segment_start,
+                                              peak_end, dm)
+            # the next sign started right after the peak
+            self.discard_frames(peak_end)
+            self.segment_start = 0
+            self.last_moving_index = max(self.last_moving_index, 0)
+            self.peak = None
+            self.next_probe_time = self.frame_times[0] + self.min_sign_seconds
+            return spotted_sign
+
+        self.next_probe_time = self.frame_times[end - 1] + self.probe_seconds
+
+        return None
+
+    def update(self, landmark_list, dm, timestamp=None, landmarks=None):
+        """
+        This method is used to add a frame of the stream.
+        :param landmark_list: list, the normalized landmarks of the hands, None if no hand was detected.
+        :param dm: DataManipulator, Dynamic.
+        :param timestamp: float, the time of the frame in seconds, time.monotonic() by default.
+        :param landmarks: np.array, the landmarks the speed is measured on, e.g. the (21, 2) landmarks of the
+        hand in the frame(the normalized landmarks do not move with the wrist), the normalized ones by default.
+        :return spotted_sign: SpottedSign, the sign that ended with this frame or None.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        spotted_sign = None
+
+        # the hand was lost or the frames stopped for a while(e.g. another mode was used): the sign ended
+        if landmark_list is None or \
+                (self.previous_time is not None and timestamp - self.previous_time > self.rest_seconds):
+            if self.segment_start is not None:
+                spotted_sign = self.end_segment(self.last_moving_index + 1, dm)
+            self.reset()
+            if landmark_list is None:
+                return spotted_sign
+
+        index = self.append_frame(landmark_list, timestamp)
+        motion = np.asarray(landmark_list if landmarks is None else landmarks, dtype=np.float32).reshape(-1)
+        self.update_speed(motion, timestamp)
+
+        if self.segment_start is None:
+            if self.speed >= self.onset_speed:
+                self.segment_start = int(np.searchsorted(self.frame_times[:self.length],
+                                                         timestamp - self.pre_roll_seconds))
+                self.last_moving_index = index
+                self.still_since = None
+                self.next_probe_time = self.frame_times[self.segment_start] + self.min_sign_seconds
+            elif self.length >= 64:
+                # between two signs only the pre roll is kept
+                self.discard_frames(int(np.searchsorted(self.frame_times[:self.length],
+                                                        timestamp - self.pre_roll_seconds)))
+            return spotted_sign
+
+        if self.speed >= self.offset_speed:
+            self.last_moving_index = index
+            self.still_since = None
+        elif self.still_since is None:
+            self.still_since = timestamp
+
+        if self.still_since is not None and timestamp - self.still_since >= self.rest_seconds:
+            spotted_sign = self.end_segment(self.last_moving_index + 1, dm)
+        elif timestamp - self.frame_times[self.segment_start] >= self.max_sign_seconds:
+            spotted_sign = self.end_segment(index + 1, dm)
+        elif self.probe_seconds is not None and timestamp >= self.next_probe_time:
+            spotted_sign = self.probe(index + 1, dm)
+
+        return spotted_sign
+
+    def get_counters(self):
+        """
+        :return: dict, the segment counters and the classifier time.
+        """
+        return {
+            'segments': self.segments,
+            'signs_spotted': self.signs_spotted,
+            'classifier_calls': self.classifier_calls,
+            'classifier_seconds': self.classifier_seconds
+        }
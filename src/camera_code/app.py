@@ -1,13 +1,63 @@
+import argparse
 import cv2 as cv
 import os
 
 from HandsDetector import HandsDetector
 from ApplicationMode import ApplicationMode
 from DataManipulator import DataManipulatorStatic, DataManipulatorDynamic
-from SignDetector import SignDetectorStatic, SignDetectorDynamic
+from SignDetector import SignDetectorStatic, SignDetectorDynamic, MotionGatedSignDetector, LazySignDetector
+from FrameSource import create_frame_source
+from FrameSink import WindowSink, NullSink, parse_scripted_keys
+from SampleWriter import AsyncSampleWriter
+from Pipeline import RecognitionPipeline
+from PredictionStabilizer import PredictionStabilizer
+from Profiler import Profiler
+from SignSpotter import SignSpotter
+
+# run capture and inference on their own threads
+THREADED = True
+# how the sign models are run, see SignDetector.INFERENCE_BACKENDS
+# 'numpy' runs the exported .npz weights without loading TensorFlow
+INFERENCE_BACKEND = 'numpy'
+# carry the GRU states between frames(needs the 'numpy' backend) and predict every N frames
+DYNAMIC_STREAMING = INFERENCE_BACKEND == 'numpy'
+# 'knn' classifies the static signs by their nearest samples in the static data set instead of the trained
+# model(no training, the samples recorded in mode '2' are used right away), see benchmark_knn.py
+STATIC_INFERENCE_BACKEND = INFERENCE_BACKEND
+DYNAMIC_PREDICTION_STRIDE = 1
+# find where the dynamic signs start and end in the stream(see SignSpotter): the dynamic model only runs on the
+# frames of a sign and every sign is typed once in the sentence mode, see evaluate_sign_spotting.py
+SIGN_SPOTTING = True
+# reuse the last static prediction while no normalized landmark moves more than this, None to always predict
+MOTION_GATE_THRESHOLD = 0.01
+# record the dynamic sequences in a packed SequenceStore(data_set_N.store) instead of .npy files
+USE_SEQUENCE_STORE = False
+# detect the hand only in the region around the hand of the previous frame(see HandsDetector),
+# compare with benchmark_hand_tracking.py on recorded clips before enabling it
+TRACK_HAND_ROI = False
+# seconds between two checks of the sign labels / data set files for changes made outside the application
+SIGN_LABELS_WATCH_INTERVAL = 2.0
+# the window appears right away: MediaPipe and the sign models are loaded on background threads, the sign
+# models when their detect mode is first entered, or right after the first frame is displayed with PREFETCH_MODELS
+PREFETCH_MODELS = True
+# 2 to detect two hands and give the (2, 21, 2) hand tensor(left hand first, zeros for a missing hand) to the
+# models and the data sets, the models have to be trained with the same NUMBER_OF_HANDS(see model_code),
+# and the two-hand samples kept in their own data sets
+NUMBER_OF_HANDS = 1
 
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(description="Sign language recognition.")
+    parser.add_argument("--source", default="0",
+                        help="webcam index, video file, directory with images or 'synthetic' (default: webcam 0)")
+    parser.add_argument("--loop", action="store_true", help="start a video file or an image directory again")
+    parser.add_argument("--headless", action="store_true", help="do not open a window")
+    parser.add_argument("--keys", default="",
+                        help="scripted key inputs for --headless, comma separated 'frame:key', e.g. '0:4,1:s'")
+    parser.add_argument("--profile", default=None,
+                        help="export the timers to this file at exit, Prometheus text for .prom/.txt, else CSV")
+    args = parser.parse_args()
+
     # get the base directory of the project
     base_dir = os.path.dirname(os.path.realpath(__file__)) + '\\..\\..\\'
 
@@ -21,96 +71,82 @@ if __name__ == "__main__":
     TRY = 3
     dynamic_sign_labels_file_path = base_dir + f"data\\dynamic\\sign_labels\\sign_labels_{TRY}.csv"
     dynamic_data_set_dir_path = base_dir + f"data\\dynamic\\data_set\\data_set_{TRY}"
+    if USE_SEQUENCE_STORE:
+        dynamic_data_set_dir_path += ".store"
     dynamic_model_weights_file_path = base_dir + f"models\\dynamic\\model_dynamic_2_2.h5"
 
     # create the important objects
     app_mode = ApplicationMode()
 
+    # times the stages of every frame, 'p' shows the FPS and the latencies on the frame
+    profiler = Profiler()
+
+    # the recorded samples are written on a background thread
+    sample_writer = AsyncSampleWriter()
+
     hands_detector = HandsDetector(min_detection_confidence=0.5,
                                    min_tracking_confidence=0.5,
-                                   max_num_hands=1)
+                                   max_num_hands=NUMBER_OF_HANDS,
+                                   track_roi=TRACK_HAND_ROI and NUMBER_OF_HANDS == 1,  # tracks a single hand
+                                   load_in_background=True)
 
     data_manipulator_static = DataManipulatorStatic(static_data_set_file_path,
-                                                    static_sign_labels_file_path)
+                                                    static_sign_labels_file_path,
+                                                    watch_interval=SIGN_LABELS_WATCH_INTERVAL,
+                                                    writer=sample_writer)
     data_manipulator_dynamic = DataManipulatorDynamic(dynamic_data_set_dir_path,
-                                                      dynamic_sign_labels_file_path)
-
-    sign_detector_static = SignDetectorStatic(static_model_weights_file_path)
-    sign_detector_dynamic = SignDetectorDynamic(dynamic_model_weights_file_path)
-
-    # start the camera
-    cap = cv.VideoCapture(0)
-
-    # set up a while loop to process the frames
-    while True:
-        _, frame = cap.read()
-
-        # get the key input from the user and set the app mode
-        key_input = cv.waitKey(10)
-        app_mode.get_app_mode(key_input)
-        frame = app_mode.set_app_mode(frame.copy(),
-                                      key_input,
-                                      data_manipulator_static,
-                                      data_manipulator_dynamic)
-        if app_mode.MODE == 'q':
-            break
-
-        # detect hands in the frame
-        mediapipe_results = hands_detector.mediapipe_hands_detect(frame.copy())
-
-        if mediapipe_results.multi_hand_landmarks is not None:
-            # get the landmarks from the hand detector model
-            landmarks_dictionary = data_manipulator_static.convert_detected_landmarks_to_dict(mediapipe_results)
-            normalized_landmarks = data_manipulator_static.normalize_landmarks(landmarks_dictionary)
-
-            # set up the variables used by the prediction
-            label = confidence = None
-            accepted_word_labels = data_manipulator_static.sign_labels[:26] + data_manipulator_dynamic.sign_labels
-
-            # control the data flow based on the application mode
-            # save the landmarks of the detected static sign
-            if app_mode.MODE == '2':
-                data_manipulator_static.save_landmarks_to_csv_file(normalized_landmarks, key_input)
-
-            # make a prediction based on the detected static sign
-            if app_mode.MODE == '4':
-                label, confidence = sign_detector_static.get_label_and_prediction(normalized_landmarks,
-                                                                                  data_manipulator_static)
-                # display the prediction above the detected hand
-                frame = hands_detector.display_prediction_on_frame(frame.copy(), label, confidence,
-                                                                   landmarks_dictionary)
-                # sentence mode
-                if app_mode.SENTENCE_MODE: # fa o figura în care sunt semnele utilizate in construirea propozitiei
-                    app_mode.create_word(label, accepted_word_labels)
-                    app_mode.create_sentence(label)
-
-            # save the landmarks as a sequence of the detected dynamic sign
-            if app_mode.MODE == '3':
-                data_manipulator_dynamic.save_landmark_sequence_to_npy_file(normalized_landmarks, key_input)
-
-            # make a prediction based on the detected dynamic sign
-            if app_mode.MODE == '5':
-                label, confidence = sign_detector_dynamic.get_label_and_prediction(normalized_landmarks,
-                                                                                   data_manipulator_dynamic)
-                # display the prediction above the detected hand
-                frame = hands_detector.display_prediction_on_frame(frame.copy(), label, confidence,
-                                                                   landmarks_dictionary)
-                # sentence mode
-                if app_mode.SENTENCE_MODE:
-                    app_mode.create_word(label, accepted_word_labels)
-                    app_mode.create_sentence(label)
-
-            # draw the landmarks of the hands on the frame
-            if app_mode.MODE != '1' and app_mode.SHOW_LANDMARKS:
-                frame = hands_detector.draw_hands_landmarks(frame.copy(), mediapipe_results)
-                if app_mode.MODE in {'4', '5'}:
-                    frame = hands_detector.draw_rectangle_around_hand(frame.copy(), landmarks_dictionary)
-
-        if key_input == ord('k'):
-            cv.imwrite(base_dir + f"images\\frames\\length1_dynamic{app_mode.TAKE}.jpg", frame)
-            app_mode.TAKE += 1
-
-        cv.imshow('SIGN', frame)
+                                                      dynamic_sign_labels_file_path,
+                                                      use_sequence_store=USE_SEQUENCE_STORE,
+                                                      watch_interval=SIGN_LABELS_WATCH_INTERVAL,
+                                                      writer=sample_writer,
+                                                      number_of_features=NUMBER_OF_HANDS * 21 * 2)
+
+    if STATIC_INFERENCE_BACKEND == 'knn':
+        static_model_weights_file_path = static_data_set_file_path
+    lazy_sign_detector_static = sign_detector_static = LazySignDetector(
+        lambda: SignDetectorStatic(static_model_weights_file_path, STATIC_INFERENCE_BACKEND, NUMBER_OF_HANDS),
+        "static sign detector")
+    if MOTION_GATE_THRESHOLD is not None:
+        sign_detector_static = MotionGatedSignDetector(lazy_sign_detector_static, MOTION_GATE_THRESHOLD,
+                                                       number_of_hands=NUMBER_OF_HANDS)
+    if STATIC_INFERENCE_BACKEND == 'knn':
+        # the samples recorded from now on are added to the index, then the prediction cached by the motion
+        # gate is forgotten(the new sample may change it)
+        lazy_sign_detector_static.on_loaded(
+            lambda sign_detector: data_manipulator_static.sample_listeners.append(sign_detector.backend.add_sample))
+        if MOTION_GATE_THRESHOLD is not None:
+            lazy_sign_detector_static.on_loaded(
+                lambda sign_detector: data_manipulator_static.sample_listeners.append(
+                    lambda normalized_landmarks, sign_label_index: sign_detector_static.reset()))
+    sign_detector_dynamic = LazySignDetector(
+        lambda: SignDetectorDynamic(dynamic_model_weights_file_path, INFERENCE_BACKEND,
+                                    streaming=DYNAMIC_STREAMING,
+                                    prediction_stride=DYNAMIC_PREDICTION_STRIDE,
+                                    number_of_hands=NUMBER_OF_HANDS), "dynamic sign detector")
+    sign_spotter = SignSpotter(sign_detector_dynamic) if SIGN_SPOTTING else None
+
+    # start the camera(or the given frame source) and run the capture / inference / render pipeline
+    frame_source = create_frame_source(args.source, loop=args.loop, realtime=True)
+    sink = NullSink(parse_scripted_keys(args.keys)) if args.headless else WindowSink()
+    pipeline = RecognitionPipeline(frame_source, hands_detector, app_mode,
+                                   data_manipulator_static, data_manipulator_dynamic,
+                                   sign_detector_static, sign_detector_dynamic,
+                                   threaded=THREADED,
+                                   frame_save_dir_path=base_dir + "images\\frames",
+                                   stabilizer=PredictionStabilizer(),
+                                   profiler=profiler,
+                                   prefetch_models=PREFETCH_MODELS,
+                                   number_of_hands=NUMBER_OF_HANDS,
+                                   sign_spotter=sign_spotter)
+    try:
+        stats = pipeline.run(sink=sink)
+        if 'static_gate' in stats:
+            print(f"static sign predictions from the motion gate cache: {stats['static_gate']['hit_rate']:.0%}, "
+                  f"{stats['static_gate']['seconds_saved']:.2f} s of classifier time saved")
+    finally:
+        # everything that was recorded is on the disk before the application exits
+        sample_writer.close()
+        if args.profile is not None:
+            profiler.export(args.profile)
 
-    cap.release()
     cv.destroyAllWindows()
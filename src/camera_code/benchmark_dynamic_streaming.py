@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import numpy as np
+
+from DataManipulator import DataManipulatorDynamic
+from SignDetector import SignDetectorDynamic
+
+# per frame latency of SignDetectorDynamic in window mode(whole 30 frame window
+# re-run through the GRU layers) and in streaming mode(one timestep per frame)
+# usage: python benchmark_dynamic_streaming.py [model.h5 or model.npz]
+NUMBER_OF_FRAMES = 600
+PREDICTION_STRIDES = (1, 5, 10)
+
+
+def benchmark_detector(sign_detector, frames, dm):
+    """
+    This function is used to measure the latency of get_label_and_prediction for each frame.
+    :param sign_detector: SignDetectorDynamic, the detector to be measured.
+    :param frames: np.array, (number of frames, 42) landmarks fed one by one.
+    :param dm: DataManipulatorDynamic, object that stores the dynamic sign labels.
+    :return latencies: np.array, the latency of each frame after the window is full, in microseconds.
+    """
+    latencies = np.empty(len(frames))
+    for i, landmarks in enumerate(frames):
+        start_time = time.perf_counter()
+        sign_detector.get_label_and_prediction(landmarks, dm)
+        latencies[i] = (time.perf_counter() - start_time) * 1e6
+
+    return latencies[sign_detector.number_of_frames:]
+
+
+if __name__ == "__main__":
+
+    base_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..')
+    model_weights_path = sys.argv[1] if len(sys.argv) > 1 else \
+        os.path.join(base_dir, "models", "dynamic", "model_dynamic_2_2.h5")
+    data_manipulator_dynamic = DataManipulatorDynamic(
+        os.path.join(base_dir, "data", "dynamic", "data_set", "data_set_3"),
+        os.path.join(base_dir, "data", "dynamic", "sign_labels", "sign_labels_3.csv"))
+
+    frames = np.random.default_rng(55).uniform(-0.3, 0.3, size=(NUMBER_OF_FRAMES, 21 * 2)).astype(np.float32)
+
+    for streaming in (False, True):
+        for prediction_stride in PREDICTION_STRIDES:
+            sign_detector = SignDetectorDynamic(model_weights_path, 'numpy',
+                                                streaming=streaming, prediction_stride=prediction_stride)
+            latencies = benchmark_detector(sign_detector, frames, data_manipulator_dynamic)
+            print(f"{'streaming' if streaming else 'window':>9}, stride {prediction_stride:2}: "
+                  f"mean {latencies.mean():8.1f} us/frame, "
+                  f"p50 {np.percentile(latencies, 50):8.1f} us, "
+                  f"p99 {np.percentile(latencies, 99):8.1f} us, "
+                  f"max {latencies.max():8.1f} us")
@@ -0,0 +1,83 @@
+import argparse
+import tracemalloc
+import numpy as np
+
+from HandsDetector import HandsDetector
+from ApplicationMode import ApplicationMode
+from DataManipulator import DataManipulatorStatic, DataManipulatorDynamic
+from FrameSource import VideoCaptureFrameSource, SyntheticFrameSource
+from Pipeline import RecognitionPipeline
+
+# bytes allocated per frame by the sequential pipeline(capture, hand detection, GUI), measured with tracemalloc:
+#   - allocate: a new array for every captured frame and for every BGR to RGB conversion
+#   - reuse: the frames are read into the buffers of the FrameBufferPool and converted into a reused buffer
+# for every frame, the peak of the traced memory above the memory traced before the frame is measured,
+# the first frames(the buffers are allocated by them) are not measured
+# usage: python benchmark_frame_allocations.py [video_file] [--frames 300]
+WARMUP_FRAMES = 10
+
+
+def create_frame_source(args):
+    if args.video is not None:
+        return VideoCaptureFrameSource(args.video, loop=True)
+    return SyntheticFrameSource(number_of_frames=args.frames + WARMUP_FRAMES)
+
+
+def measure_bytes_per_frame(reuse, args):
+    """
+    :return: np.array, the bytes allocated by every measured frame.
+    """
+    app_mode = ApplicationMode()
+    app_mode.MODE = '1'
+    app_mode.SHOW_LANDMARKS = True
+    hands_detector = HandsDetector(min_detection_confidence=0.5,
+                                   min_tracking_confidence=0.5,
+                                   max_num_hands=1)
+    pipeline = RecognitionPipeline(create_frame_source(args), hands_detector, app_mode,
+                                   DataManipulatorStatic(None, None), DataManipulatorDynamic(None, None),
+                                   None, None, threaded=False, reuse_frames=reuse)
+
+    bytes_per_frame = []
+    tracemalloc.start()
+    try:
+        while len(bytes_per_frame) < args.frames:
+            if not reuse:
+                hands_detector.rgb_frame = None  # a new RGB frame for every conversion, like before
+
+            tracemalloc.reset_peak()
+            traced_before, _ = tracemalloc.get_traced_memory()
+
+            # the loop of RecognitionPipeline.run, without the window
+            result = pipeline.next_result()
+            if result is None:
+                break
+            pipeline.render(result, -1)
+            pipeline.release_result(result)
+            del result
+
+            _, peak = tracemalloc.get_traced_memory()
+            if pipeline.frames_rendered > WARMUP_FRAMES:
+                bytes_per_frame.append(peak - traced_before)
+    finally:
+        tracemalloc.stop()
+        pipeline.stop()
+
+    return np.array(bytes_per_frame)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Measure the bytes allocated per frame with tracemalloc.")
+    parser.add_argument("video", nargs='?', default=None, help="video file, synthetic frames by default")
+    parser.add_argument("--frames", type=int, default=300, help="number of measured frames")
+    args = parser.parse_args()
+
+    results = {}
+    for reuse in (False, True):
+        bytes_per_frame = measure_bytes_per_frame(reuse, args)
+        results[reuse] = bytes_per_frame.mean()
+        print(f"{'reuse' if reuse else 'allocate':>8}: {bytes_per_frame.mean() / 1024:9.1f} KiB/frame mean, "
+              f"{np.median(bytes_per_frame) / 1024:9.1f} KiB/frame median, "
+              f"{bytes_per_frame.max() / 1024:9.1f} KiB max over {len(bytes_per_frame)} frames")
+
+    print(f"{results[False] / max(results[True], 1):.1f}x fewer bytes allocated per frame")
@@ -0,0 +1,98 @@
+import argparse
+import numpy as np
+
+from HandsDetector import HandsDetector
+from ApplicationMode import ApplicationMode
+from DataManipulator import DataManipulatorStatic, DataManipulatorDynamic
+from FrameSource import VideoCaptureFrameSource
+from Pipeline import RecognitionPipeline
+
+# full-frame hand detection against hand-ROI tracking on recorded clips:
+#   - end-to-end FPS of the sequential pipeline(capture, detection, landmarks, GUI), headless
+#   - landmark drift: distance in pixels between the landmarks found by the two detectors on the same frame
+# usage: python benchmark_hand_tracking.py clip.mp4 [clip.mp4 ...]
+# the clips have to show real hands, MediaPipe does not find any in synthetic frames
+
+
+def create_hands_detector(track_roi, args):
+    return HandsDetector(min_detection_confidence=0.5,
+                         min_tracking_confidence=0.5,
+                         max_num_hands=1,
+                         track_roi=track_roi,
+                         roi_size=args.roi_size,
+                         refresh_interval=args.refresh_interval)
+
+
+def measure_fps(clip_path, hands_detector):
+    app_mode = ApplicationMode()
+    app_mode.MODE = '1'
+    app_mode.SHOW_LANDMARKS = True  # the landmarks are drawn, like in the detect modes
+    pipeline = RecognitionPipeline(VideoCaptureFrameSource(clip_path), hands_detector, app_mode,
+                                   DataManipulatorStatic(None, None), DataManipulatorDynamic(None, None),
+                                   None, None, threaded=False)
+
+    return pipeline.run(show=False)['fps']
+
+
+def get_landmarks_in_pixels(mediapipe_results, frame_shape):
+    if not mediapipe_results.multi_hand_landmarks:
+        return None
+
+    return np.array([[landmark.x * frame_shape[1], landmark.y * frame_shape[0]]
+                     for landmark in mediapipe_results.multi_hand_landmarks[0].landmark])
+
+
+def measure_drift(clip_path, args):
+    """
+    :return: (np.array, int, int, HandsDetector), the mean drift of every frame where both detectors found
+    a hand, the number of frames where only one did, the number of frames and the tracking detector.
+    """
+    full_frame_detector = create_hands_detector(False, args)
+    tracking_detector = create_hands_detector(True, args)
+    frame_source = VideoCaptureFrameSource(clip_path)
+
+    drifts = []
+    disagreements = number_of_frames = 0
+    while True:
+        frame = frame_source.read()
+        if frame is None:
+            break
+        number_of_frames += 1
+        full_frame_landmarks = get_landmarks_in_pixels(full_frame_detector.mediapipe_hands_detect(frame),
+                                                       frame.shape)
+        tracking_landmarks = get_landmarks_in_pixels(tracking_detector.mediapipe_hands_detect(frame),
+                                                     frame.shape)
+
+        if full_frame_landmarks is not None and tracking_landmarks is not None:
+            drifts.append(np.linalg.norm(full_frame_landmarks - tracking_landmarks, axis=1).mean())
+        elif full_frame_landmarks is not None or tracking_landmarks is not None:
+            disagreements += 1
+    frame_source.release()
+
+    return np.array(drifts), disagreements, number_of_frames, tracking_detector
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Compare full-frame hand detection with hand-ROI tracking.")
+    parser.add_argument("clips", nargs='+', help="recorded video files with hands")
+    parser.add_argument("--roi-size", type=int, default=256)
+    parser.add_argument("--refresh-interval", type=int, default=30)
+    args = parser.parse_args()
+
+    for clip_path in args.clips:
+        full_frame_fps = measure_fps(clip_path, create_hands_detector(False, args))
+        tracking_fps = measure_fps(clip_path, create_hands_detector(True, args))
+        drifts, disagreements, number_of_frames, tracking_detector = measure_drift(clip_path, args)
+
+        print(clip_path)
+        print(f"  full frame: {full_frame_fps:6.1f} FPS")
+        print(f"    tracking: {tracking_fps:6.1f} FPS ({tracking_fps / max(full_frame_fps, 1e-9):.2f}x), "
+              f"{tracking_detector.roi_detections} ROI / "
+              f"{tracking_detector.full_frame_detections} full-frame detections")
+        if len(drifts) != 0:
+            print(f"       drift: mean {drifts.mean():.2f} px, p95 {np.percentile(drifts, 95):.2f} px, "
+                  f"max {drifts.max():.2f} px over {len(drifts)}/{number_of_frames} frames, "
+                  f"hand found by only one detector on {disagreements} frames")
+        else:
+            print("       drift: no frame with a hand found by both detectors")
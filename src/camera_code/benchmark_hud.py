@@ -0,0 +1,91 @@
+import argparse
+import time
+import cv2 as cv
+import numpy as np
+
+from ApplicationMode import ApplicationMode
+
+# per-frame cost of the GUI overlay(header and sentence panel, detect static signs mode with the sentence mode on):
+#   - redraw: the rectangles and the texts are drawn on every frame
+#   - cached: the layers of the HudCompositor are put on the frame, rendered again only when the word changes
+# the word changes every --update-every frames, like the insertions of the sentence mode
+# usage: python benchmark_hud.py [--frames 2000] [--update-every 30]
+RESOLUTIONS = {'720p': (720, 1280), '1080p': (1080, 1920)}
+
+
+def redraw_overlay(app_mode, frame):
+    """
+    This function is used to draw the overlay on every frame, without the HudCompositor.
+    """
+    cv.rectangle(frame, (0, 0), (frame.shape[1], 20), (255, 255, 255), -1)
+
+    cv.rectangle(frame, (0, frame.shape[0]), (frame.shape[1], frame.shape[0] - 50), (255, 255, 255), -1)
+    cv.putText(frame, f'sentence: {app_mode.SENTENCE}', (10, frame.shape[0] - 10),
+               cv.FONT_HERSHEY_SIMPLEX, 0.5, app_mode.purple, 1, cv.LINE_AA)
+    cv.putText(frame, f'word: {app_mode.WORD}', (10, frame.shape[0] - 30),
+               cv.FONT_HERSHEY_SIMPLEX, 0.5, app_mode.purple, 1, cv.LINE_AA)
+
+    text = "Detect Static Signs Mode(letter)"
+    text_size = cv.getTextSize(text, cv.FONT_HERSHEY_SIMPLEX, 0.5, 1)[0]
+    cv.putText(frame, text, (int((frame.shape[1] - text_size[0]) / 2), 15),
+               cv.FONT_HERSHEY_SIMPLEX, 0.5, app_mode.purple, 1, cv.LINE_AA)
+
+    return frame
+
+
+def create_app_mode():
+    app_mode = ApplicationMode()
+    app_mode.MODE = '4'
+    app_mode.SENTENCE_MODE = True
+    app_mode.SENTENCE = "HELLO MY NAME IS"
+
+    return app_mode
+
+
+def measure(draw, frame_shape, args):
+    """
+    :return: float, the mean microseconds per frame spent drawing the overlay.
+    """
+    app_mode = create_app_mode()
+    background = np.random.default_rng(0).integers(0, 256, size=frame_shape + (3,), dtype=np.uint8)
+    frame = background.copy()
+
+    elapsed = 0.0
+    for frame_index in range(args.frames):
+        np.copyto(frame, background)  # a new camera frame, not measured
+        if frame_index % args.update_every == 0:
+            app_mode.WORD = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"[:frame_index // args.update_every % 26 + 1]
+
+        start_time = time.perf_counter()
+        draw(app_mode, frame)
+        elapsed += time.perf_counter() - start_time
+
+    return elapsed / args.frames * 1e6
+
+
+def check_same_pixels(frame_shape):
+    """
+    :return: bool, True if both ways of drawing give exactly the same frame.
+    """
+    app_mode = create_app_mode()
+    background = np.random.default_rng(0).integers(0, 256, size=frame_shape + (3,), dtype=np.uint8)
+
+    return np.array_equal(redraw_overlay(app_mode, background.copy()),
+                          app_mode.set_app_mode(background.copy(), -1, None, None))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark the cached GUI overlay against drawing it every frame.")
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--update-every", type=int, default=30, help="frames between two changes of the word")
+    args = parser.parse_args()
+
+    for name, frame_shape in RESOLUTIONS.items():
+        redraw_time = measure(redraw_overlay, frame_shape, args)
+        cached_time = measure(lambda app_mode, frame: app_mode.set_app_mode(frame, -1, None, None),
+                              frame_shape, args)
+
+        print(f"{name:>5}: redraw {redraw_time:7.1f} us/frame, cached {cached_time:7.1f} us/frame "
+              f"({redraw_time / max(cached_time, 1e-9):.1f}x), "
+              f"same pixels: {check_same_pixels(frame_shape)}")
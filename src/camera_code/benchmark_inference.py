@@ -0,0 +1,51 @@
+import os
+import time
+import numpy as np
+
+from SignDetector import INFERENCE_BACKENDS, create_inference_backend
+
+# micro-benchmark of the per call latency of every inference backend,
+# using a batch of one sample like the application does for each frame
+NUMBER_OF_WARMUP_CALLS = 20
+NUMBER_OF_CALLS = 500
+
+
+def benchmark_backend(backend, x):
+    """
+    This function is used to measure the latency of single sample calls.
+    :param backend: InferenceBackend, the backend to be measured.
+    :param x: np.array, float32 batch with one sample.
+    :return latencies: np.array, the latency of each call in microseconds.
+    """
+    for _ in range(NUMBER_OF_WARMUP_CALLS):
+        backend.predict(x)
+
+    latencies = np.empty(NUMBER_OF_CALLS)
+    for i in range(NUMBER_OF_CALLS):
+        start_time = time.perf_counter()
+        backend.predict(x)
+        latencies[i] = (time.perf_counter() - start_time) * 1e6
+
+    return latencies
+
+
+if __name__ == "__main__":
+
+    base_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..')
+    models = {
+        'static': (os.path.join(base_dir, "models", "static", "model_static_5_1.h5"), (1, 21 * 2)),
+        'dynamic': (os.path.join(base_dir, "models", "dynamic", "model_dynamic_2_2.h5"), (1, 30, 21 * 2)),
+    }
+
+    rng = np.random.default_rng(55)
+    for model_name, (model_weights_path, input_shape) in models.items():
+        x = rng.uniform(-0.3, 0.3, size=input_shape).astype(np.float32)
+        print(f"{model_name} model: {model_weights_path}")
+
+        for backend_name in INFERENCE_BACKENDS:
+            if backend_name == 'knn':
+                continue  # reads the static data set instead of a model file, see benchmark_knn.py
+            latencies = benchmark_backend(create_inference_backend(backend_name, model_weights_path), x)
+            print(f"  {backend_name:>12}: mean {latencies.mean():9.1f} us, "
+                  f"p50 {np.percentile(latencies, 50):9.1f} us, "
+                  f"p99 {np.percentile(latencies, 99):9.1f} us")
@@ -0,0 +1,102 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+from sklearn.model_selection import train_test_split
+from KnnIndex import KnnIndex
+from SignDetector import SignDetectorStatic
+
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'model_code'))
+from DataSetCache import load_static_data_set
+
+# accuracy and latency of the kNN static classifier(KnnIndex, matrix product and KD-tree) against the
+# Keras MLP of BuildLanguageModels.ModelStatic, trained here on the same 80% of the static data set
+# the latency is of one sample, like in the application, the MLP is run with the 'numpy' and 'call' backends
+# usage: python benchmark_knn.py [--data-set data_set_abc.csv --sign-labels sign_labels_abc.csv] [--epochs 100]
+NUMBER_OF_CALLS = 2000
+
+
+def time_per_sample(predict, x_test):
+    """
+    :return: float, the median latency of predict on one sample, in microseconds.
+    """
+    latencies = np.empty(NUMBER_OF_CALLS)
+    for i in range(NUMBER_OF_CALLS):
+        sample = x_test[i % len(x_test)][np.newaxis]
+        start_time = time.perf_counter()
+        predict(sample)
+        latencies[i] = time.perf_counter() - start_time
+
+    return np.median(latencies) * 1e6
+
+
+def get_accuracy(predict, x_test, y_test):
+    return np.mean(np.argmax(predict(x_test), axis=1) == y_test)
+
+
+def train_mlp(args, x_train, y_train, model_path):
+    """
+    This function is used to train the MLP of train_static_model.py on the training samples.
+    """
+    from BuildLanguageModels import ModelStatic
+
+    model = ModelStatic(args.sign_labels, args.data_set, model_path, random_state=55)
+    model.model.compile(optimizer='adam', loss='sparse_categorical_crossentropy',
+                        metrics=['sparse_categorical_accuracy'])
+    start_time = time.perf_counter()
+    model.model.fit(x_train, y_train, epochs=args.epochs, batch_size=32, verbose=0)
+    train_seconds = time.perf_counter() - start_time
+    model.save_model()
+
+    return train_seconds
+
+
+if __name__ == "__main__":
+
+    base_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..')
+
+    parser = argparse.ArgumentParser(description="Compare the kNN static classifier with the Keras MLP.")
+    parser.add_argument("--data-set", default=os.path.join(base_dir, "data", "static", "data_set", "data_set_abc.csv"))
+    parser.add_argument("--sign-labels",
+                        default=os.path.join(base_dir, "data", "static", "sign_labels", "sign_labels_abc.csv"))
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--epochs", type=int, default=100, help="training epochs of the MLP")
+    args = parser.parse_args()
+
+    x_data, y_data = load_static_data_set(args.data_set, mmap_mode=None)
+    x_train, x_test, y_train, y_test = train_test_split(x_data, y_data, test_size=0.2, random_state=55)
+    print(f"{len(x_train)} training samples, {len(x_test)} test samples")
+
+    for use_kdtree in (False, True):
+        start_time = time.perf_counter()
+        knn_index = KnnIndex(args.k, use_kdtree, x_train.shape[1])
+        knn_index.add_samples(x_train, y_train)
+        if use_kdtree:
+            knn_index.build_tree()
+        build_seconds = time.perf_counter() - start_time
+        print(f"kNN {'KD-tree' if use_kdtree else 'matrix '}: accuracy "
+              f"{get_accuracy(knn_index.predict, x_test, y_test):.3f}, "
+              f"{time_per_sample(knn_index.predict, x_test):7.1f} us/sample, built in {build_seconds:.3f} s")
+
+    # incremental insertion: the last 10% of the training samples inserted one by one
+    knn_index = KnnIndex(args.k, False, x_train.shape[1])
+    number_of_inserted = len(x_train) // 10
+    knn_index.add_samples(x_train[:-number_of_inserted], y_train[:-number_of_inserted])
+    start_time = time.perf_counter()
+    for landmarks, label in zip(x_train[-number_of_inserted:], y_train[-number_of_inserted:]):
+        knn_index.add_sample(landmarks, label)
+    print(f"kNN insertion: {(time.perf_counter() - start_time) / number_of_inserted * 1e6:.1f} us/sample, "
+          f"same accuracy: {get_accuracy(knn_index.predict, x_test, y_test):.3f}")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        model_path = os.path.join(temp_dir, "model_static.h5")
+        train_seconds = train_mlp(args, x_train, y_train, model_path)
+        for backend in ('numpy', 'call'):
+            sign_detector = SignDetectorStatic(model_path, backend)
+            print(f"MLP {backend:>7}: accuracy "
+                  f"{get_accuracy(sign_detector.make_batch_prediction, x_test, y_test):.3f}, "
+                  f"{time_per_sample(sign_detector.make_batch_prediction, x_test):7.1f} us/sample, "
+                  f"trained in {train_seconds:.1f} s({args.epochs} epochs)")
@@ -0,0 +1,106 @@
+import time
+import numpy as np
+
+from DataManipulator import DataManipulatorStatic
+from HandsDetector import HandsDetector
+
+# compares the dict landmark path(convert_detected_landmarks_to_dict + normalize_landmarks
+# + find_min_and_max_for_x_and_y on dicts) with the NumPy path on fake MediaPipe results,
+# and the one-hand NumPy path with the (2, 21, 2) hand tensor of two hands, which has to stay
+# within TWO_HANDS_BUDGET times the cost of the one-hand path(twice the landmarks)
+NUMBER_OF_CALLS = 20000
+TWO_HANDS_BUDGET = 2.5
+
+
+class FakeLandmark:
+    def __init__(self, x, y) -> None:
+        self.x = x
+        self.y = y
+        self.z = 0.0
+
+
+class FakeHandLandmarks:
+    def __init__(self, rng) -> None:
+        self.landmark = [FakeLandmark(*rng.uniform(0.2, 0.8, size=2)) for _ in range(21)]
+
+
+class FakeCategory:
+    def __init__(self, label) -> None:
+        self.label = label
+        self.score = 0.9
+
+
+class FakeHandedness:
+    def __init__(self, label) -> None:
+        self.classification = [FakeCategory(label)]
+
+
+class FakeMediapipeResults:
+    def __init__(self, rng, handedness=('Right',)) -> None:
+        self.multi_hand_landmarks = [FakeHandLandmarks(rng) for _ in handedness]
+        self.multi_handedness = [FakeHandedness(label) for label in handedness]
+
+
+def find_min_and_max_for_x_and_y_dict(landmarks_dict):
+    # the bounding box on the old dict landmarks, as the drawing helpers used to compute it
+    min_x = min_y = 1
+    max_x = max_y = 0
+
+    for landmark in landmarks_dict:
+        min_x = min(min_x, landmark['x'])
+        min_y = min(min_y, landmark['y'])
+        max_x = max(max_x, landmark['x'])
+        max_y = max(max_y, landmark['y'])
+
+    return min_x, min_y, max_x, max_y
+
+
+def time_per_call(function):
+    start_time = time.perf_counter()
+    for _ in range(NUMBER_OF_CALLS):
+        function()
+
+    return (time.perf_counter() - start_time) / NUMBER_OF_CALLS * 1e6
+
+
+if __name__ == "__main__":
+
+    mediapipe_results = FakeMediapipeResults(np.random.default_rng(55))
+    dm = DataManipulatorStatic(None, None)
+    hands_detector = HandsDetector.__new__(HandsDetector)  # the drawing helpers do not need MediaPipe
+
+    def dict_path():
+        landmarks_dict = dm.convert_detected_landmarks_to_dict(mediapipe_results)
+        find_min_and_max_for_x_and_y_dict(landmarks_dict)
+        return dm.normalize_landmarks(landmarks_dict)
+
+    def array_path():
+        landmarks = dm.convert_detected_landmarks_to_array(mediapipe_results)
+        hands_detector.find_min_and_max_for_x_and_y(landmarks)
+        return dm.normalize_landmarks_array(landmarks)
+
+    assert np.allclose(dict_path(), array_path(), atol=1e-6)
+
+    dict_time = time_per_call(dict_path)
+    array_time = time_per_call(array_path)
+    print(f" dict path: {dict_time:6.2f} us/frame")
+    print(f"array path: {array_time:6.2f} us/frame ({dict_time / array_time:.1f}x faster)")
+
+    # the right hand is detected first, it goes to the second slot of the tensor
+    two_hands_results = FakeMediapipeResults(np.random.default_rng(56), handedness=('Right', 'Left'))
+
+    def hand_tensor_path(results):
+        hands, hand_mask = dm.convert_detected_hands_to_tensor(results)
+        hands_detector.find_min_and_max_for_x_and_y(hands[0 if hand_mask[0] else 1])
+        return dm.normalize_hands_tensor(hands)
+
+    left_hand = np.array([[landmark.x, landmark.y] for landmark in two_hands_results.multi_hand_landmarks[1].landmark])
+    assert np.allclose(hand_tensor_path(two_hands_results)[:42], (left_hand - left_hand[0]).reshape(-1), atol=1e-6)
+    assert not hand_tensor_path(mediapipe_results)[:42].any()  # one right hand, the left slot is zeros
+
+    one_hand_tensor_time = time_per_call(lambda: hand_tensor_path(mediapipe_results))
+    two_hands_time = time_per_call(lambda: hand_tensor_path(two_hands_results))
+    print(f"hand tensor, one hand:  {one_hand_tensor_time:6.2f} us/frame")
+    print(f"hand tensor, two hands: {two_hands_time:6.2f} us/frame "
+          f"({two_hands_time / array_time:.2f}x the one-hand array path, budget {TWO_HANDS_BUDGET}x)")
+    print("PASSED" if two_hands_time <= TWO_HANDS_BUDGET * array_time else "FAILED")
@@ -0,0 +1,62 @@
+import os
+import sys
+
+from HandsDetector import HandsDetector
+from ApplicationMode import ApplicationMode
+from DataManipulator import DataManipulatorStatic, DataManipulatorDynamic
+from SignDetector import SignDetectorStatic, SignDetectorDynamic
+from FrameSource import VideoCaptureFrameSource, SyntheticFrameSource
+from Pipeline import RecognitionPipeline
+
+# headless benchmark of the sequential loop against the threaded pipeline
+# usage: python benchmark_pipeline.py [video_file]
+# without a video file, synthetic frames are used
+MODE = '4'  # application mode used during the benchmark
+NUMBER_OF_FRAMES = 300
+SOURCE_FPS = 30  # rate of the synthetic source, like a webcam
+
+
+def create_frame_source():
+    if len(sys.argv) > 1:
+        return VideoCaptureFrameSource(sys.argv[1], realtime=True)
+    return SyntheticFrameSource(number_of_frames=NUMBER_OF_FRAMES, fps=SOURCE_FPS)
+
+
+if __name__ == "__main__":
+
+    base_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..')
+
+    static_sign_labels_file_path = os.path.join(base_dir, "data", "static", "sign_labels", "sign_labels_5.csv")
+    static_data_set_file_path = os.path.join(base_dir, "data", "static", "data_set", "data_set_5.csv")
+    static_model_weights_file_path = os.path.join(base_dir, "models", "static", "model_static_5_1.h5")
+
+    dynamic_sign_labels_file_path = os.path.join(base_dir, "data", "dynamic", "sign_labels", "sign_labels_3.csv")
+    dynamic_data_set_dir_path = os.path.join(base_dir, "data", "dynamic", "data_set", "data_set_3")
+    dynamic_model_weights_file_path = os.path.join(base_dir, "models", "dynamic", "model_dynamic_2_2.h5")
+
+    sign_detector_static = SignDetectorStatic(static_model_weights_file_path)
+    sign_detector_dynamic = SignDetectorDynamic(dynamic_model_weights_file_path)
+
+    for threaded in (False, True):
+        app_mode = ApplicationMode()
+        app_mode.MODE = MODE
+
+        pipeline = RecognitionPipeline(create_frame_source(),
+                                       HandsDetector(min_detection_confidence=0.5,
+                                                     min_tracking_confidence=0.5,
+                                                     max_num_hands=1),
+                                       app_mode,
+                                       DataManipulatorStatic(static_data_set_file_path,
+                                                             static_sign_labels_file_path),
+                                       DataManipulatorDynamic(dynamic_data_set_dir_path,
+                                                              dynamic_sign_labels_file_path),
+                                       sign_detector_static, sign_detector_dynamic,
+                                       threaded=threaded)
+        stats = pipeline.run(show=False)
+
+        print(f"{'threaded' if threaded else 'sequential':>10}: "
+              f"{stats['fps']:6.1f} FPS, "
+              f"captured {stats['frames_captured']}, "
+              f"inferred {stats['frames_inferred']}, "
+              f"rendered {stats['frames_rendered']}, "
+              f"dropped {stats['frames_dropped']}")
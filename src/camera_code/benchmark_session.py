@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+
+from HandsDetector import HandsDetector
+from ApplicationMode import ApplicationMode
+from DataManipulator import DataManipulatorStatic, DataManipulatorDynamic
+from SignDetector import SignDetectorStatic, SignDetectorDynamic
+from FrameSource import create_frame_source
+from FrameSink import NullSink, parse_scripted_keys
+from Pipeline import RecognitionPipeline
+from PredictionStabilizer import PredictionStabilizer
+
+# headless replay of a recorded session through the whole recognition loop(ApplicationMode, HandsDetector,
+# both SignDetectors), with scripted key inputs instead of a keyboard
+# reports the p50/p95/p99 latency of every stage and the end-to-end FPS as JSON
+# usage: python benchmark_session.py session.mp4 --keys "0:4,0:s,300:5" [--threaded] [--output stats.json]
+#        python benchmark_session.py frames_dir/ --keys-file keys.txt
+#        python benchmark_session.py synthetic --max-frames 300
+# the samples recorded in the save modes('2', '3') are written to the data sets of --data-dir
+# the sentence mode waits seconds, not frames, use --realtime to replay it at the speed of the recording
+
+
+def read_scripted_keys(args):
+    text = args.keys
+    if args.keys_file is not None:
+        with open(args.keys_file, 'r') as file:
+            text = ','.join(line.strip() for line in file if line.strip() and not line.startswith('#'))
+
+    return parse_scripted_keys(text)
+
+
+if __name__ == "__main__":
+
+    base_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..')
+
+    parser = argparse.ArgumentParser(description="Replay a recorded session headless and report the latencies.")
+    parser.add_argument("source", help="video file, directory with images or 'synthetic'")
+    parser.add_argument("--keys", default="", help="comma separated 'frame:key', e.g. '0:4,0:s'")
+    parser.add_argument("--keys-file", default=None, help="file with one 'frame:key' per line")
+    parser.add_argument("--threaded", action="store_true", help="run capture and inference on their own threads")
+    parser.add_argument("--realtime", action="store_true", help="give the frames at the rate of a camera")
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--backend", default='numpy', help="see SignDetector.INFERENCE_BACKENDS")
+    parser.add_argument("--static-model",
+                        default=os.path.join(base_dir, "models", "static", "model_static_5_1.h5"))
+    parser.add_argument("--dynamic-model",
+                        default=os.path.join(base_dir, "models", "dynamic", "model_dynamic_2_2.h5"))
+    parser.add_argument("--data-dir", default=os.path.join(base_dir, "data"))
+    parser.add_argument("--output", default=None, help="write the JSON to this file instead of the output")
+    args = parser.parse_args()
+
+    app_mode = ApplicationMode()
+    pipeline = RecognitionPipeline(create_frame_source(args.source, realtime=args.realtime),
+                                   HandsDetector(min_detection_confidence=0.5,
+                                                 min_tracking_confidence=0.5,
+                                                 max_num_hands=1),
+                                   app_mode,
+                                   DataManipulatorStatic(
+                                       os.path.join(args.data_dir, "static", "data_set", "data_set_5.csv"),
+                                       os.path.join(args.data_dir, "static", "sign_labels", "sign_labels_5.csv")),
+                                   DataManipulatorDynamic(
+                                       os.path.join(args.data_dir, "dynamic", "data_set", "data_set_3"),
+                                       os.path.join(args.data_dir, "dynamic", "sign_labels", "sign_labels_3.csv")),
+                                   SignDetectorStatic(args.static_model, args.backend),
+                                   SignDetectorDynamic(args.dynamic_model, args.backend),
+                                   threaded=args.threaded,
+                                   stabilizer=PredictionStabilizer(),
+                                   record_latencies=True)
+    stats = pipeline.run(max_frames=args.max_frames, sink=NullSink(read_scripted_keys(args)))
+
+    report = {
+        'source': args.source,
+        'threaded': stats['threaded'],
+        'frames_captured': stats['frames_captured'],
+        'frames_inferred': stats['frames_inferred'],
+        'frames_rendered': stats['frames_rendered'],
+        'frames_dropped': stats['frames_dropped'],
+        'seconds': stats['seconds'],
+        'fps': stats['fps'],
+        'latency_ms': stats['latency_ms'],
+        'final_mode': app_mode.MODE,
+        'word': app_mode.WORD,
+        'sentence': app_mode.SENTENCE
+    }
+
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
@@ -0,0 +1,127 @@
+import argparse
+import os
+import time
+import tracemalloc
+import numpy as np
+
+from ApplicationMode import ApplicationMode
+from DataManipulator import DataManipulatorDynamic
+from SignDetector import SignDetectorDynamic
+from SignSession import SessionManager
+
+# memory and cost of the sessions of many signers sharing one SignDetectorDynamic and one ApplicationMode:
+#   - memory per session(traced by tracemalloc) vs one SignDetectorDynamic + ApplicationMode per signer
+#   - time to create and to evict a session
+#   - frames/s with --signers signers sending their frames in turns, and the labels are checked against
+#     a detector used by a single signer
+#   - the memory stays bounded when many more signers than --max-sessions come and go
+# usage: python benchmark_sessions.py [--sessions 10000] [--signers 100] [--streaming] [--dynamic-model model.h5]
+
+
+def traced_bytes(create):
+    """
+    :param create: function, creates the objects to be measured.
+    :return: int, the bytes still allocated by create once it returned(while its result is kept).
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = create()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+
+    return after - before
+
+
+def feed_signers(session_manager, sign_detector, app_mode, dm, frames, number_of_signers):
+    """
+    This function is used to give the frames of every signer to the shared detector, the signers take turns.
+    :return labels: dict, {signer: the label of every frame}.
+    """
+    labels = {signer: [] for signer in range(number_of_signers)}
+    accepted_word_labels = dm.sign_labels
+    for frame_index in range(len(frames)):
+        for signer in range(number_of_signers):
+            session = session_manager.get_session(signer)
+            label, confidence = sign_detector.get_label_and_prediction(frames[frame_index, signer], dm,
+                                                                        session.sequence)
+            stable_label = session.stabilizer.update(label, confidence)
+            app_mode.use_session(session)
+            if stable_label is not None:
+                app_mode.create_word(stable_label, accepted_word_labels)
+            labels[signer].append(label)
+
+    return labels
+
+
+if __name__ == "__main__":
+
+    base_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..')
+
+    parser = argparse.ArgumentParser(description="Measure the memory and the cost of the signer sessions.")
+    parser.add_argument("--sessions", type=int, default=10000, help="sessions created for the memory measurement")
+    parser.add_argument("--signers", type=int, default=100, help="signers sharing the detector")
+    parser.add_argument("--frames", type=int, default=120, help="frames of every signer")
+    parser.add_argument("--streaming", action="store_true", help="use the streaming mode of SignDetectorDynamic")
+    parser.add_argument("--prediction-stride", type=int, default=5)
+    parser.add_argument("--dynamic-model",
+                        default=os.path.join(base_dir, "models", "dynamic", "model_dynamic_2_2.h5"))
+    parser.add_argument("--dynamic-sign-labels",
+                        default=os.path.join(base_dir, "data", "dynamic", "sign_labels", "sign_labels_3.csv"))
+    args = parser.parse_args()
+
+    def create_sign_detector():
+        return SignDetectorDynamic(args.dynamic_model, 'numpy', streaming=args.streaming,
+                                   prediction_stride=args.prediction_stride)
+
+    sign_detector_dynamic = create_sign_detector()
+    dm = DataManipulatorDynamic(None, args.dynamic_sign_labels)
+
+    # memory
+    detector_bytes = traced_bytes(lambda: (create_sign_detector(), ApplicationMode()))
+    session_manager = SessionManager(sign_detector_dynamic, max_sessions=args.sessions)
+    sessions_bytes = traced_bytes(lambda: [session_manager.get_session(i) for i in range(args.sessions)])
+    print(f"one detector + ApplicationMode per signer: {detector_bytes / 1024:9.1f} KiB/signer")
+    print(f"one session per signer:                    {sessions_bytes / args.sessions / 1024:9.1f} KiB/signer "
+          f"({args.sessions} sessions)")
+
+    # create / evict
+    session_manager = SessionManager(sign_detector_dynamic, max_sessions=args.sessions)
+    start_time = time.perf_counter()
+    for i in range(args.sessions):
+        session_manager.get_session(i, timestamp=0.0)
+    create_seconds = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    session_manager.evict_idle_sessions(timestamp=session_manager.idle_timeout)
+    evict_seconds = time.perf_counter() - start_time
+    print(f"create {create_seconds / args.sessions * 1e6:6.1f} us/session, "
+          f"evict {evict_seconds / args.sessions * 1e6:6.1f} us/session, left: {len(session_manager)}")
+
+    # many signers, one detector
+    frames = np.random.default_rng(22).uniform(-0.3, 0.3, (args.frames, args.signers, 21 * 2)).astype(np.float32)
+    app_mode = ApplicationMode()
+    app_mode.MODE = '5'
+    session_manager = SessionManager(sign_detector_dynamic, max_sessions=args.sessions)
+    start_time = time.perf_counter()
+    labels = feed_signers(session_manager, sign_detector_dynamic, app_mode, dm, frames, args.signers)
+    seconds = time.perf_counter() - start_time
+    print(f"{args.signers} signers: {args.frames * args.signers / seconds:9.1f} frames/s with one detector")
+
+    for signer in (0, args.signers - 1):
+        single_signer_detector = create_sign_detector()
+        single_signer_labels = [single_signer_detector.get_label_and_prediction(landmarks, dm)[0]
+                                for landmarks in frames[:, signer]]
+        print(f"signer {signer}: same labels as alone: {single_signer_labels == labels[signer]}")
+
+    # bounded memory, 5 times more signers than sessions
+    max_sessions = max(args.sessions // 10, 1)
+    session_manager = SessionManager(sign_detector_dynamic, max_sessions=max_sessions)
+    tracemalloc.start()
+    for i in range(5 * max_sessions):
+        session_manager.get_session(i)
+        if i == max_sessions - 1:
+            full_bytes = tracemalloc.get_traced_memory()[0]
+    print(f"{5 * max_sessions} signers, max {max_sessions} sessions: {len(session_manager)} sessions, "
+          f"{session_manager.sessions_evicted} evicted, memory {full_bytes / 2 ** 20:.1f} MiB when full, "
+          f"{tracemalloc.get_traced_memory()[0] / 2 ** 20:.1f} MiB at the end")
+    tracemalloc.stop()
@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+# time-to-first-frame and peak RSS of the application startup, every measurement in a new Python process:
+#   - eager: MediaPipe and both sign models are loaded before the first frame, like app.py used to
+#   - lazy: MediaPipe is loaded on a background thread, the sign models after the first frame(PREFETCH_MODELS)
+# the time is measured from the start of the process, the peak RSS(ru_maxrss) at the first frame and once
+# every model is loaded and MediaPipe processed a frame
+# usage: python benchmark_startup.py [--source video.mp4] [--runs 3] [--backend numpy]
+
+
+def get_peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kilobytes on Linux
+
+
+def run_child(args):
+    """
+    This function is used by the measured process: it starts the application headless, displays one
+    frame, waits for all the models and prints the measurements as JSON.
+    """
+    from HandsDetector import HandsDetector
+    from ApplicationMode import ApplicationMode
+    from DataManipulator import DataManipulatorStatic, DataManipulatorDynamic
+    from SignDetector import SignDetectorStatic, SignDetectorDynamic, LazySignDetector
+    from FrameSource import create_frame_source
+    from FrameSink import NullSink
+    from Pipeline import RecognitionPipeline
+
+    lazy = args.child == 'lazy'
+    hands_detector = HandsDetector(min_detection_confidence=0.5,
+                                   min_tracking_confidence=0.5,
+                                   max_num_hands=1,
+                                   load_in_background=lazy)
+
+    def create_sign_detector_static():
+        return SignDetectorStatic(args.static_model, args.backend)
+
+    def create_sign_detector_dynamic():
+        return SignDetectorDynamic(args.dynamic_model, args.backend)
+
+    if lazy:
+        sign_detector_static = LazySignDetector(create_sign_detector_static, "static sign detector")
+        sign_detector_dynamic = LazySignDetector(create_sign_detector_dynamic, "dynamic sign detector")
+    else:
+        sign_detector_static = create_sign_detector_static()
+        sign_detector_dynamic = create_sign_detector_dynamic()
+
+    pipeline = RecognitionPipeline(create_frame_source(args.source), hands_detector, ApplicationMode(),
+                                   DataManipulatorStatic(None, None), DataManipulatorDynamic(None, None),
+                                   sign_detector_static, sign_detector_dynamic,
+                                   threaded=False, prefetch_models=True)
+    pipeline.run(max_frames=1, sink=NullSink())
+    first_frame_time = time.time()
+    first_frame_rss = get_peak_rss_mb()
+
+    hands_detector.ready.wait()
+    if lazy:
+        sign_detector_static.wait()
+        sign_detector_dynamic.wait()
+    # one frame through MediaPipe, the eager process already did it for its first frame
+    hands_detector.mediapipe_hands_detect(create_frame_source(args.source).read())
+
+    print(json.dumps({'first_frame_time': first_frame_time, 'first_frame_peak_rss_mb': first_frame_rss,
+                      'ready_time': time.time(), 'ready_peak_rss_mb': get_peak_rss_mb()}))
+
+
+def measure(mode, args):
+    """
+    :return: dict, the measurements of one process, the times in seconds from the start of the process.
+    """
+    command = [sys.executable, os.path.realpath(__file__), '--child', mode, '--source', args.source,
+               '--backend', args.backend, '--static-model', args.static_model, '--dynamic-model', args.dynamic_model]
+    start_time = time.time()
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    child_stats = json.loads(output.strip().splitlines()[-1])
+
+    return {'time_to_first_frame': child_stats['first_frame_time'] - start_time,
+            'time_to_ready': child_stats['ready_time'] - start_time,
+            'first_frame_peak_rss_mb': child_stats['first_frame_peak_rss_mb'],
+            'ready_peak_rss_mb': child_stats['ready_peak_rss_mb']}
+
+
+if __name__ == "__main__":
+
+    base_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..')
+
+    parser = argparse.ArgumentParser(description="Measure the time-to-first-frame and the peak RSS at startup.")
+    parser.add_argument("--source", default="synthetic", help="see FrameSource.create_frame_source")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--backend", default='numpy', help="see SignDetector.INFERENCE_BACKENDS")
+    parser.add_argument("--static-model",
+                        default=os.path.join(base_dir, "models", "static", "model_static_5_1.h5"))
+    parser.add_argument("--dynamic-model",
+                        default=os.path.join(base_dir, "models", "dynamic", "model_dynamic_2_2.h5"))
+    parser.add_argument("--child", choices=['eager', 'lazy'], default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        run_child(args)
+        sys.exit(0)
+
+    for mode in ('eager', 'lazy'):
+        runs = [measure(mode, args) for _ in range(args.runs)]
+        best = min(runs, key=lambda run: run['time_to_first_frame'])
+        print(f"{mode:>5}: first frame {best['time_to_first_frame']:6.2f} s "
+              f"(peak RSS {best['first_frame_peak_rss_mb']:7.1f} MB), "
+              f"all models loaded {best['time_to_ready']:6.2f} s "
+              f"(peak RSS {best['ready_peak_rss_mb']:7.1f} MB), best of {args.runs}")
@@ -36,12 +36,12 @@ if __name__ == "__main__":
         mediapipe_results = hands_detector.mediapipe_hands_detect(frame)
 
         if mediapipe_results.multi_hand_landmarks is not None:
-            landmarks_dictionary = data_manipulator_static.convert_detected_landmarks_to_dict(mediapipe_results)
+            landmarks = data_manipulator_static.convert_detected_landmarks_to_array(mediapipe_results)
 
             frame1 = hands_detector.draw_hands_landmarks(frame1, mediapipe_results)
-            # frame1 = hands_detector.draw_original_coord(frame.copy(), landmarks_dictionary)
-            # frame2 = hands_detector.draw_normalized_coord(frame.copy(), landmarks_dictionary)
-            # frame3 = hands_detector.draw_normalized_to_wrist_coord(frame.copy(), landmarks_dictionary)
+            # frame1 = hands_detector.draw_original_coord(frame.copy(), landmarks)
+            # frame2 = hands_detector.draw_normalized_coord(frame.copy(), landmarks)
+            # frame3 = hands_detector.draw_normalized_to_wrist_coord(frame.copy(), landmarks)
 
             if key_input == ord('c'):
                 cv.imwrite(frame_save_file_path + f"\\semn_{TAKE}.jpg", frame1)
@@ -0,0 +1,295 @@
+import argparse
+import glob
+import os
+import time
+import numpy as np
+
+from ApplicationMode import ApplicationMode
+from DataManipulator import DataManipulatorDynamic
+from PredictionStabilizer import PredictionStabilizer
+from Profiler import Profiler
+from SignDetector import SignDetectorDynamic
+from SignSpotter import SignSpotter, resample_sequence
+
+# word-level precision/recall and compute of the sentence mode for dynamic signs on continuous streams:
+#   - every frame: SignDetectorDynamic on the last 30 frames of every frame + PredictionStabilizer(the old way)
+#   - spotting: SignSpotter, the detector only runs on the segments found from the speed and the confidence
+# the words typed by ApplicationMode are matched with the signed ones: a typed word is correct if it is the
+# same sign and it is typed between the start of the sign and --tolerance seconds after its end
+# the streams are recorded .npz files(--streams) or are made from the sequences of the dynamic data set:
+# the signer rests between the signs(or drops the hand), moves to the next sign and sometimes signs two
+# words without a rest, every sign is time-warped, the wrist moves in the frame and the landmarks in the frame
+# are jittered like the MediaPipe ones
+# the spotter measures the speed on the landmarks in the frame, like RecognitionPipeline.infer
+# stream .npz: landmarks (frames, 42) normalized, frame_landmarks (frames, 42) in the frame, detected (frames,),
+#              timestamps (frames,) in seconds, word_labels (words,), word_starts (words,), word_ends (words,)
+#              in seconds
+# usage: python evaluate_sign_spotting.py [--number-of-streams 10 --words 20 --fps 30] [--save-streams dir] [--streaming]
+#        python evaluate_sign_spotting.py --streams recorded/*.npz
+JITTER = 0.0015  # standard deviation of the MediaPipe landmarks of a resting hand
+
+
+def load_sequences(data_set_path, sign_labels):
+    """
+    :return: dict, {sign label: list of (30, 42) sequences} of the dynamic data set directory.
+    """
+    sequences = {}
+    for sign_label in sign_labels:
+        file_paths = sorted(glob.glob(os.path.join(data_set_path, sign_label, "*.npy")))
+        if file_paths:
+            sequences[sign_label] = [np.load(file_path).astype(np.float32) for file_path in file_paths]
+
+    return sequences
+
+
+def make_stream(sequences, number_of_words, fps, rng):
+    """
+    This function is used to make a continuous stream of signs from the sequences of the data set.
+    The sequences are normalized(the wrist is the origin), so the wrist is moved in the frame: to the
+    start of every sign, along a path during the sign and it rests with the hand. The jitter is added
+    to the landmarks in the frame and the normalized ones are computed from them, like in the pipeline.
+    :param sequences: dict, {sign label: list of sequences}.
+    :param number_of_words: int, the number of signs in the stream.
+    :param fps: float, the frame rate of the stream.
+    :param rng: np.random.Generator, the random generator.
+    :return stream: dict, the stream, like a recorded stream file.
+    """
+    sign_labels = list(sequences)
+    poses = []
+    wrists = []
+    detected = []
+    word_labels, word_starts, word_ends = [], [], []
+
+    def add_frames(new_poses, new_wrists, hand_detected=True):
+        poses.extend(new_poses)
+        wrists.extend(new_wrists)
+        detected.extend([hand_detected] * len(new_poses))
+
+    def number_of_frames(low_seconds, high_seconds):
+        return max(int(rng.uniform(low_seconds, high_seconds) * fps), 1)
+
+    def get_sign_position():
+        return rng.uniform([0.35, 0.35], [0.65, 0.6])
+
+    sequence = sequences[sign_labels[0]][0]
+    wrist = get_sign_position()
+    length = number_of_frames(0.5, 1.0)
+    add_frames([sequence[0]] * length, [wrist] * length)
+    for _ in range(number_of_words):
+        sign_label = sign_labels[rng.integers(len(sign_labels))]
+        sequence = sequences[sign_label][rng.integers(len(sequences[sign_label]))]
+
+        # moving the hand from the last pose to the start of the sign, into the frame from the bottom edge
+        # if it was dropped
+        sign_position = get_sign_position()
+        transition_length = number_of_frames(0.15, 0.35)
+        weights = np.linspace(0, 1, transition_length + 2, dtype=np.float32)[1:-1, np.newaxis]
+        previous_pose, previous_wrist = (poses[-1], wrists[-1]) if detected[-1] else \
+            (sequence[0], np.array([sign_position[0], 1.0]))
+        add_frames(list(previous_pose * (1 - weights) + sequence[0] * weights),
+                   list(previous_wrist * (1 - weights) + sign_position * weights))
+
+        # the sign, time-warped, the wrist moves along a curve and sometimes back and forth
+        sign_length = number_of_frames(0.8, 1.3)
+        progress = np.linspace(0, 1, sign_length)[:, np.newaxis]
+        direction = rng.normal(size=2)
+        direction /= np.linalg.norm(direction)
+        displacement = direction * rng.uniform(0.02, 0.12)
+        swing = direction[::-1] * [1, -1] * rng.uniform(0, 0.03)
+        word_labels.append(sign_label)
+        word_starts.append(len(poses) / fps)
+        add_frames(list(resample_sequence(sequence, np.arange(len(sequence), dtype=np.float64), sign_length)),
+                   list(sign_position + displacement * (3 * progress ** 2 - 2 * progress ** 3) +
+                        swing * np.sin(2 * np.pi * rng.integers(1, 3) * progress)))
+        word_ends.append((len(poses) - 1) / fps)
+
+        # a rest, the hand dropped or straight to the next sign
+        pause = rng.random()
+        if pause < 0.2:
+            length = number_of_frames(0.3, 0.8)
+            add_frames([np.zeros_like(sequence[0])] * length, [np.zeros(2)] * length, hand_detected=False)
+        elif pause < 0.85:
+            length = number_of_frames(0.4, 1.0)
+            add_frames([poses[-1]] * length, [wrists[-1]] * length)
+    length = number_of_frames(0.5, 1.0)
+    if detected[-1]:
+        add_frames([poses[-1]] * length, [wrists[-1]] * length)
+    else:
+        add_frames([sequence[-1]] * length, [get_sign_position()] * length)
+
+    detected = np.array(detected, dtype=bool)
+    frame_landmarks = np.array(poses, dtype=np.float32).reshape(len(poses), -1, 2) + \
+        np.array(wrists, dtype=np.float32)[:, np.newaxis]
+    frame_landmarks[detected] += rng.normal(0, JITTER, frame_landmarks[detected].shape).astype(np.float32)
+    frame_landmarks[~detected] = 0
+    landmarks = frame_landmarks - frame_landmarks[:, :1]
+
+    return {'landmarks': landmarks.reshape(len(poses), -1),
+            'frame_landmarks': frame_landmarks.reshape(len(poses), -1),
+            'detected': detected, 'timestamps': np.arange(len(poses)) / fps,
+            'word_labels': np.array(word_labels), 'word_starts': np.array(word_starts),
+            'word_ends': np.array(word_ends)}
+
+
+def type_words(stream, get_sentence_label, accepted_word_labels, wait=True):
+    """
+    This function is used to feed a stream to the sentence mode, like RecognitionPipeline.render.
+    :param stream: dict, the stream.
+    :param get_sentence_label: function, (normalized landmarks or None, landmarks in the frame or None,
+    timestamp) -> the sign label for the sentence mode or None.
+    :param accepted_word_labels: list, the sign labels typed as words.
+    :param wait: bool, wait the insert delay of ApplicationMode between two words.
+    :return: (list of (float, str), float), the time and the label of every typed word and the seconds spent.
+    """
+    app_mode = ApplicationMode()
+    app_mode.MODE = '5'
+    app_mode.SENTENCE_MODE = True
+    typed_words = []
+
+    start_time = time.perf_counter()
+    for landmarks, frame_landmarks, detected, timestamp in zip(stream['landmarks'], stream['frame_landmarks'],
+                                                               stream['detected'], stream['timestamps']):
+        if detected:
+            sentence_label = get_sentence_label(landmarks, frame_landmarks, timestamp)
+        else:
+            sentence_label = get_sentence_label(None, None, timestamp)
+        if sentence_label is not None:
+            word = app_mode.WORD
+            app_mode.create_word(sentence_label, accepted_word_labels, timestamp, wait)
+            if app_mode.WORD != word:
+                typed_words.append((timestamp, sentence_label))
+                app_mode.WORD = ""  # only the new words are compared
+
+    return typed_words, time.perf_counter() - start_time
+
+
+def match_words(typed_words, stream, tolerance):
+    """
+    This function is used to match the typed words with the signed ones, in time order, each signed word once.
+    :return: int, the number of correct typed words.
+    """
+    matched = np.zeros(len(stream['word_labels']), dtype=bool)
+    correct = 0
+    for timestamp, label in typed_words:
+        for i, word_label in enumerate(stream['word_labels']):
+            if not matched[i] and word_label == label and \
+                    stream['word_starts'][i] <= timestamp <= stream['word_ends'][i] + tolerance:
+                matched[i] = True
+                correct += 1
+                break
+
+    return correct
+
+
+def evaluate(streams, create_get_sentence_label, wait, profiler, accepted_word_labels, tolerance):
+    """
+    This function is used to run one method on all the streams.
+    :return: dict, the precision, the recall and the compute per minute of video.
+    """
+    typed = correct = signed = 0
+    seconds = video_seconds = 0.0
+    for stream in streams:
+        typed_words, stream_seconds = type_words(stream, create_get_sentence_label(), accepted_word_labels, wait)
+        typed += len(typed_words)
+        correct += match_words(typed_words, stream, tolerance)
+        signed += len(stream['word_labels'])
+        seconds += stream_seconds
+        video_seconds += stream['timestamps'][-1] - stream['timestamps'][0]
+
+    classifier_calls = classifier_seconds = 0
+    for stats in profiler.get_stats().values():
+        classifier_calls += stats['count']
+        classifier_seconds += stats['count'] * stats['mean'] / 1000
+    minutes = video_seconds / 60
+    precision = correct / typed if typed != 0 else 0.0
+    recall = correct / signed
+
+    return {'typed': typed, 'signed': signed, 'precision': precision, 'recall': recall,
+            'f1': 2 * precision * recall / max(precision + recall, 1e-9),
+            'calls_per_minute': classifier_calls / minutes, 'classifier_seconds_per_minute': classifier_seconds / minutes,
+            'seconds_per_minute': seconds / minutes}
+
+
+if __name__ == "__main__":
+
+    base_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..')
+
+    parser = argparse.ArgumentParser(description="Measure the word precision/recall and the compute of sign spotting.")
+    parser.add_argument("--streams", nargs='+', default=None, help="recorded stream .npz files")
+    parser.add_argument("--data-set", default=os.path.join(base_dir, "data", "dynamic", "data_set", "data_set_3"),
+                        help="dynamic data set directory the streams are made from")
+    parser.add_argument("--number-of-streams", type=int, default=10)
+    parser.add_argument("--words", type=int, default=20, help="signs in every made stream")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--save-streams", default=None, help="directory to save the made streams in")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="seconds after a sign its word may be typed")
+    parser.add_argument("--seed", type=int, default=55)
+    parser.add_argument("--backend", default='numpy')
+    parser.add_argument("--streaming", action="store_true",
+                        help="run the every frame method in the streaming mode of SignDetectorDynamic, like app.py")
+    parser.add_argument("--dynamic-model",
+                        default=os.path.join(base_dir, "models", "dynamic", "model_dynamic_2_2.h5"))
+    parser.add_argument("--dynamic-sign-labels",
+                        default=os.path.join(base_dir, "data", "dynamic", "sign_labels", "sign_labels_3.csv"))
+    args = parser.parse_args()
+
+    dm = DataManipulatorDynamic(None, args.dynamic_sign_labels)
+    accepted_word_labels = dm.sign_labels
+
+    if args.streams is not None:
+        streams = [dict(np.load(stream_path)) for stream_path in args.streams]
+        for stream_path, stream in zip(args.streams, streams):
+            if 'frame_landmarks' not in stream:
+                raise ValueError(f"Error: The stream '{stream_path}' has no frame_landmarks, "
+                                 f"the speed of the spotter is measured on the landmarks in the frame")
+    else:
+        rng = np.random.default_rng(args.seed)
+        sequences = load_sequences(args.data_set, dm.sign_labels)
+        streams = [make_stream(sequences, args.words, args.fps, rng) for _ in range(args.number_of_streams)]
+        if args.save_streams is not None:
+            os.makedirs(args.save_streams, exist_ok=True)
+            for i, stream in enumerate(streams):
+                np.savez(os.path.join(args.save_streams, f"stream_{i}.npz"), **stream)
+    minutes = sum(stream['timestamps'][-1] - stream['timestamps'][0] for stream in streams) / 60
+    print(f"{len(streams)} streams, {sum(len(stream['word_labels']) for stream in streams)} signs, "
+          f"{minutes:.1f} minutes of video")
+
+    sign_detector_dynamic = SignDetectorDynamic(args.dynamic_model, args.backend, streaming=args.streaming)
+    timed_methods = ('make_prediction', 'make_streaming_prediction', 'make_batch_prediction')
+
+    def every_frame():
+        sign_detector_dynamic.reset_sequence()
+        stabilizer = PredictionStabilizer()
+
+        def get_sentence_label(landmarks, frame_landmarks, timestamp):
+            label = confidence = None
+            if landmarks is not None:
+                label, confidence = sign_detector_dynamic.get_label_and_prediction(landmarks, dm)
+            return stabilizer.update(label, confidence, timestamp)
+
+        return get_sentence_label
+
+    def spotting():
+        sign_spotter = SignSpotter(sign_detector_dynamic)
+
+        def get_sentence_label(landmarks, frame_landmarks, timestamp):
+            # the speed is measured on the landmarks in the frame, like RecognitionPipeline.infer
+            spotted_sign = sign_spotter.update(landmarks, dm, timestamp, landmarks=frame_landmarks)
+            return spotted_sign.label if spotted_sign is not None else None
+
+        return get_sentence_label
+
+    # a spotted sign is given out once, it does not wait for the insert delay
+    for name, create_get_sentence_label, wait in (('every frame', every_frame, True), ('spotting', spotting, False)):
+        profiler = Profiler()
+        for method_name in timed_methods:
+            profiler.wrap_method(sign_detector_dynamic, method_name)
+        result = evaluate(streams, create_get_sentence_label, wait, profiler, accepted_word_labels, args.tolerance)
+        for method_name in timed_methods:
+            del sign_detector_dynamic.__dict__[method_name]
+
+        print(f"{name:>11}: {result['typed']:4d} typed words for {result['signed']} signs, "
+              f"precision {result['precision']:.3f}, recall {result['recall']:.3f}, F1 {result['f1']:.3f} | "
+              f"{result['calls_per_minute']:7.1f} model calls/min, "
+              f"{result['classifier_seconds_per_minute']:6.2f} s model/min, "
+              f"{result['seconds_per_minute']:6.2f} s total/min of video")
@@ -0,0 +1,211 @@
+import argparse
+import multiprocessing
+import os
+import time
+import cv2 as cv
+import numpy as np
+
+from DataManipulator import DataManipulatorStatic
+from HandsDetector import HandsDetector
+
+# offline landmark extraction from labelled video files and image folders, without a webcam:
+#   input_dir/<sign label>/<video file>         one clip
+#   input_dir/<sign label>/<folder of images>   one clip, the images sorted by name are its frames
+#   input_dir/<sign label>/<image file>         one static sample
+# static: every detected frame becomes a row of the data set CSV file
+# dynamic: every number_of_frames consecutive detected frames become a .npy sequence
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.webm', '.mpg', '.mpeg'}
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+
+# one MediaPipe hands model per worker process, created by init_worker
+worker_settings = {}
+worker_image_detector = None
+
+
+def init_worker(settings):
+    """
+    This function is used to set up a worker process of the pool.
+    :param settings: dict, the detection settings shared by all the clips.
+    """
+    global worker_settings, worker_image_detector
+    worker_settings = settings
+    # images are unrelated to each other, so they are detected in static image mode
+    worker_image_detector = create_hands_detector(static_image_mode=True)
+
+
+def create_hands_detector(static_image_mode):
+    return HandsDetector(min_detection_confidence=worker_settings['min_detection_confidence'],
+                         min_tracking_confidence=worker_settings['min_tracking_confidence'],
+                         max_num_hands=1,
+                         static_image_mode=static_image_mode)
+
+
+def read_clip_frames(clip_path):
+    """
+    This function is used to read the frames of a clip.
+    :param clip_path: str, path to a video file, a folder of images or one image.
+    :return: generator of np.array, the BGR frames of the clip.
+    """
+    if os.path.isdir(clip_path):
+        for file_name in sorted(os.listdir(clip_path)):
+            if os.path.splitext(file_name)[1].lower() in IMAGE_EXTENSIONS:
+                yield cv.imread(os.path.join(clip_path, file_name))
+    elif os.path.splitext(clip_path)[1].lower() in IMAGE_EXTENSIONS:
+        yield cv.imread(clip_path)
+    else:
+        cap = cv.VideoCapture(clip_path)
+        frame_index = 0
+        while True:
+            success, frame = cap.read()
+            if not success:
+                break
+            if frame_index % worker_settings['frame_step'] == 0:
+                yield frame
+            frame_index += 1
+        cap.release()
+
+
+def extract_clip(task):
+    """
+    This function is used by the workers to extract the normalized landmarks of one clip.
+    :param task: (int, str), the sign label index and the path to the clip.
+    :return: (int, str, np.array, np.array), the sign label index, the clip path, the (frames, 42)
+    normalized landmarks and a bool mask of the frames where a hand was detected.
+    """
+    sign_labels_index, clip_path = task
+    is_video = os.path.splitext(clip_path)[1].lower() in VIDEO_EXTENSIONS
+
+    # a video is tracked from frame to frame, so it gets a fresh model without state from other clips
+    hands_detector = create_hands_detector(static_image_mode=False) if is_video else worker_image_detector
+    data_manipulator = DataManipulatorStatic(None, None)
+
+    landmarks = []
+    detected = []
+    for frame in read_clip_frames(clip_path):
+        mediapipe_results = None if frame is None else hands_detector.mediapipe_hands_detect(frame)
+        if mediapipe_results is not None and mediapipe_results.multi_hand_landmarks is not None:
+            landmarks_array = data_manipulator.convert_detected_landmarks_to_array(mediapipe_results)
+            landmarks.append(data_manipulator.normalize_landmarks_array(landmarks_array).copy())
+            detected.append(True)
+        else:
+            landmarks.append(np.zeros(21 * 2, dtype=np.float32))
+            detected.append(False)
+
+    if is_video:
+        hands_detector.model.close()
+
+    return (sign_labels_index, clip_path,
+            np.array(landmarks, dtype=np.float32).reshape(-1, 21 * 2), np.array(detected, dtype=bool))
+
+
+def split_into_sequences(landmarks, detected, number_of_frames, sequence_step):
+    """
+    This function is used to cut the landmarks of a clip into sequences of consecutive detected frames.
+    :param landmarks: np.array, (frames, 42) the normalized landmarks of the clip.
+    :param detected: np.array, (frames,) True where a hand was detected.
+    :param number_of_frames: int, the number of frames in a sequence.
+    :param sequence_step: int, the number of frames between the starts of two sequences.
+    :return: list of np.array, the (number_of_frames, 42) sequences.
+    """
+    sequences = []
+    # the number of consecutive detected frames that end at each frame
+    run_length = np.zeros(len(detected) + 1, dtype=np.int64)
+    for i, is_detected in enumerate(detected):
+        run_length[i + 1] = run_length[i] + 1 if is_detected else 0
+
+    start = 0
+    while start + number_of_frames <= len(detected):
+        if run_length[start + number_of_frames] >= number_of_frames:
+            sequences.append(landmarks[start:start + number_of_frames])
+            start += sequence_step
+        else:
+            start += 1
+
+    return sequences
+
+
+def find_clips(input_dir, sign_labels):
+    """
+    This function is used to list the clips of every sign label directory.
+    :param input_dir: str, the directory with one subdirectory for each sign label.
+    :param sign_labels: list, the sign labels, in the order of the sign labels file.
+    :return tasks: list of (int, str), the sign label index and the path of every clip.
+    """
+    tasks = []
+    for label_dir in sorted(os.listdir(input_dir)):
+        if not os.path.isdir(os.path.join(input_dir, label_dir)):
+            continue
+        if label_dir not in sign_labels:
+            raise ValueError(f"Error: Sign label '{label_dir}' is not in the sign labels file!")
+
+        for clip_name in sorted(os.listdir(os.path.join(input_dir, label_dir))):
+            clip_path = os.path.join(input_dir, label_dir, clip_name)
+            extension = os.path.splitext(clip_name)[1].lower()
+            if os.path.isdir(clip_path) or extension in VIDEO_EXTENSIONS | IMAGE_EXTENSIONS:
+                tasks.append((sign_labels.index(label_dir), clip_path))
+
+    return tasks
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Extract static(.csv) or dynamic(.npy) landmark data sets "
+                                                 "from labelled video files and image folders.")
+    parser.add_argument("data_type", choices=["static", "dynamic"])
+    parser.add_argument("input_dir", help="directory with one subdirectory of clips for each sign label")
+    parser.add_argument("output", help="static: data set .csv file(rows are appended), "
+                                       "dynamic: data set directory(data_set_N)")
+    parser.add_argument("--sign-labels", required=True, help="the sign labels file(.csv)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--frame-step", type=int, default=1, help="use every N-th frame of the videos")
+    parser.add_argument("--number-of-frames", type=int, default=30, help="frames in a dynamic sequence")
+    parser.add_argument("--sequence-step", type=int, default=None,
+                        help="frames between the starts of two dynamic sequences(default: number of frames)")
+    parser.add_argument("--min-detection-confidence", type=float, default=0.5)
+    parser.add_argument("--min-tracking-confidence", type=float, default=0.5)
+    args = parser.parse_args()
+
+    with open(args.sign_labels, 'r') as file:
+        sign_labels = file.read().splitlines()
+
+    tasks = find_clips(args.input_dir, sign_labels)
+    settings = {'min_detection_confidence': args.min_detection_confidence,
+                'min_tracking_confidence': args.min_tracking_confidence,
+                'frame_step': args.frame_step}
+    sequence_step = args.sequence_step or args.number_of_frames
+
+    # the next .npy file index of every sign label, following the files that already exist
+    next_sequence_index = {}
+    if args.data_type == "dynamic":
+        for sign_label in sign_labels:
+            os.makedirs(os.path.join(args.output, sign_label), exist_ok=True)
+            next_sequence_index[sign_label] = len(os.listdir(os.path.join(args.output, sign_label)))
+
+    start_time = time.perf_counter()
+    number_of_frames = number_of_samples = 0
+
+    # MediaPipe is not safe to fork, every worker starts a fresh interpreter
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(args.workers, initializer=init_worker, initargs=(settings,)) as pool, \
+            open(args.output if args.data_type == "static" else os.devnull, 'a') as csv_file:
+        # the results come back in the order of the tasks, so the output is deterministic
+        for sign_labels_index, clip_path, landmarks, detected in pool.imap(extract_clip, tasks):
+            number_of_frames += len(detected)
+
+            if args.data_type == "static":
+                for row in landmarks[detected]:
+                    csv_file.write(f"{sign_labels_index}," + ','.join(str(value) for value in row) + '\n')
+                    number_of_samples += 1
+            else:
+                sign_label = sign_labels[sign_labels_index]
+                for sequence in split_into_sequences(landmarks, detected, args.number_of_frames, sequence_step):
+                    np.save(os.path.join(args.output, sign_label, f"{next_sequence_index[sign_label]}.npy"),
+                            sequence)
+                    next_sequence_index[sign_label] += 1
+                    number_of_samples += 1
+
+            print(f"{clip_path}: {int(detected.sum())}/{len(detected)} frames with a hand")
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Extracted {number_of_samples} {args.data_type} samples from {len(tasks)} clips "
+          f"({number_of_frames} frames) in {elapsed:.1f} s, {number_of_frames / max(elapsed, 1e-9):.1f} frames/s")
@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+
+# load generator for RecognitionServer.py: N concurrent clients, every client sends a request and waits for
+# its response before sending the next one(like a kiosk sending its frames), with random normalized landmarks
+# reports the throughput, the p50/p95/p99 latency and the mean batch size of the server for every number of clients
+# usage: python RecognitionServer.py &
+#        python load_generator.py [--clients 1 2 4 8 16 32 64] [--duration 5] [--kind static|dynamic]
+#        python RecognitionServer.py --number-of-hands 2 & python load_generator.py --number-of-hands 2
+#        python load_generator.py --unix-socket /tmp/sign.sock --output load.json
+
+
+async def open_connection(args):
+    if args.unix_socket is not None:
+        return await asyncio.open_unix_connection(args.unix_socket)
+
+    return await asyncio.open_connection(args.host, args.port)
+
+
+async def send_request(reader, writer, request):
+    """
+    :return response: dict, the decoded response of the server.
+    """
+    writer.write((json.dumps(request) + '\n').encode())
+    await writer.drain()
+
+    return json.loads(await reader.readline())
+
+
+async def run_client(args, client_id, stop_time, latencies, errors):
+    """
+    This function is used by one client to send requests until stop_time.
+    """
+    reader, writer = await open_connection(args)
+    rng = np.random.default_rng(client_id)
+    number_of_features = args.number_of_hands * 21 * 2
+    shape = (number_of_features,) if args.kind == 'static' else (args.number_of_frames, number_of_features)
+    request_id = 0
+    try:
+        while time.perf_counter() < stop_time:
+            request = {'id': request_id, 'kind': args.kind,
+                       'landmarks': rng.uniform(-1.0, 1.0, shape).round(4).tolist()}
+            start_time = time.perf_counter()
+            response = await send_request(reader, writer, request)
+            if 'error' in response:
+                errors.append(response['error'])
+            else:
+                latencies.append(time.perf_counter() - start_time)
+            request_id += 1
+    finally:
+        writer.close()
+
+
+async def get_server_stats(args):
+    reader, writer = await open_connection(args)
+    try:
+        return (await send_request(reader, writer, {'id': 0, 'kind': 'stats'}))['stats']
+    finally:
+        writer.close()
+
+
+async def run_load(args, number_of_clients):
+    """
+    This function is used to run number_of_clients clients for args.duration seconds.
+    :return result: dict, the throughput, the latency percentiles and the batch size.
+    """
+    stats_before = (await get_server_stats(args))[args.kind]
+    latencies = []
+    errors = []
+    stop_time = time.perf_counter() + args.duration
+    start_time = time.perf_counter()
+    await asyncio.gather(*(run_client(args, client_id, stop_time, latencies, errors)
+                           for client_id in range(number_of_clients)))
+    seconds = time.perf_counter() - start_time
+    stats_after = (await get_server_stats(args))[args.kind]
+
+    batches = stats_after['batches'] - stats_before['batches']
+    samples = stats_after['samples'] - stats_before['samples']
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000 if latencies else (0.0, 0.0, 0.0)
+
+    return {'clients': number_of_clients, 'requests': len(latencies), 'errors': len(errors),
+            'throughput': len(latencies) / seconds, 'p50_ms': float(p50), 'p95_ms': float(p95),
+            'p99_ms': float(p99), 'mean_batch_size': samples / batches if batches != 0 else 0.0}
+
+
+async def main(args):
+    results = []
+    for number_of_clients in args.clients:
+        result = await run_load(args, number_of_clients)
+        results.append(result)
+        print(f"{result['clients']:4d} clients: {result['throughput']:9.1f} req/s, "
+              f"p50 {result['p50_ms']:7.2f} ms, p95 {result['p95_ms']:7.2f} ms, p99 {result['p99_ms']:7.2f} ms, "
+              f"batch {result['mean_batch_size']:5.1f}, errors {result['errors']}")
+
+    return results
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Measure the throughput and tail latency of RecognitionServer.py.")
+    parser.add_argument("--host", default='127.0.0.1')
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", default=None, help="connect to this Unix socket instead of TCP")
+    parser.add_argument("--clients", type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds for every number of clients")
+    parser.add_argument("--kind", choices=['static', 'dynamic'], default='static')
+    parser.add_argument("--number-of-frames", type=int, default=30, help="frames in a dynamic sequence")
+    parser.add_argument("--number-of-hands", type=int, choices=[1, 2], default=1,
+                        help="the number of hands of the served models, like --number-of-hands of the server")
+    parser.add_argument("--output", default=None, help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=4)
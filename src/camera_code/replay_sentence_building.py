@@ -0,0 +1,121 @@
+import argparse
+import string
+import sys
+import numpy as np
+
+from ApplicationMode import ApplicationMode
+from PredictionStabilizer import PredictionStabilizer
+
+# replay harness for the sentence mode: the same simulated signer is replayed at several frame rates
+# and the typed word and the words per minute(measured up to the last typed letter) must come out
+# the same at every frame rate
+#   - the signer holds every letter of the text for --letter-seconds, with a short transition between letters
+#   - every frame, the simulated classifier gives a wrong letter with probability --noise
+# the old frame counting delay(30 frames, counted down by create_word and create_sentence) is replayed too,
+# for comparison
+# usage: python replay_sentence_building.py [--text HELLO] [--fps 10 15 30 60]
+TRANSITION_SECONDS = 0.2
+LETTERS = list(string.ascii_uppercase)
+
+
+def simulate_predictions(text, fps, letter_seconds, noise, seed):
+    """
+    This function is used to generate the per-frame predictions of a signer spelling the text.
+    :return: list of (float, str, float), the timestamp, the predicted label and the confidence of every frame.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    duration = len(text) * (letter_seconds + TRANSITION_SECONDS)
+
+    for frame_index in range(int(duration * fps)):
+        timestamp = frame_index / fps
+        letter_index, time_in_letter = divmod(timestamp, letter_seconds + TRANSITION_SECONDS)
+        if time_in_letter >= letter_seconds or rng.random() < noise:
+            # moving between two letters or a wrong prediction
+            frames.append((timestamp, LETTERS[rng.integers(len(LETTERS))], rng.uniform(0.3, 0.9)))
+        else:
+            frames.append((timestamp, text[int(letter_index)], rng.uniform(0.7, 1.0)))
+
+    return frames
+
+
+def replay(frames, stabilizer):
+    """
+    This function is used to feed the predictions to the sentence mode, like RecognitionPipeline.render.
+    :return: (str, float), the typed word and the time the last letter was typed.
+    """
+    app_mode = ApplicationMode()
+    app_mode.MODE = '4'
+    app_mode.SENTENCE_MODE = True
+    last_insert_time = 0.0
+
+    for timestamp, label, confidence in frames:
+        sentence_label = stabilizer.update(label, confidence, timestamp)
+        if sentence_label is not None:
+            word_length = len(app_mode.WORD)
+            app_mode.create_word(sentence_label, LETTERS, timestamp)
+            app_mode.create_sentence(sentence_label, timestamp)
+            if len(app_mode.WORD) != word_length:
+                last_insert_time = timestamp
+
+    return app_mode.WORD, last_insert_time
+
+
+def replay_frame_counting(frames):
+    """
+    This function is used to replay the old sentence mode: every prediction goes to create_word and
+    create_sentence, which both count down a 30 frames delay.
+    :return: (str, float), the typed word and the time the last letter was typed.
+    """
+    word = ""
+    last_insert_time = 0.0
+    insert_delay = 30
+    for timestamp, label, _ in frames:
+        for _ in range(2):  # create_word, then create_sentence
+            if insert_delay == 0:
+                if label in LETTERS:
+                    word += label
+                    last_insert_time = timestamp
+                    insert_delay = 30
+            else:
+                insert_delay -= 1
+
+    return word, last_insert_time
+
+
+def get_words_per_minute(word, last_insert_time):
+    return len(word) / 5 / (max(last_insert_time, 1e-9) / 60)  # 5 characters make a word
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Replay a simulated signer in the sentence mode at several FPS.")
+    parser.add_argument("--text", default="SIGNLANGUAGE")
+    parser.add_argument("--fps", type=float, nargs='+', default=[10, 15, 24, 30, 60])
+    parser.add_argument("--letter-seconds", type=float, default=1.0)
+    parser.add_argument("--noise", type=float, default=0.15, help="probability of a wrong prediction")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="largest relative difference of the WPM")
+    parser.add_argument("--seed", type=int, default=55)
+    args = parser.parse_args()
+
+    words_per_minute = []
+    passed = True
+    for fps in args.fps:
+        frames = simulate_predictions(args.text, fps, args.letter_seconds, args.noise, args.seed)
+        word, last_insert_time = replay(frames, PredictionStabilizer())
+        old_word, old_last_insert_time = replay_frame_counting(frames)
+        words_per_minute.append(get_words_per_minute(word, last_insert_time))
+
+        print(f"{fps:5.1f} FPS: '{word}' {words_per_minute[-1]:5.2f} WPM | "
+              f"frame counting: '{old_word}' {get_words_per_minute(old_word, old_last_insert_time):5.2f} WPM")
+        if word != args.text:
+            print(f"  typed '{word}' instead of '{args.text}'")
+            passed = False
+
+    spread = (max(words_per_minute) - min(words_per_minute)) / max(max(words_per_minute), 1e-9)
+    print(f"WPM spread over the frame rates: {spread:.1%}")
+    if spread > args.tolerance:
+        passed = False
+
+    print("PASSED" if passed else "FAILED")
+    sys.exit(0 if passed else 1)
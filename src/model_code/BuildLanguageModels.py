@@ -1,22 +1,31 @@
 import numpy as np
 import os
 
-# import tensorflow as tf
+import tensorflow as tf
+from abc import ABC, abstractmethod
 from sklearn.model_selection import train_test_split
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import GRU, Dense, Dropout, Input
 from tensorflow.keras.utils import to_categorical
 from tensorflow.keras.layers import PReLU
 
+from DataSetCache import load_static_data_set, load_static_data_set_matrix
+from SequenceStore import SequenceStore
 
-class Model:
-    def __init__(self, sign_labels_file_path, data_set_path, model_save_path, random_state) -> None:
+
+class Model(ABC):
+    def __init__(self, sign_labels_file_path, data_set_path, model_save_path, random_state,
+                 number_of_hands=1) -> None:
         self.sign_labels_file_path = sign_labels_file_path
         self.data_set_path = data_set_path
         self.model_save_path = model_save_path
         self.sign_labels = []
         self.random_state = random_state
 
+        # 1: (21, 2) landmarks of one hand, 2: (2, 21, 2) hand tensor, left hand first, zeros for a missing hand
+        self.number_of_hands = number_of_hands
+        self.number_of_features = number_of_hands * 21 * 2
+
         self.model = None
 
     def get_sign_labels(self):
@@ -38,21 +47,88 @@ class Model:
     def save_model(self):
         self.model.save(self.model_save_path)
 
+    @abstractmethod
+    def get_sample_reader(self):
+        """
+        This method is used to get lazy access to the samples of the data set, it is
+        implemented by each model for its own data set format.
+        :return: (function, int), function that reads the (samples, float32 inputs; int32 sign label
+        indexes) of an array of sample indexes, and the number of samples in the data set.
+        """
+        pass
+
+    def is_validation_sample(self, index, validation_split):
+        """
+        This method is used to split the data set into training and validation samples
+        by hashing the index of each sample, so the split is the same on every run, it
+        does not need the data set in memory and new samples do not move old ones.
+        :param index: tf.Tensor, int64 index of a sample.
+        :param validation_split: float, the fraction of the samples used for validation.
+        :return: tf.Tensor, bool, True if the sample is a validation sample.
+        """
+        # multiplicative hash(Knuth), mapped to [0, 1)
+        index_hash = tf.math.floormod((index + self.random_state) * 2654435761, 2 ** 32)
+
+        return tf.cast(index_hash, tf.float64) / 2 ** 32 < validation_split
+
+    def make_data_sets(self, batch_size=32, validation_split=0.2, shuffle_buffer_size=2 ** 16, augmenter=None):
+        """
+        This method is used to build the streaming training and validation data sets.
+        Only sample indexes go through the shuffle buffer, the samples are read in
+        batches from the data set files by parallel map calls and prefetched.
+        :param batch_size: int, the number of samples in a batch.
+        :param validation_split: float, the fraction of the samples used for validation.
+        :param shuffle_buffer_size: int, the number of sample indexes in the shuffle buffer.
+        :param augmenter: LandmarkAugmenter, augments the training batches, None to train on the raw samples.
+        :return: (tf.data.Dataset, tf.data.Dataset), the training and validation data sets of
+        (inputs, sparse int32 sign label indexes) batches.
+        """
+        read_samples, number_of_samples = self.get_sample_reader()
+        input_shape = (None,) + tuple(self.model.input_shape[1:])
+
+        def read_batch(indexes):
+            # sorted, so the data set files are read in order, the order inside a batch does not matter
+            return read_samples(np.sort(indexes))
+
+        def read_augmented_batch(indexes):
+            x, y = read_batch(indexes)
+            return augmenter.augment(x), y
+
+        def make_data_set(validation):
+            data_set = tf.data.Dataset.range(number_of_samples)
+            data_set = data_set.filter(
+                lambda index: self.is_validation_sample(index, validation_split) == validation)
+            if not validation:
+                data_set = data_set.shuffle(shuffle_buffer_size, seed=self.random_state,
+                                            reshuffle_each_iteration=True)
+            data_set = data_set.batch(batch_size)
+            data_set = data_set.map(
+                lambda indexes: tf.numpy_function(read_batch if validation or augmenter is None
+                                                  else read_augmented_batch, [indexes], (tf.float32, tf.int32)),
+                num_parallel_calls=tf.data.AUTOTUNE, deterministic=validation)
+            data_set = data_set.map(
+                lambda x, y: (tf.ensure_shape(x, input_shape), tf.ensure_shape(y, (None,))))
+
+            return data_set.prefetch(tf.data.AUTOTUNE)
+
+        return make_data_set(validation=False), make_data_set(validation=True)
+
 
 # noinspection DuplicatedCode
 class ModelStatic(Model):
     def __init__(self, sign_labels_file_path,
                  data_set_path, model_save_path,
-                 random_state):
+                 random_state, number_of_hands=1):
         super().__init__(sign_labels_file_path,
                          data_set_path,
                          model_save_path,
-                         random_state)
+                         random_state,
+                         number_of_hands)
 
         self.get_sign_labels()
 
         self.model = Sequential([
-            Input((21 * 2,)),
+            Input((self.number_of_features,)),
             Dense(256, activation=PReLU()),
             Dropout(0.2),
             Dense(128, activation=PReLU()),
@@ -61,14 +137,10 @@ class ModelStatic(Model):
         ])
 
     def load_data_set(self):
-        x_data = np.loadtxt(self.data_set_path,
-                            delimiter=',',
-                            dtype='float32',
-                            usecols=list(range(1, 43)))
-        y_data = np.loadtxt(self.data_set_path,
-                            delimiter=',',
-                            dtype='int32',
-                            usecols=0)
+        x_data, y_data = load_static_data_set(self.data_set_path,
+                                              self.sign_labels,
+                                              mmap_mode=None,
+                                              number_of_features=self.number_of_features)
 
         return train_test_split(x_data,
                                 to_categorical(y_data,
@@ -76,15 +148,29 @@ class ModelStatic(Model):
                                 test_size=0.2,
                                 random_state=55)
 
+    def get_sample_reader(self):
+        # memory-mapped binary cache of the CSV file, the rows are read when a batch needs them
+        data = load_static_data_set_matrix(self.data_set_path,
+                                           self.sign_labels,
+                                           mmap_mode='r',
+                                           number_of_features=self.number_of_features)
+
+        def read_samples(indexes):
+            rows = data[indexes]
+            return rows[:, 1:], rows[:, 0].astype(np.int32)
+
+        return read_samples, len(data)
+
 
 class ModelDynamic(Model):
     def __init__(self, sign_labels_file_path,
                  data_set_path, model_save_path,
-                 random_state):
+                 random_state, number_of_hands=1):
         super().__init__(sign_labels_file_path,
                          data_set_path,
                          model_save_path,
-                         random_state)
+                         random_state,
+                         number_of_hands)
 
         self.data_set_signs_path = []
         self.get_sign_labels()
@@ -92,7 +178,7 @@ class ModelDynamic(Model):
         self.model = Sequential([
             GRU(256, return_sequences=True,
                 activation=PReLU(),
-                input_shape=(30, 21 * 2)),
+                input_shape=(30, self.number_of_features)),
             GRU(128, return_sequences=True,
                 activation=PReLU()),
             GRU(64, return_sequences=False,
@@ -131,16 +217,49 @@ class ModelDynamic(Model):
         x_data = []
         y_data = []
 
-        self.get_data_set_dirs()
-        for i, sign_dir in enumerate(
-                self.data_set_signs_path):
-            for file in os.listdir(sign_dir):
-                data = np.load(sign_dir + "/" + file)
-                x_data.append(data)
-                y_data.append(i)
+        # packed data set(see SequenceStore.py), one read instead of one per sequence
+        if SequenceStore.is_sequence_store(self.data_set_path):
+            store = SequenceStore(self.data_set_path)
+            x_data = store.get_sequences()
+            y_data = store.get_labels()
+        else:
+            self.get_data_set_dirs()
+            for i, sign_dir in enumerate(
+                    self.data_set_signs_path):
+                for file in os.listdir(sign_dir):
+                    data = np.load(sign_dir + "/" + file)
+                    x_data.append(data)
+                    y_data.append(i)
 
         return train_test_split(np.array(x_data),
                                 to_categorical(y_data,
                                                len(self.sign_labels)),
                                 test_size=0.2,
                                 random_state=self.random_state)
+
+    def get_sample_reader(self):
+        # packed data set(see SequenceStore.py): memory-mapped, the sequences are read when a batch needs them
+        if SequenceStore.is_sequence_store(self.data_set_path):
+            store = SequenceStore(self.data_set_path)
+            sequences = store.get_sequences()
+            labels = store.get_labels()
+
+            def read_samples(indexes):
+                return sequences[indexes], labels[indexes]
+
+            return read_samples, len(store)
+
+        # one .npy file per sequence: only the file names are listed here, the files are read in batches
+        self.get_data_set_dirs()
+        file_paths = []
+        labels = []
+        for i, sign_dir in enumerate(self.data_set_signs_path):
+            for file in os.listdir(sign_dir):
+                file_paths.append(sign_dir + "/" + file)
+                labels.append(i)
+        labels = np.array(labels, dtype=np.int32)
+
+        def read_samples(indexes):
+            return np.array([np.load(file_paths[i]) for i in indexes], dtype=np.float32), labels[indexes]
+
+        return read_samples, len(file_paths)
@@ -0,0 +1,113 @@
+import json
+import os
+import sys
+import numpy as np
+
+# the static data set CSV files are converted once to a binary .npy matrix:
+#   - <data set>.npy:  float32 (rows, 1 + number_of_features) matrix, column 0 is the sign label index, the other
+#                      columns the landmarks(42 for one hand, 84 for the two-hand data sets)
+#   - <data set>.json: sidecar with the sign label list, the number of features and the mtime/size of the source
+#                      CSV file
+# the cache is rebuilt when the source CSV file changes or it was built with another number of features
+
+
+def get_cache_paths(csv_path):
+    """
+    This function is used to get the paths of the cache files of a CSV data set.
+    :param csv_path: str, path to the static data set file(.csv).
+    :return: (str, str), path to the .npy matrix and to the .json sidecar.
+    """
+    base_path = os.path.splitext(csv_path)[0]
+
+    return base_path + ".npy", base_path + ".json"
+
+
+def convert_csv_to_npy(csv_path, sign_labels=None, number_of_features=21 * 2):
+    """
+    This function is used to parse a static data set CSV file in a single pass
+    and save it as a binary .npy matrix with a .json sidecar.
+    :param csv_path: str, path to the static data set file(.csv).
+    :param sign_labels: list, the sign labels of the data set, stored in the sidecar.
+    :param number_of_features: int, the number of landmark values in a row, 84 for the two-hand data sets.
+    :return npy_path: str, path to the saved .npy matrix.
+    """
+    npy_path, json_path = get_cache_paths(csv_path)
+    source_stat = os.stat(csv_path)
+
+    data = np.loadtxt(csv_path, delimiter=',', dtype=np.float32, ndmin=2,
+                      usecols=list(range(0, number_of_features + 1)))
+    np.save(npy_path, data)
+
+    with open(json_path, 'w') as file:
+        json.dump({
+            'source': os.path.basename(csv_path),
+            'source_mtime_ns': source_stat.st_mtime_ns,
+            'source_size': source_stat.st_size,
+            'rows': int(data.shape[0]),
+            'number_of_features': number_of_features,
+            'sign_labels': [str(sign_label) for sign_label in sign_labels] if sign_labels is not None else None
+        }, file, indent=4)
+
+    return npy_path
+
+
+def is_cache_valid(csv_path, number_of_features=21 * 2):
+    """
+    This function is used to check if the cache of a CSV data set is up to date.
+    :param csv_path: str, path to the static data set file(.csv).
+    :param number_of_features: int, the number of landmark values in a row the cache must have.
+    :return: bool, True if the cache exists and was built from the current CSV file with number_of_features.
+    """
+    npy_path, json_path = get_cache_paths(csv_path)
+    if not os.path.isfile(npy_path) or not os.path.isfile(json_path):
+        return False
+
+    with open(json_path, 'r') as file:
+        sidecar = json.load(file)
+    source_stat = os.stat(csv_path)
+
+    return sidecar['source_mtime_ns'] == source_stat.st_mtime_ns and sidecar['source_size'] == source_stat.st_size \
+        and sidecar.get('number_of_features') == number_of_features
+
+
+def load_static_data_set_matrix(csv_path, sign_labels=None, mmap_mode='r', number_of_features=21 * 2):
+    """
+    This function is used to load the cached matrix of a static data set, the
+    CSV file is parsed once and the cache is rebuilt if it is not up to date.
+    :param csv_path: str, path to the static data set file(.csv).
+    :param sign_labels: list, the sign labels of the data set, stored in the sidecar.
+    :param mmap_mode: str, 'r' to memory-map the matrix, None to read it into memory.
+    :param number_of_features: int, the number of landmark values in a row, 84 for the two-hand data sets.
+    :return data: np.array, the (rows, 1 + number_of_features) float32 matrix, column 0 is the sign label index.
+    """
+    if not is_cache_valid(csv_path, number_of_features):
+        convert_csv_to_npy(csv_path, sign_labels, number_of_features)
+
+    return np.load(get_cache_paths(csv_path)[0], mmap_mode=mmap_mode)
+
+
+def load_static_data_set(csv_path, sign_labels=None, mmap_mode='r', number_of_features=21 * 2):
+    """
+    This function is used to load a static data set, from its binary cache if it
+    is up to date, otherwise the CSV file is parsed once and the cache is rebuilt.
+    :param csv_path: str, path to the static data set file(.csv).
+    :param sign_labels: list, the sign labels of the data set, stored in the sidecar.
+    :param mmap_mode: str, 'r' to memory-map the matrix, None to read it into memory.
+    :param number_of_features: int, the number of landmark values in a row, 84 for the two-hand data sets.
+    :return: (np.array, np.array), the (rows, number_of_features) float32 landmarks and the (rows,) int32
+    sign label indexes.
+    """
+    data = load_static_data_set_matrix(csv_path, sign_labels, mmap_mode, number_of_features)
+
+    return data[:, 1:], data[:, 0].astype(np.int32)
+
+
+if __name__ == "__main__":
+
+    # usage: python DataSetCache.py data_set.csv [sign_labels.csv]
+    sign_labels = None
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], 'r') as file:
+            sign_labels = file.read().splitlines()
+
+    print(f"Saved '{convert_csv_to_npy(sys.argv[1], sign_labels)}'")
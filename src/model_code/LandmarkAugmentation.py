@@ -0,0 +1,117 @@
+import threading
+import numpy as np
+
+
+class LandmarkAugmenter:
+    """
+    This class is used to augment whole batches of normalized landmarks, the
+    (batch, 42) static samples or the (batch, frames, 42) dynamic sequences,
+    with random rotation around the wrist, scale, mirroring, Gaussian jitter
+    and, for the sequences, time-warp. Every operation works on the whole
+    batch at once, the random values are drawn once for each sample(rotation,
+    scale, mirroring, time-warp) or for each landmark(jitter).
+    The two-hand samples(84 values, the (2, 21, 2) hand tensor) are augmented
+    the same way: a missing hand stays zeros and mirroring swaps the hands.
+    """
+
+    def __init__(self, max_rotation=15.0, scale_range=(0.9, 1.1), mirror_probability=0.5,
+                 jitter_std=0.003, time_warp_range=(0.8, 1.2), aspect_ratio=640 / 480, seed=None) -> None:
+        """
+        Initialize the LandmarkAugmenter object.
+        :param max_rotation: float, the maximum rotation around the wrist, in degrees.
+        :param scale_range: (float, float), the range of the random scale.
+        :param mirror_probability: float, the probability of mirroring a sample(the other hand).
+        :param jitter_std: float, the standard deviation of the Gaussian noise added to every landmark.
+        :param time_warp_range: (float, float), the range of the random speed of the sequences.
+        :param aspect_ratio: float, width / height of the camera frames, the landmarks are
+        normalized to the frame size, so x is scaled by it to rotate without shearing the hand.
+        :param seed: int, seed of the random generator.
+        """
+        self.max_rotation = max_rotation
+        self.scale_range = scale_range
+        self.mirror_probability = mirror_probability
+        self.jitter_std = jitter_std
+        self.time_warp_range = time_warp_range
+        self.aspect_ratio = aspect_ratio
+
+        self.rng = np.random.default_rng(seed)
+        # the tf.data map calls run on several threads, the random generator is not thread safe
+        self.lock = threading.Lock()
+
+    def augment(self, x):
+        """
+        This method is used to augment a batch of samples.
+        :param x: np.array, (batch, 42 or 84) static samples or (batch, frames, 42 or 84) sequences.
+        :return x: np.array, the augmented float32 batch, with the same shape.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        is_sequence = x.ndim == 3
+        batch_size = x.shape[0]
+        number_of_frames = x.shape[1] if is_sequence else 1
+        number_of_hands = x.shape[-1] // (21 * 2)
+
+        with self.lock:
+            angles = np.radians(self.rng.uniform(-self.max_rotation, self.max_rotation, batch_size))
+            scales = self.rng.uniform(*self.scale_range, batch_size)
+            mirrors = self.rng.random(batch_size) < self.mirror_probability
+            noise = self.rng.standard_normal((batch_size, number_of_frames * number_of_hands * 21, 2),
+                                             dtype=np.float32)
+            speeds = self.rng.uniform(*self.time_warp_range, batch_size) if is_sequence else None
+            offsets = self.rng.random(batch_size) if is_sequence else None
+
+        if is_sequence:
+            x = self.time_warp(x, speeds, offsets)
+
+        # (batch, frames * hands * 21, 2) points, the wrist is the origin of the normalized landmarks
+        points = x.reshape(batch_size, number_of_frames * number_of_hands * 21, 2)
+
+        # one 2x2 matrix for each sample: mirror, rotation and scale, in square pixel units
+        cos, sin = np.cos(angles) * scales, np.sin(angles) * scales
+        matrices = np.stack([np.stack([cos, -sin], axis=-1), np.stack([sin, cos], axis=-1)], axis=-2)
+        matrices[mirrors, :, 0] *= -1
+        to_pixels = np.array([self.aspect_ratio, 1.0])
+        matrices = (matrices * to_pixels / to_pixels[:, np.newaxis]).astype(np.float32)
+
+        # row vectors, so the points are multiplied by the transposed matrices, batched in float32
+        points = np.matmul(points, matrices.transpose(0, 2, 1))
+        noise *= self.jitter_std
+        points += noise
+        # the jitter also moves the wrist, it is put back in the origin
+        points = points.reshape(batch_size, number_of_frames, number_of_hands, 21, 2)
+        points -= points[:, :, :, :1]
+
+        if number_of_hands > 1:
+            # the missing hands stay zeros, a mirrored left hand is a right hand
+            hands_present = np.any(x.reshape(batch_size, number_of_frames, number_of_hands, 21 * 2) != 0, axis=-1)
+            points *= hands_present[:, :, :, np.newaxis, np.newaxis]
+            points[mirrors] = points[mirrors, :, ::-1]
+
+        return points.reshape(x.shape)
+
+    @staticmethod
+    def time_warp(x, speeds, offsets):
+        """
+        This method is used to resample the sequences at a random speed with linear interpolation.
+        :param x: np.array, (batch, frames, 42) sequences.
+        :param speeds: np.array, (batch,) the speed of each sequence, above 1 is faster.
+        :param offsets: np.array, (batch,) in [0, 1), where the resampled window starts in the free frames.
+        :return: np.array, (batch, frames, 42) the resampled sequences.
+        """
+        batch_size, number_of_frames = x.shape[:2]
+        last_frame = number_of_frames - 1
+
+        # the resampled window covers last_frame * speed source frames: a slower one starts somewhere
+        # in the frames it does not cover, a faster one runs past the end and repeats the last frame
+        starts = offsets * np.maximum(last_frame - last_frame * speeds, 0.0)
+        positions = starts[:, np.newaxis] + np.arange(number_of_frames) * speeds[:, np.newaxis]
+        positions = np.clip(positions, 0, last_frame)
+
+        previous = np.floor(positions).astype(np.int64)
+        following = np.minimum(previous + 1, last_frame)
+        weights = (positions - previous)[:, :, np.newaxis]
+
+        batch_indexes = np.arange(batch_size)[:, np.newaxis]
+
+        weights = weights.astype(np.float32)
+
+        return x[batch_indexes, previous] * (1 - weights) + x[batch_indexes, following] * weights
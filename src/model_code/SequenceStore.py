@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import numpy as np
+
+# packed store for the dynamic data set, instead of one small .npy file per sequence:
+#   <store>/sequences.f32: all the sequences, one contiguous float32 (count, frames, features) matrix
+#   <store>/labels.i32:    the sign label index of every sequence, int32 (count,)
+#   <store>/meta.json:     count, shape and sign labels; count is only updated after the data is written,
+#                          so a sequence that was not written completely is ignored
+SEQUENCES_FILE_NAME = "sequences.f32"
+LABELS_FILE_NAME = "labels.i32"
+META_FILE_NAME = "meta.json"
+
+
+class SequenceStore:
+    """
+    This class is used to store the dynamic landmark sequences in one
+    memory-mapped file with a label index, with an append API for recording
+    and O(1) random access for training.
+    """
+
+    def __init__(self, store_path, number_of_frames=30, number_of_features=21 * 2, sign_labels=None) -> None:
+        """
+        Initialize the SequenceStore object, the store is created if it does not exist.
+        :param store_path: str, path to the store directory.
+        :param number_of_frames: int, the number of frames in a sequence(new stores only).
+        :param number_of_features: int, the number of values in a frame(new stores only).
+        :param sign_labels: list, the sign labels of the data set(new stores only).
+        """
+        self.store_path = store_path
+        self.sequences_file_path = os.path.join(store_path, SEQUENCES_FILE_NAME)
+        self.labels_file_path = os.path.join(store_path, LABELS_FILE_NAME)
+        self.meta_file_path = os.path.join(store_path, META_FILE_NAME)
+
+        if SequenceStore.is_sequence_store(store_path):
+            with open(self.meta_file_path, 'r') as file:
+                self.meta = json.load(file)
+        else:
+            os.makedirs(store_path, exist_ok=True)
+            self.meta = {
+                'count': 0,
+                'number_of_frames': number_of_frames,
+                'number_of_features': number_of_features,
+                'sign_labels': list(sign_labels) if sign_labels is not None else None
+            }
+            open(self.sequences_file_path, 'wb').close()
+            open(self.labels_file_path, 'wb').close()
+            self.save_meta()
+
+        self.sequence_shape = (self.meta['number_of_frames'], self.meta['number_of_features'])
+        self.sequences = None
+        self.labels = None
+
+    @staticmethod
+    def is_sequence_store(path):
+        return os.path.isfile(os.path.join(path, META_FILE_NAME))
+
+    def save_meta(self):
+        # written to a temporary file first, so the meta file is never half written
+        temp_file_path = self.meta_file_path + ".tmp"
+        with open(temp_file_path, 'w') as file:
+            json.dump(self.meta, file, indent=4)
+        os.replace(temp_file_path, self.meta_file_path)
+
+    def __len__(self):
+        return self.meta['count']
+
+    def __getitem__(self, index):
+        """
+        :param index: int, the index of the sequence.
+        :return: (np.array, int), the (frames, features) sequence(read only view) and its sign label index.
+        """
+        return self.get_sequences()[index], int(self.get_labels()[index])
+
+    def get_sequences(self):
+        """
+        :return sequences: np.array, (count, frames, features) read only memory-map of all the sequences.
+        """
+        if self.sequences is None or len(self.sequences) != len(self):
+            if len(self) == 0:
+                self.sequences = np.zeros((0,) + self.sequence_shape, dtype=np.float32)
+            else:
+                self.sequences = np.memmap(self.sequences_file_path, dtype=np.float32, mode='r',
+                                           shape=(len(self),) + self.sequence_shape)
+
+        return self.sequences
+
+    def get_labels(self):
+        """
+        :return labels: np.array, (count,) read only memory-map of the sign label indexes.
+        """
+        if self.labels is None or len(self.labels) != len(self):
+            if len(self) == 0:
+                self.labels = np.zeros(0, dtype=np.int32)
+            else:
+                self.labels = np.memmap(self.labels_file_path, dtype=np.int32, mode='r', shape=(len(self),))
+
+        return self.labels
+
+    def count_labels(self, number_of_labels):
+        """
+        :param number_of_labels: int, the number of sign labels.
+        :return: list, the number of sequences of each sign label.
+        """
+        return np.bincount(self.get_labels(), minlength=number_of_labels).tolist()
+
+    def append_many(self, sequences, labels):
+        """
+        This method is used to add sequences to the end of the store.
+        :param sequences: np.array, (number of sequences, frames, features) the sequences.
+        :param labels: np.array, (number of sequences,) the sign label index of each sequence.
+        :return: int, the index of the first added sequence.
+        """
+        sequences = np.ascontiguousarray(sequences, dtype=np.float32).reshape((-1,) + self.sequence_shape)
+        labels = np.ascontiguousarray(labels, dtype=np.int32).reshape(-1)
+        if len(sequences) != len(labels):
+            raise ValueError("Error: The number of sequences and of labels must be the same!")
+
+        first_index = len(self)
+        for file_path, data, item_size in ((self.sequences_file_path, sequences, sequences[0:1].nbytes),
+                                           (self.labels_file_path, labels, labels[0:1].nbytes)):
+            # written after the last complete item, so the data left by an interrupted append is overwritten
+            with open(file_path, 'r+b') as file:
+                file.seek(first_index * item_size)
+                file.write(data.tobytes())
+                file.flush()
+                os.fsync(file.fileno())
+
+        self.meta['count'] = first_index + len(sequences)
+        self.save_meta()
+
+        return first_index
+
+    def append(self, sequence, label):
+        """
+        This method is used to add one sequence to the end of the store.
+        :param sequence: np.array, (frames, features) the sequence.
+        :param label: int, the sign label index of the sequence.
+        :return: int, the index of the added sequence.
+        """
+        return self.append_many(np.asarray(sequence)[np.newaxis], [label])
+
+
+def migrate_npy_tree(data_set_dir_path, sign_labels, store_path):
+    """
+    This function is used to pack an existing data_set_N/<sign label>/*.npy tree in a SequenceStore.
+    :param data_set_dir_path: str, the dynamic data set directory.
+    :param sign_labels: list, the sign labels, in the order of the sign labels file.
+    :param store_path: str, path to the new store directory.
+    :return store: SequenceStore, the store with all the sequences.
+    """
+    store = SequenceStore(store_path, sign_labels=sign_labels)
+
+    for i, sign_label in enumerate(sign_labels):
+        sign_dir_path = os.path.join(data_set_dir_path, sign_label)
+        if not os.path.isdir(sign_dir_path):
+            continue
+        # sorted by the sequence number, not as text
+        file_names = sorted((file_name for file_name in os.listdir(sign_dir_path) if file_name.endswith(".npy")),
+                            key=lambda file_name: (len(file_name), file_name))
+        if len(file_names) != 0:
+            sequences = np.array([np.load(os.path.join(sign_dir_path, file_name)) for file_name in file_names])
+            store.append_many(sequences, np.full(len(sequences), i))
+
+    return store
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Pack a dynamic data set directory(<sign label>/*.npy) "
+                                                 "into a SequenceStore.")
+    parser.add_argument("data_set_dir_path", help="the dynamic data set directory, e.g. data_set_3")
+    parser.add_argument("sign_labels_file_path", help="the sign labels file(.csv)")
+    parser.add_argument("store_path", help="the store directory to be created, e.g. data_set_3.store")
+    args = parser.parse_args()
+
+    if SequenceStore.is_sequence_store(args.store_path):
+        print(f"Error: Store '{args.store_path}' already exists!")
+        exit(1)
+
+    with open(args.sign_labels_file_path, 'r') as file:
+        sign_labels = file.read().splitlines()
+
+    store = migrate_npy_tree(args.data_set_dir_path, sign_labels, args.store_path)
+    for sign_label, count in zip(sign_labels, store.count_labels(len(sign_labels))):
+        print(f"{sign_label}: {count}")
+    print(f"Packed {len(store)} sequences into '{args.store_path}'")
@@ -5,6 +5,9 @@ from sklearn.model_selection import train_test_split
 from tensorflow.keras.utils import to_categorical
 from keras.models import load_model
 
+from DataSetCache import load_static_data_set
+from SequenceStore import SequenceStore
+
 
 class Model:
 
@@ -42,15 +45,13 @@ class ModelStatic(Model):
         self.model = load_model(model_weights_file_path)
 
     def load_data_set(self):
-        x_data = np.loadtxt(self.data_set_path, delimiter=',', dtype='float32', usecols=list(range(1, (21 * 2) + 1)))
-        y_data = np.loadtxt(self.data_set_path, delimiter=',', dtype='int32', usecols=0)
+        x_data, y_data = load_static_data_set(self.data_set_path, self.sign_labels, mmap_mode=None)
 
         return train_test_split(x_data, to_categorical(y_data, len(self.sign_labels)), test_size=0.2, random_state=55)  # TODO: try different number
 
     def load_data_set_first_x(self, x):
         # Load the entire dataset
-        x_data = np.loadtxt(self.data_set_path, delimiter=',', dtype='float32', usecols=list(range(1, (21 * 2) + 1)))
-        y_data = np.loadtxt(self.data_set_path, delimiter=',', dtype='int32', usecols=0)
+        x_data, y_data = load_static_data_set(self.data_set_path, self.sign_labels, mmap_mode=None)
 
         # Initialize lists to hold the filtered data
         x_100 = []
@@ -99,12 +100,18 @@ class ModelDynamic(Model):
         x_data = []
         y_data = []
 
-        self.get_data_set_dirs()
-        for i, sign_dir in enumerate(self.data_set_signs_path):
-            for file in os.listdir(sign_dir):
-                data = np.load(sign_dir + "/" + file)
-                x_data.append(data)
-                y_data.append(i)
+        # packed data set(see SequenceStore.py), one read instead of one per sequence
+        if SequenceStore.is_sequence_store(self.data_set_path):
+            store = SequenceStore(self.data_set_path)
+            x_data = store.get_sequences()
+            y_data = store.get_labels()
+        else:
+            self.get_data_set_dirs()
+            for i, sign_dir in enumerate(self.data_set_signs_path):
+                for file in os.listdir(sign_dir):
+                    data = np.load(sign_dir + "/" + file)
+                    x_data.append(data)
+                    y_data.append(i)
 
         return train_test_split(np.array(x_data), to_categorical(y_data, len(self.sign_labels)),
                                 test_size=0.2, random_state=self.random_state)
\ No newline at end of file
@@ -0,0 +1,34 @@
+import sys
+import time
+import numpy as np
+
+from LandmarkAugmentation import LandmarkAugmenter
+
+# throughput of the landmark augmentation in samples/sec, on random static
+# (batch, 42) and dynamic (batch, 30, 42) batches of a few batch sizes
+# usage: python benchmark_augmentation.py [seconds per measurement]
+SECONDS_PER_MEASUREMENT = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+BATCH_SIZES = [32, 256, 1024]
+
+
+def samples_per_second(augmenter, x):
+    augmenter.augment(x)  # warm up
+
+    number_of_batches = 0
+    start_time = time.perf_counter()
+    while time.perf_counter() - start_time < SECONDS_PER_MEASUREMENT:
+        augmenter.augment(x)
+        number_of_batches += 1
+
+    return number_of_batches * len(x) / (time.perf_counter() - start_time)
+
+
+if __name__ == "__main__":
+
+    rng = np.random.default_rng(55)
+    augmenter = LandmarkAugmenter(seed=55)
+
+    for name, sample_shape in (("static", (21 * 2,)), ("dynamic", (30, 21 * 2))):
+        for batch_size in BATCH_SIZES:
+            x = rng.uniform(-0.3, 0.3, size=(batch_size,) + sample_shape).astype(np.float32)
+            print(f"{name:>7} batch {batch_size:4d}: {samples_per_second(augmenter, x):12,.0f} samples/s")
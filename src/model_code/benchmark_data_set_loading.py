@@ -0,0 +1,51 @@
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+from DataSetCache import load_static_data_set
+
+# load time of a static data set with the old double np.loadtxt path
+# against the binary cache(first load converts, later loads read the .npy file)
+# usage: python benchmark_data_set_loading.py [number of rows]
+NUMBER_OF_ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+NUMBER_OF_SIGN_LABELS = 26
+
+
+def load_with_loadtxt(csv_path):
+    # the loading code used before the binary cache
+    x_data = np.loadtxt(csv_path, delimiter=',', dtype='float32', usecols=list(range(1, (21 * 2) + 1)))
+    y_data = np.loadtxt(csv_path, delimiter=',', dtype='int32', usecols=0)
+
+    return x_data, y_data
+
+
+def measure(function):
+    start_time = time.perf_counter()
+    result = function()
+
+    return time.perf_counter() - start_time, result
+
+
+if __name__ == "__main__":
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_path = os.path.join(temp_dir, "data_set.csv")
+        rng = np.random.default_rng(55)
+        data = np.column_stack([rng.integers(0, NUMBER_OF_SIGN_LABELS, NUMBER_OF_ROWS),
+                                rng.uniform(-0.3, 0.3, size=(NUMBER_OF_ROWS, 21 * 2)).astype(np.float32)])
+        np.savetxt(csv_path, data, delimiter=',', fmt=['%d'] + ['%.8g'] * (21 * 2))
+        print(f"{NUMBER_OF_ROWS} rows, {os.path.getsize(csv_path) / 2 ** 20:.0f} MiB CSV file")
+
+        old_time, (x_old, y_old) = measure(lambda: load_with_loadtxt(csv_path))
+        convert_time, _ = measure(lambda: load_static_data_set(csv_path, mmap_mode=None))
+        cached_time, (x_new, y_new) = measure(lambda: load_static_data_set(csv_path, mmap_mode=None))
+        mmap_time, _ = measure(lambda: load_static_data_set(csv_path))
+
+        assert np.array_equal(x_old, x_new) and np.array_equal(y_old, y_new)
+
+        print(f"       np.loadtxt twice: {old_time:8.3f} s")
+        print(f"first load(+convert): {convert_time:8.3f} s")
+        print(f"      cached, in RAM: {cached_time:8.3f} s ({old_time / cached_time:.0f}x faster)")
+        print(f"  cached, memory-map: {mmap_time:8.3f} s")
@@ -5,8 +5,10 @@ import os
 from keras.callbacks import TensorBoard, ModelCheckpoint, EarlyStopping
 
 from BuildLanguageModels import ModelStatic
+from LandmarkAugmentation import LandmarkAugmenter
 
 TRY = "_5"
+NUMBER_OF_HANDS = 1  # 2 for the two-hand data sets, (2, 21, 2) hand tensors
 ATTEMPT = f"{TRY}_final"
 
 base_dir = os.path.dirname(os.path.realpath(__file__)) + '/../../'
@@ -18,9 +20,14 @@ model_summary_save_path = base_dir + f"images/static/model_summary/model_static{
 model = ModelStatic(sign_labels_file_path=sign_labels_file_path,
                     data_set_path=data_set_path,
                     model_save_path=model_save_path,
-                    random_state=55)
+                    random_state=55,
+                    number_of_hands=NUMBER_OF_HANDS)
 
-x_train, x_test, y_train, y_test = model.load_data_set()
+# streamed from the data set files in batches, with sparse sign label indexes,
+# the training batches are augmented(rotation, scale, mirroring, jitter)
+train_data_set, validation_data_set = model.make_data_sets(batch_size=32,
+                                                           validation_split=0.2,
+                                                           augmenter=LandmarkAugmenter(seed=55))
 
 checkpoint = ModelCheckpoint(model.model_save_path, verbose=1,
                              save_weights_only=False)
@@ -28,18 +35,16 @@ early_stopping = EarlyStopping(patience=20, verbose=1)
 tensor_board = TensorBoard(log_dir='./logs', histogram_freq=1)
 
 model.model.compile(optimizer='adam',
-                    loss='categorical_crossentropy',
-                    metrics=['categorical_accuracy'])
+                    loss='sparse_categorical_crossentropy',
+                    metrics=['sparse_categorical_accuracy'])
 
-results = model.model.fit(x_train,
-                          y_train,
+results = model.model.fit(train_data_set,
                           epochs=1000,
-                          validation_data=(x_test, y_test),
+                          validation_data=validation_data_set,
                           callbacks=[tensor_board, checkpoint,
                                      early_stopping])
 
-val_loss, val_acc = model.model.evaluate(x_test, y_test,
-                                         batch_size=16)
+val_loss, val_acc = model.model.evaluate(validation_data_set)
 
 model.save_model()
 
@@ -55,8 +60,8 @@ plt.savefig(base_dir + f'images/models/static/loss/loss{ATTEMPT}.png')
 plt.close('all')
 
 # plot val and train accuracy
-plt.plot(results.history['categorical_accuracy'])
-plt.plot(results.history['val_categorical_accuracy'])
+plt.plot(results.history['sparse_categorical_accuracy'])
+plt.plot(results.history['val_sparse_categorical_accuracy'])
 plt.title('Acuratețea Modelului')
 plt.ylabel('Acuratețe')
 plt.xlabel('Epocă')